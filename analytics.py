@@ -5,7 +5,11 @@ import seaborn as sns
 from wordcloud import WordCloud
 import os
 import plotly.express as px
-import statsmodels.api as sm # Added this import for OLS trendline
+import hashlib
+from charts import (
+    data_hash, render_histogram, render_score_vs_experience,
+    render_wordcloud, render_top_counts_bar
+)
 
 # --- Function to encapsulate the Analytics Dashboard logic ---
 def analytics_dashboard_page():
@@ -172,21 +176,13 @@ def analytics_dashboard_page():
 
     with tab1:
         st.markdown("#### Score Distribution")
-        fig_hist, ax_hist = plt.subplots(figsize=(10, 5))
-        sns.histplot(filtered_df['Score (%)'], bins=10, kde=True, color="#00cec9", ax=ax_hist)
-        ax_hist.set_xlabel("Score (%)")
-        ax_hist.set_ylabel("Number of Candidates")
-        st.pyplot(fig_hist)
-        plt.close(fig_hist) # Close the figure to free up memory
+        score_key = data_hash(filtered_df, ['Score (%)'])
+        st.image(render_histogram(score_key, filtered_df['Score (%)'], 10, "#00cec9", "Score (%)"))
 
     with tab2:
         st.markdown("#### Experience Distribution")
-        fig_exp, ax_exp = plt.subplots(figsize=(10, 5))
-        sns.histplot(filtered_df['Years Experience'], bins=5, kde=True, color="#fab1a0", ax=ax_exp)
-        ax_exp.set_xlabel("Years of Experience")
-        ax_exp.set_ylabel("Number of Candidates")
-        st.pyplot(fig_exp)
-        plt.close(fig_exp) # Close the figure to free up memory
+        exp_key = data_hash(filtered_df, ['Years Experience'])
+        st.image(render_histogram(exp_key, filtered_df['Years Experience'], 5, "#fab1a0", "Years of Experience"))
 
     with tab3:
         st.markdown("#### Shortlist Breakdown")
@@ -205,16 +201,11 @@ def analytics_dashboard_page():
 
     with tab4:
         st.markdown("#### Score vs. Years Experience")
-        fig_scatter = px.scatter(
-            filtered_df,
-            x="Years Experience",
-            y="Score (%)",
-            hover_name="Candidate Name",
-            color="Shortlisted",
-            title="Candidate Score vs. Years Experience",
-            labels={"Years Experience": "Years of Experience", "Score (%)": "Matching Score (%)"},
-            trendline="ols",
-            color_discrete_map={f"Yes (Score >= {shortlist_threshold}%)": "green", "No": "red"}
+        scatter_cols = [c for c in ["Years Experience", "Score (%)", "Shortlisted", "Candidate Name"] if c in filtered_df.columns]
+        fig_scatter = render_score_vs_experience(
+            data_hash(filtered_df, scatter_cols),
+            filtered_df[scatter_cols],
+            {f"Yes (Score >= {shortlist_threshold}%)": "green", "No": "red"}
         )
         st.plotly_chart(fig_scatter, use_container_width=True)
         # Plotly figures are automatically closed by Streamlit, so no plt.close() needed.
@@ -230,12 +221,8 @@ def analytics_dashboard_page():
                     for kw in str(kws).split(',') if kw.strip()
                 ]
                 if all_keywords:
-                    wc = WordCloud(width=800, height=400, background_color="white").generate(" ".join(all_keywords))
-                    fig_wc, ax_wc = plt.subplots(figsize=(10, 4))
-                    ax_wc.imshow(wc, interpolation='bilinear')
-                    ax_wc.axis('off')
-                    st.pyplot(fig_wc)
-                    plt.close(fig_wc) # Close the figure
+                    wc_key = hashlib.sha1("\x1f".join(all_keywords).encode("utf-8")).hexdigest()
+                    st.image(render_wordcloud(wc_key, all_keywords))
                 else:
                     st.info("No common skills to display in the WordCloud for filtered data.")
             else:
@@ -249,14 +236,9 @@ def analytics_dashboard_page():
                     for s in str(row).split(',') if s.strip()
                 ])
                 if not all_missing.empty:
-                    sns.set_style("whitegrid") # Apply style before creating figure
-                    fig_ms, ax_ms = plt.subplots(figsize=(8, 4))
                     top_missing = all_missing.value_counts().head(10)
-                    sns.barplot(x=top_missing.values, y=top_missing.index, ax=ax_ms, palette="coolwarm")
-                    ax_ms.set_xlabel("Count")
-                    ax_ms.set_ylabel("Missing Skill")
-                    st.pyplot(fig_ms)
-                    plt.close(fig_ms) # Close the figure
+                    missing_key = hashlib.sha1(top_missing.to_json().encode("utf-8")).hexdigest()
+                    st.image(render_top_counts_bar(missing_key, top_missing, "Count", "Missing Skill"))
                 else:
                     st.info("No top missing skills to display for filtered data.")
             else:
@@ -0,0 +1,143 @@
+"""
+End-to-end test / benchmark for the email outbox against a local SMTP sink.
+
+Starts a minimal SMTP server on localhost (stdlib socketserver, no auth, no TLS)
+that can add per-message latency and answer a fraction of messages with a
+temporary 451 error. It then queues N invitations (2,000 by default) through
+EmailOutbox, waits for the workers to drain the queue and reports throughput,
+retries and whether every recipient got exactly one message. Finally it
+re-queues the same batch to show that reruns send nothing twice.
+
+Usage:
+    python bench_email.py [--messages 2000] [--workers 4] [--rate 200]
+                          [--latency-ms 20] [--fail-rate 0.02]
+"""
+import argparse
+import logging
+import os
+import random
+import socketserver
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import email_outbox
+from email_outbox import EmailOutbox
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, latency, fail_rate, seed):
+        super().__init__(address, SMTPSinkHandler)
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.delivered = Counter()      # Message-ID -> deliveries
+        self.temporary_failures = 0
+        self.connections = 0
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT."""
+
+    def reply(self, line):
+        self.wfile.write((line + "\r\n").encode("ascii"))
+
+    def handle(self):
+        sink = self.server
+        with sink.lock:
+            sink.connections += 1
+        self.reply("220 localhost sink ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.reply("250 localhost")
+            elif command.startswith(("MAIL FROM", "RCPT TO", "RSET", "NOOP")):
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                message_id = None
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line in (b".\r\n", b".\n"):
+                        break
+                    if message_id is None and data_line.lower().startswith(b"message-id:"):
+                        message_id = data_line.split(b":", 1)[1].strip().decode()
+                time.sleep(sink.latency)
+                with sink.lock:
+                    fail = sink.rng.random() < sink.fail_rate
+                    if fail:
+                        sink.temporary_failures += 1
+                    else:
+                        sink.delivered[message_id] += 1
+                self.reply("451 Temporary failure, try again later" if fail else "250 Queued")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=200.0, help="Rate limit (messages/second) for the sink server")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Simulated server time per message")
+    parser.add_argument("--fail-rate", type=float, default=0.02, help="Fraction of sends answered with 451")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # The outbox only imports streamlit for st.cache_resource; keep its bare-mode warnings out of the report
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+    # Keep retries short so a benchmark run is not dominated by backoff sleeps
+    email_outbox.BACKOFF_BASE_SECONDS = 0.05
+
+    sink = SMTPSink(("127.0.0.1", 0), args.latency_ms / 1000, args.fail_rate, args.seed)
+    host, port = sink.server_address
+    threading.Thread(target=sink.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        outbox = EmailOutbox(os.path.join(tmp_dir, "outbox.db"), workers=args.workers)
+        outbox.register_account(host, port, "hr@example.com", "", use_tls=False,
+                                rate_per_second=args.rate, burst=int(args.rate))
+        messages = [
+            (f"candidate{i}@example.com", f"Candidate {i}", "Interview invitation",
+             f"Dear Candidate {i},\n\nWe would like to invite you to an interview.\n")
+            for i in range(args.messages)
+        ]
+
+        start = time.perf_counter()
+        queued, duplicates = outbox.enqueue("bench", host, port, "hr@example.com", messages)
+        enqueue_seconds = time.perf_counter() - start
+        print(f"Queued {queued} messages in {enqueue_seconds * 1000:.0f} ms ({duplicates} duplicates)")
+
+        progress = outbox.wait_for_batch("bench", timeout=600)
+        elapsed = time.perf_counter() - start
+        print(f"Drained in {elapsed:.1f}s: {progress['sent']} sent, {progress['failed']} failed "
+              f"-> {progress['sent'] / elapsed:.0f} messages/s with {args.workers} workers")
+        print(f"Sink: {sum(sink.delivered.values())} deliveries, {len(sink.delivered)} unique Message-IDs, "
+              f"{sink.temporary_failures} temporary failures retried, {sink.connections} SMTP connections")
+        duplicates_delivered = sum(count - 1 for count in sink.delivered.values() if count > 1)
+        print(f"Duplicate deliveries: {duplicates_delivered}")
+
+        queued_again, duplicates_again = outbox.enqueue("bench", host, port, "hr@example.com", messages)
+        print(f"Re-queuing the same batch (simulated rerun): {queued_again} queued, {duplicates_again} skipped")
+
+        serial = args.messages * args.latency_ms / 1000
+        print(f"\nSerial single-connection estimate at {args.latency_ms:.0f} ms/message: {serial:.1f}s")
+        outbox.shutdown()
+    sink.shutdown()
+
+
+if __name__ == "__main__":
+    main()
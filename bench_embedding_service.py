@@ -0,0 +1,98 @@
+"""
+Benchmark for the micro-batching embedding service.
+
+Simulates N recruiters' sessions encoding single resumes/JDs at the same time
+and compares:
+  * direct   - every session calls model.encode() itself (the old behaviour)
+  * batched  - embedding_service.EmbeddingService gathers concurrent calls
+               into one forward pass
+By default the model is a stand-in with a fixed per-call cost plus a per-text
+cost, serialized by a lock like a single torch model under concurrent use;
+--real uses all-MiniLM-L6-v2 (needs sentence-transformers).
+
+Usage:
+    python bench_embedding_service.py [--sessions 20] [--calls 25] [--real]
+"""
+import argparse
+import logging
+import threading
+import time
+
+import numpy as np
+
+
+class SimulatedModel:
+    """Fixed overhead per encode() call plus a small cost per text, one call at a time."""
+
+    def __init__(self, call_ms=8.0, text_ms=0.4, dim=384):
+        self.call_ms, self.text_ms, self.dim = call_ms, text_ms, dim
+        self.lock = threading.Lock()
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else sentences
+        with self.lock:
+            time.sleep((self.call_ms + self.text_ms * len(texts)) / 1000)
+        out = np.ones((len(texts), self.dim), dtype=np.float32)
+        return out[0] if single else out
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+def run(encode, sessions, calls):
+    """Each session encodes `calls` texts one at a time; returns (wall_s, latencies)."""
+    barrier = threading.Barrier(sessions + 1)
+    latencies = []
+
+    def session(index):
+        barrier.wait()
+        for call in range(calls):
+            start = time.perf_counter()
+            vector = encode(f"resume {index} {call} python sql machine learning")
+            latencies.append(time.perf_counter() - start)
+            assert vector.ndim == 1
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--calls", type=int, default=25)
+    parser.add_argument("--real", action="store_true", help="Use the real sentence-transformers model")
+    args = parser.parse_args()
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+    from embedding_service import EmbeddingService
+    if args.real:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer("all-MiniLM-L6-v2")
+    else:
+        model = SimulatedModel()
+
+    service = EmbeddingService(model)
+    total = args.sessions * args.calls
+    print(f"{args.sessions} sessions x {args.calls} single-text encodes")
+    for label, encode in (("direct", model.encode), ("batched", service.encode)):
+        wall, latencies = run(encode, args.sessions, args.calls)
+        print(f"{label:>8}: {total / wall:8.1f} texts/s   p50 {percentile(latencies, 0.5) * 1000:7.1f} ms"
+              f"   p95 {percentile(latencies, 0.95) * 1000:7.1f} ms")
+    metrics = service.metrics()
+    print(f"service: {metrics['Batches']} batches, avg {metrics['Avg Batch Size']} texts, max queue depth {metrics['Max Queue Depth']}")
+    service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark for login bursts.
+
+Creates a throwaway user store with N users, then has N "script threads" log in
+at the same moment and compares:
+  * inline   - every thread calls bcrypt.checkpw itself (the old behaviour)
+  * pooled   - login.authenticate(), which runs bcrypt on the bounded auth pool
+While each burst runs, a probe thread repeatedly times a small pure-Python task
+to show how responsive the rest of the app stays. It also reports the cost of a
+rerun with a session token versus re-verifying the password, and checks that
+hashes created at an older work factor are upgraded on login.
+
+Usage:
+    python bench_login.py [--users 48] [--rounds 12] [--workers 4]
+"""
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+import bcrypt
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+def burst(users, login_fn):
+    """Starts one thread per user behind a barrier and returns (wall_s, per-login latencies, probe latencies)."""
+    barrier = threading.Barrier(len(users) + 1)
+    latencies = []
+    probe_samples = []
+    done = threading.Event()
+
+    def worker(username, password):
+        barrier.wait()
+        start = time.perf_counter()
+        assert login_fn(username, password)
+        latencies.append(time.perf_counter() - start)
+
+    def probe():
+        # Stand-in for another session's rerun: a short pure-Python loop
+        while not done.is_set():
+            start = time.perf_counter()
+            sum(i * i for i in range(2000))
+            probe_samples.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.005)
+
+    threads = [threading.Thread(target=worker, args=user) for user in users]
+    for thread in threads:
+        thread.start()
+    probe_thread = threading.Thread(target=probe)
+    probe_thread.start()
+    start = time.perf_counter()
+    barrier.wait()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    done.set()
+    probe_thread.join()
+    return wall, latencies, probe_samples
+
+
+def report(label, wall, latencies, probe_samples):
+    print(f"{label:<10}{wall:>9.2f}{statistics.median(latencies) * 1000:>12.0f}{percentile(latencies, 0.95) * 1000:>10.0f}"
+          f"{statistics.median(probe_samples):>14.2f}{percentile(probe_samples, 0.95):>12.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=48)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    # Configure the auth pool before login.py reads the environment
+    os.environ["SCREENERPRO_BCRYPT_ROUNDS"] = str(args.rounds)
+    os.environ["SCREENERPRO_AUTH_WORKERS"] = str(args.workers)
+    import login
+    # st.cache_resource warns about the missing Streamlit runtime on every call from a bare thread
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        login.USER_DB_FILE = os.path.join(tmp_dir, "users.json")
+        login.USER_DB_LOCK_FILE = login.USER_DB_FILE + ".lock"
+
+        print(f"Creating {args.users} users at bcrypt cost {args.rounds}...")
+        users = [(f"recruiter{i}@example.com", f"password-{i}") for i in range(args.users)]
+        login.save_users({
+            username: {"password": bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=args.rounds)).decode(), "status": "active"}
+            for username, password in users
+        })
+
+        def inline_login(username, password):
+            return bcrypt.checkpw(password.encode(), login.get_user(username)["password"].encode())
+
+        def pooled_login(username, password):
+            return login.authenticate(username, password)[0]
+
+        print(f"\n{args.users} simultaneous logins (auth pool: {args.workers} workers, {os.cpu_count()} CPUs)")
+        print(f"{'mode':<10}{'wall s':>9}{'p50 ms':>12}{'p95 ms':>10}{'probe p50 ms':>14}{'probe p95':>12}")
+        report("inline", *burst(users, inline_login))
+        report("pooled", *burst(users, pooled_login))
+
+        username, password = users[0]
+        token = login.issue_session_token(username, login.get_user(username)["password"])
+        repeats = 2000
+        start = time.perf_counter()
+        for _ in range(repeats):
+            assert login.validate_session_token(token)
+        token_us = (time.perf_counter() - start) / repeats * 1e6
+        start = time.perf_counter()
+        login.check_password(password, login.get_user(username)["password"])
+        verify_us = (time.perf_counter() - start) * 1e6
+        print(f"\nRerun with session token: {token_us:.1f} us   vs   re-verifying the password: {verify_us / 1000:.0f} ms")
+
+        legacy_rounds = max(4, args.rounds - 2)
+        login.update_user(username, password=bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=legacy_rounds)).decode())
+        assert login.authenticate(username, password)[0]
+        print(f"Rehash on login: cost {legacy_rounds} -> {login.hash_rounds(login.get_user(username)['password'])}")
+
+
+if __name__ == "__main__":
+    main()
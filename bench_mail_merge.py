@@ -0,0 +1,113 @@
+"""
+Benchmark for mail-merge rendering on a synthetic shortlist.
+
+Compares the old per-row path (iterrows + str.format on the whole template +
+a fresh MIMEMultipart serialized to bytes) with the compiled-template path in
+mail_merge.py (column-wise rendering + prebuilt headers), and checks that
+both produce the same message bodies and that the serialized messages decode
+back to them (the shortlist includes non-ASCII names).
+
+Usage:
+    python bench_mail_merge.py [--rows 20000] [--seed 42]
+"""
+import argparse
+import random
+import time
+from email import message_from_bytes, policy
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+import pandas as pd
+
+from mail_merge import compile_template, merge_messages
+
+SUBJECT = "Job Application Update - Your Application to [Job Title]"
+BODY = """
+Dear {candidate_name},
+
+Thank you for your application for the position of [Job Title] at [Company Name].
+
+We have reviewed your resume and would like to provide an update. Based on our initial assessment, your profile showed a score of {score_percent:.1f}% and {years_experience:.1f} years of experience.
+
+Our AI's suggestion for your profile: {ai_suggestion}
+
+We will be in touch shortly regarding the next steps in our hiring process.
+
+Best regards,
+
+The [Company Name] Hiring Team
+"""
+SENDER = "hr@example.com"
+SUGGESTIONS = [
+    "Strong match; schedule a technical interview.",
+    "Good fundamentals; probe cloud experience.",
+    "Borderline fit; consider for junior roles.",
+    "Excellent communication; résumé shows leadership.",
+]
+NAMES = ["Candidate", "Jörg Müller", "Zoë Ødegaard", "Łukasz Wójcik", "李明 ✓"]
+
+
+def synthetic_shortlist(rows, seed):
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        "Candidate Name": [f"{NAMES[i % len(NAMES)]} {i}" for i in range(rows)],
+        "Email": [f"candidate{i}@example.com" for i in range(rows)],
+        "Score (%)": [round(rng.uniform(60, 100), 2) for _ in range(rows)],
+        "Years Experience": [round(rng.uniform(0, 20), 1) for _ in range(rows)],
+        "AI Suggestion": [rng.choice(SUGGESTIONS) for _ in range(rows)],
+    })
+
+
+def legacy_render(df):
+    """The previous email_sender loop, minus the network send."""
+    bodies, messages = [], []
+    for index, row in df.iterrows():
+        formatted_body = BODY.format(
+            candidate_name=row['Candidate Name'],
+            score_percent=row['Score (%)'],
+            years_experience=row['Years Experience'],
+            ai_suggestion=row['AI Suggestion']
+        )
+        msg = MIMEMultipart()
+        msg['From'] = SENDER
+        msg['To'] = row['Email']
+        msg['Subject'] = SUBJECT
+        msg.attach(MIMEText(formatted_body, 'plain'))
+        bodies.append(formatted_body)
+        messages.append(msg.as_bytes())
+    return bodies, messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    df = synthetic_shortlist(args.rows, args.seed)
+
+    start = time.perf_counter()
+    legacy_bodies, _ = legacy_render(df)
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    subject_template, body_template = compile_template(SUBJECT), compile_template(BODY)
+    compiled_bodies = body_template.render(df)
+    render_seconds = time.perf_counter() - start
+    merged = [message for chunk in merge_messages(df, subject_template, body_template, SENDER) for message in chunk]
+    merge_seconds = time.perf_counter() - start
+
+    mismatches = sum(1 for old, new in zip(legacy_bodies, compiled_bodies) if old != new)
+    decode_errors = sum(1 for body, (*_, raw) in zip(compiled_bodies, merged)
+                        if message_from_bytes(raw, policy=policy.default).get_content().replace("\r\n", "\n") != body.replace("\r\n", "\n"))
+    print(f"{args.rows} messages")
+    print(f"{'path':<42}{'seconds':>10}{'messages/s':>14}")
+    print(f"{'iterrows + str.format + MIMEMultipart':<42}{legacy_seconds:>10.2f}{args.rows / legacy_seconds:>14.0f}")
+    print(f"{'compiled template (bodies only)':<42}{render_seconds:>10.2f}{args.rows / render_seconds:>14.0f}")
+    print(f"{'compiled template + serialization':<42}{merge_seconds:>10.2f}{len(merged) / merge_seconds:>14.0f}")
+    print(f"\nBody mismatches vs str.format: {mismatches}")
+    print(f"Serialized bodies that don't decode back: {decode_errors}")
+
+
+if __name__ == "__main__":
+    main()
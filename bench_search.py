@@ -0,0 +1,147 @@
+"""
+Benchmark for the resume search engine on a synthetic corpus.
+
+Builds a throwaway index of N synthetic resumes (50,000 by default), then times
+a set of boolean / phrase / wildcard / filter queries through the posting-list
+query engine and compares them with the old approach of scanning every resume
+with str.find.
+
+Usage:
+    python bench_search.py [--docs 50000] [--repeats 20] [--seed 42]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from search_index import ResumeIndex, bounded_edit_distance, fuzzy_distance_for
+from search_query import execute_query
+from skills_data import ALL_SKILLS_MASTER
+
+FILLER_WORDS = [
+    "delivered", "built", "owned", "improved", "reduced", "launched", "migrated", "mentored",
+    "pipeline", "platform", "service", "dashboard", "customers", "revenue", "latency", "reports",
+    "quarterly", "stakeholders", "requirements", "production", "internal", "external", "across",
+    "team", "company", "project", "results", "process", "scalable", "reliable", "secure",
+]
+
+QUERIES = [
+    "python",
+    "python AND sql",
+    "python OR java OR scala",
+    '"machine learning"',
+    '"machine learning" AND python -php',
+    "pyth* AND exp>=5",
+    "(kubernetes OR docker) AND has:email",
+    "NOT java AND exp<2",
+    'sql, tableau, "power bi"',
+]
+
+FUZZY_QUERIES = ["pyhton", "kubernets", "tablaeu", "postgress AND exp>=3"]
+
+
+def synthetic_resume(rng, skills):
+    """Returns (text, years_exp, has_email) for one synthetic resume."""
+    years = rng.randint(0, 20)
+    chosen = rng.sample(skills, rng.randint(5, 25))
+    sentences = []
+    for skill in chosen:
+        filler = " ".join(rng.choices(FILLER_WORDS, k=rng.randint(4, 12)))
+        sentences.append(f"{filler} using {skill}.")
+    has_email = rng.random() < 0.8
+    header = f"Candidate {rng.randint(1, 10**6)}\n"
+    if has_email:
+        header += f"candidate{rng.randint(1, 10**6)}@example.com\n"
+    header += f"{years} years of experience\n"
+    return header + " ".join(sentences), float(years), has_email
+
+
+def linear_scan(texts, keywords):
+    """The pre-index behaviour: lowercase every resume and str.find each keyword."""
+    hits = []
+    for name, content in texts:
+        content_lower = content.lower()
+        if any(content_lower.find(keyword) != -1 for keyword in keywords):
+            hits.append(name)
+    return hits
+
+
+def timed(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return result, statistics.median(samples), p95
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=50000)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    skills = sorted(ALL_SKILLS_MASTER) + ["machine learning", "power bi", "python", "sql", "java"]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = ResumeIndex(os.path.join(tmp_dir, "bench_index.db"))
+
+        print(f"Generating and indexing {args.docs} synthetic resumes...")
+        texts = []
+        batch = []
+        start = time.perf_counter()
+        for i in range(args.docs):
+            text, years, has_email = synthetic_resume(rng, skills)
+            name = f"resume_{i:06d}.pdf"
+            texts.append((name, text))
+            batch.append((name, text, None, years, has_email))
+            if len(batch) == 1000:
+                index.add_documents(batch)
+                batch = []
+        if batch:
+            index.add_documents(batch)
+        build_seconds = time.perf_counter() - start
+        print(f"Indexed {len(index)} resumes, {len(index.postings)} terms in {build_seconds:.1f}s "
+              f"({len(index) / build_seconds:.0f} resumes/s)\n")
+
+        start = time.perf_counter()
+        reloaded = ResumeIndex(index.db_path)
+        print(f"Cold load of the persisted index: {time.perf_counter() - start:.1f}s\n")
+        reloaded.conn.close()
+
+        print(f"{'query':<45}{'matches':>9}{'median ms':>12}{'p95 ms':>10}")
+        for query in QUERIES:
+            (hits, _, total), median, p95 = timed(lambda: execute_query(index, query, limit=50), args.repeats)
+            print(f"{query:<45}{total:>9}{median:>12.2f}{p95:>10.2f}")
+
+        print("\nTypo tolerant queries (trigram candidate generation + bounded edit distance)")
+        for query in FUZZY_QUERIES:
+            expansions = {}
+            (hits, _, total), median, p95 = timed(
+                lambda: execute_query(index, query, limit=50, fuzzy=True, expansions=expansions), args.repeats
+            )
+            print(f"{query:<45}{total:>9}{median:>12.2f}{p95:>10.2f}   {expansions}")
+
+        print("\nBaseline: edit distance against the whole vocabulary (no trigram index)")
+        vocabulary = index.vocabulary()
+        for term in ("pyhton", "kubernets"):
+            budget = fuzzy_distance_for(term)
+            matches, median, p95 = timed(
+                lambda: [v for v in vocabulary if bounded_edit_distance(term, v, budget) <= budget], max(1, args.repeats // 5)
+            )
+            print(f"{term:<45}{len(matches):>9}{median:>12.2f}{p95:>10.2f}")
+
+        print("\nBaseline: linear str.find scan over every resume (OR of keywords)")
+        for keywords in (["python"], ["python", "sql"], ["machine learning"]):
+            matches, median, p95 = timed(lambda: linear_scan(texts, keywords), max(1, args.repeats // 5))
+            print(f"{', '.join(keywords):<45}{len(matches):>9}{median:>12.2f}{p95:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Bulk job description import.
+
+Takes a CSV, JSONL or zip (of .txt files, or of CSV/JSONL files) with thousands
+of job descriptions, writes each one into data/ atomically, skips content that is
+already in the catalog (by sha256), registers everything in the JD catalog in one
+transaction and precomputes skills and embeddings in batches, so every imported
+JD is ready to screen straight away.
+
+Usage:
+    python bulk_import_jds.py requisitions.csv [--no-embeddings]
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from jd_catalog import JD_FOLDER, hash_text_bytes
+
+# --- Configuration ---
+TITLE_COLUMNS = ("title", "job_title", "job title", "role", "position", "name")
+TEXT_COLUMNS = ("description", "job_description", "job description", "text", "jd", "content", "body")
+EMBED_BATCH_SIZE = 64
+MAX_FILE_NAME_LENGTH = 80
+
+
+class ImportFormatError(ValueError):
+    """Raised when an import file cannot be read as JD records."""
+
+
+# --- Parsing ---
+def _pick_column(fieldnames, candidates):
+    lookup = {name.strip().lower(): name for name in fieldnames or []}
+    for candidate in candidates:
+        if candidate in lookup:
+            return lookup[candidate]
+    return None
+
+def _records_from_csv(text, source):
+    reader = csv.DictReader(io.StringIO(text))
+    title_column = _pick_column(reader.fieldnames, TITLE_COLUMNS)
+    text_column = _pick_column(reader.fieldnames, TEXT_COLUMNS)
+    if text_column is None:
+        raise ImportFormatError(f"{source}: no description column (expected one of: {', '.join(TEXT_COLUMNS)})")
+    for row in reader:
+        yield {"title": (row.get(title_column) or "") if title_column else "", "text": row.get(text_column) or ""}
+
+def _records_from_jsonl(text, source):
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            obj = json.loads(line)
+        except ValueError as e:
+            raise ImportFormatError(f"{source}, line {line_number}: invalid JSON ({e})") from None
+        if not isinstance(obj, dict):
+            raise ImportFormatError(f"{source}, line {line_number}: expected a JSON object")
+        title_key = _pick_column(obj.keys(), TITLE_COLUMNS)
+        text_key = _pick_column(obj.keys(), TEXT_COLUMNS)
+        yield {"title": str(obj.get(title_key) or "") if title_key else "", "text": str(obj.get(text_key) or "") if text_key else ""}
+
+def read_records(file_name, data):
+    """Yields {"title", "text"[, "file_name", "data"]} records from CSV, JSONL or zip bytes."""
+    lower = file_name.lower()
+    if lower.endswith(".zip"):
+        try:
+            archive = zipfile.ZipFile(io.BytesIO(data))
+        except zipfile.BadZipFile:
+            raise ImportFormatError(f"{file_name}: not a valid zip archive") from None
+        with archive:
+            for member in archive.infolist():
+                name = os.path.basename(member.filename)
+                if member.is_dir() or not name or name.startswith("."):
+                    continue
+                member_data = archive.read(member)
+                if name.lower().endswith(".txt"):
+                    # JDCatalog.refresh() only lists lowercase ".txt" files
+                    yield {"title": "", "text": member_data.decode("utf-8", errors="replace"), "file_name": name[:-4] + ".txt", "data": member_data}
+                elif name.lower().endswith((".csv", ".jsonl", ".json")):
+                    yield from read_records(name, member_data)
+        return
+    text = data.decode("utf-8-sig", errors="replace")
+    if lower.endswith(".csv"):
+        yield from _records_from_csv(text, file_name)
+    elif lower.endswith((".jsonl", ".json")):
+        yield from _records_from_jsonl(text, file_name)
+    else:
+        raise ImportFormatError(f"{file_name}: unsupported file type (use .csv, .jsonl or .zip)")
+
+
+# --- Writing ---
+def file_name_for(title):
+    """Same naming as generate_jds.py: "Data Scientist (NLP)" -> "data_scientist_nlp.txt"."""
+    slug = re.sub(r"[^a-z0-9]+", "_", title.lower()).strip("_")[:MAX_FILE_NAME_LENGTH] or "job_description"
+    return slug + ".txt"
+
+def _title_from_text(text):
+    for line in text.splitlines():
+        line = line.strip()
+        if line.lower().startswith("job title:"):
+            return line.split(":", 1)[1].strip()
+        if line:
+            return line[:MAX_FILE_NAME_LENGTH]
+    return ""
+
+def write_atomic(folder, file_name, data):
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, os.path.join(folder, file_name))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def import_records(records, catalog, folder=JD_FOLDER, extract_skills=None, encode_batch=None, progress=None):
+    """
+    Writes JD records into `folder` and the catalog, then precomputes features.
+
+    `extract_skills(text) -> set` and `encode_batch(list_of_texts) -> 2-D array`
+    are optional; embeddings are computed in batches on a background thread
+    while skills are extracted on this one. `progress(stage, done, total)` is optional.
+    Returns a summary dict.
+    """
+    start = time.perf_counter()
+    catalog.refresh()
+    os.makedirs(folder, exist_ok=True)
+    known_hashes = {entry["content_hash"] for entry in catalog.list_jds()}
+    taken_names = {entry["file_name"] for entry in catalog.list_jds()}
+    summary = {"imported": 0, "duplicates": 0, "invalid": 0}
+    written = [] # (file_name, content_hash, data, text)
+
+    for record in records:
+        text = record.get("text") or ""
+        if not text.strip():
+            summary["invalid"] += 1
+            continue
+        # The catalog's definition: sha256 of the exact bytes in the file
+        data = record.get("data") or text.encode("utf-8")
+        content_hash = hash_text_bytes(data)
+        if content_hash in known_hashes:
+            summary["duplicates"] += 1
+            continue
+        title = (record.get("title") or "").strip() or _title_from_text(text)
+        file_name = record.get("file_name") or file_name_for(title)
+        base, suffix = file_name[:-4], 2
+        while file_name in taken_names:
+            file_name = f"{base}_{suffix}.txt"
+            suffix += 1
+        write_atomic(folder, file_name, data)
+        known_hashes.add(content_hash)
+        taken_names.add(file_name)
+        written.append((file_name, content_hash, data, text))
+        if progress and len(written) % 200 == 0:
+            progress("writing", len(written), None)
+
+    catalog.upsert_many([(file_name, data) for file_name, _, data, _ in written])
+    summary["imported"] = len(written)
+    summary["write_seconds"] = time.perf_counter() - start
+
+    if written and (extract_skills or encode_batch):
+        precompute_features(catalog, [(content_hash, text) for _, content_hash, _, text in written],
+                            extract_skills, encode_batch, progress)
+    summary["total_seconds"] = time.perf_counter() - start
+    return summary
+
+def precompute_features(catalog, items, extract_skills=None, encode_batch=None, progress=None):
+    """
+    Computes skills and embeddings for (content_hash, text) pairs in batches.
+    The embedding model runs on a worker thread (it releases the GIL) while
+    keyword extraction runs here, and results are stored per batch in one transaction.
+    """
+    batches = [items[i:i + EMBED_BATCH_SIZE] for i in range(0, len(items), EMBED_BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=1) as encoder:
+        pending = encoder.submit(encode_batch, [text for _, text in batches[0]]) if encode_batch else None
+        for index, batch in enumerate(batches):
+            embeddings = pending.result() if pending else None
+            # Queue the next batch's embeddings before extracting this batch's skills
+            if encode_batch and index + 1 < len(batches):
+                pending = encoder.submit(encode_batch, [text for _, text in batches[index + 1]])
+            skills = [extract_skills(text) for _, text in batch] if extract_skills else [None] * len(batch)
+            catalog.store_features_many([
+                (content_hash, skills[i], embeddings[i] if embeddings is not None else None)
+                for i, (content_hash, _) in enumerate(batch)
+            ])
+            if progress:
+                progress("features", min((index + 1) * EMBED_BATCH_SIZE, len(items)), len(items))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="CSV, JSONL or zip file with job descriptions")
+    parser.add_argument("--no-embeddings", action="store_true", help="Skip sentence embeddings (keywords only)")
+    args = parser.parse_args()
+
+    from jd_catalog import get_jd_catalog
+    from screener import jd_skill_keywords, encode_jds, model
+
+    encode_batch = encode_jds if model is not None and not args.no_embeddings else None
+
+    with open(args.path, "rb") as f:
+        data = f.read()
+    summary = import_records(
+        read_records(os.path.basename(args.path), data), get_jd_catalog(),
+        extract_skills=jd_skill_keywords, encode_batch=encode_batch,
+        progress=lambda stage, done, total: print(f"{stage}: {done}" + (f"/{total}" if total else ""), end="\r")
+    )
+    print(f"\nImported {summary['imported']} JDs ({summary['duplicates']} duplicates, {summary['invalid']} empty) "
+          f"in {summary['total_seconds']:.1f}s (files written in {summary['write_seconds']:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
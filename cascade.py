@@ -0,0 +1,87 @@
+"""
+Two-stage screening cascade.
+
+Stage one ranks every resume by the keyword-coverage + experience score that
+score_matrix() falls back to without models (the parse stage has already
+computed its inputs). Only the top `keep_fraction`, plus anything at or above
+`floor`, goes on to stage two: model.encode and the forest prediction. The
+rest keep their stage-one score and are marked as not deep-scored.
+
+To show what pruning costs, a random `audit_fraction` of the pruned resumes is
+deep-scored too. Recall is the share of candidates at or above the screening
+cutoff (by full score) that survived the prefilter, with the pruned ones
+estimated from the audit sample.
+"""
+import math
+import random
+
+import numpy as np
+
+from matrix_screener import score_matrix
+
+# --- Configuration ---
+DEFAULT_KEEP_FRACTION = 0.3
+DEFAULT_AUDIT_FRACTION = 0.1
+MIN_AUDIT = 5                 # Audit at least this many pruned resumes (when there are that many)
+MIN_POOL = 20                 # Smaller pools are deep-scored in full; the cascade saves next to nothing
+
+
+class Cascade:
+    """Prefilter settings plus the bookkeeping for one screening run's recall report."""
+
+    def __init__(self, keep_fraction=DEFAULT_KEEP_FRACTION, floor=None, audit_fraction=DEFAULT_AUDIT_FRACTION,
+                 relevance_cutoff=75, seed=None):
+        self.keep_fraction = keep_fraction
+        self.floor = floor
+        self.audit_fraction = audit_fraction
+        self.relevance_cutoff = relevance_cutoff
+        self.rng = random.Random(seed)
+        self.pool = 0
+        self.kept_scores = []      # Full scores of resumes that passed the prefilter
+        self.audited_scores = []   # Full scores of the audited pruned resumes
+        self.pruned = 0            # Pruned and not audited (reported with their stage-one score)
+
+    def prefilter_scores(self, model_words, jd_words, years_exp):
+        """Stage-one score per resume (the no-model keyword + experience score)."""
+        return score_matrix(model_words, [jd_words], years_exp)[0][:, 0]
+
+    def select(self, scores):
+        """Splits resume indices into (kept, audited, pruned)."""
+        n = len(scores)
+        self.pool = n
+        if n < MIN_POOL:
+            return list(range(n)), [], []
+        keep_count = max(1, math.ceil(n * self.keep_fraction))
+        order = np.argsort(-np.asarray(scores), kind="stable")
+        kept = set(order[:keep_count].tolist())
+        if self.floor is not None:
+            kept.update(int(i) for i in np.flatnonzero(np.asarray(scores) >= self.floor))
+        rest = [i for i in range(n) if i not in kept]
+        audit_count = min(len(rest), max(MIN_AUDIT, math.ceil(len(rest) * self.audit_fraction))) if self.audit_fraction > 0 else 0
+        audited = set(self.rng.sample(rest, audit_count))
+        return sorted(kept), sorted(audited), [i for i in rest if i not in audited]
+
+    def record(self, full_score, audited):
+        (self.audited_scores if audited else self.kept_scores).append(full_score)
+
+    def report(self):
+        """Deep-scored share and the estimated recall of the prefilter at relevance_cutoff."""
+        deep = len(self.kept_scores) + len(self.audited_scores)
+        pruned_total = len(self.audited_scores) + self.pruned
+        kept_relevant = sum(1 for score in self.kept_scores if score >= self.relevance_cutoff)
+        audited_relevant = sum(1 for score in self.audited_scores if score >= self.relevance_cutoff)
+        # Audited resumes stand in for all pruned ones
+        pruned_relevant = audited_relevant * pruned_total / len(self.audited_scores) if self.audited_scores else 0.0
+        relevant = kept_relevant + pruned_relevant
+        return {
+            "pool": self.pool,
+            "deep_scored": deep,
+            "kept": len(self.kept_scores),
+            "audited": len(self.audited_scores),
+            "pruned": self.pruned,
+            "compute_fraction": deep / self.pool if self.pool else 1.0,
+            "kept_relevant": kept_relevant,
+            "estimated_missed": round(pruned_relevant, 1),
+            "recall": kept_relevant / relevant if relevant else None,
+            "exact": self.pruned == 0,
+        }
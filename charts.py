@@ -0,0 +1,176 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import matplotlib.pyplot as plt
+import seaborn as sns
+import plotly.express as px
+import plotly.graph_objects as go
+from wordcloud import WordCloud
+import hashlib
+import io
+
+# --- Render Budget ---
+# Above these sizes the charts switch to pre-aggregated rendering so page time
+# stays flat no matter how many candidates were screened.
+LARGE_CANDIDATE_THRESHOLD = 500   # Pre-bin histograms / WebGL scatter from here on
+DENSITY_SCATTER_THRESHOLD = 20000 # Binned density instead of individual points
+TOP_N_BARS = 25                   # Bars drawn individually before aggregating into "Other"
+FIGURE_CACHE_ENTRIES = 64
+
+
+# --- Helpers ---
+def data_hash(df, columns=None):
+    """Returns a stable hash of the given DataFrame columns, used as the figure cache key."""
+    if df is None or df.empty:
+        return "empty"
+    subset = df[columns] if columns else df
+    row_hashes = pd.util.hash_pandas_object(subset, index=False).values
+    digest = hashlib.sha1(row_hashes.tobytes())
+    digest.update(",".join(map(str, subset.columns)).encode("utf-8"))
+    return digest.hexdigest()
+
+def prebin(values, bins):
+    """Bins values once with NumPy so the plot only has to draw len(bins) bars."""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return np.zeros(0), np.zeros(0)
+    return np.histogram(values, bins=bins)
+
+def top_n_with_other(df, label_col, value_col, n=TOP_N_BARS):
+    """
+    Keeps the n highest rows by value_col and collapses the rest into a single
+    "Other" row holding their mean, so bar charts never draw more than n + 1 bars.
+    """
+    ranked = df[[label_col, value_col]].sort_values(by=value_col, ascending=False)
+    if len(ranked) <= n:
+        return ranked.reset_index(drop=True)
+    head = ranked.iloc[:n]
+    tail = ranked.iloc[n:]
+    other = pd.DataFrame({
+        label_col: [f"Other ({len(tail)} candidates, avg)"],
+        value_col: [tail[value_col].mean()]
+    })
+    return pd.concat([head, other], ignore_index=True)
+
+def ols_fit(x, y):
+    """Least-squares line fit with NumPy. Returns (slope, intercept) or None if the fit is undefined."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    mask = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[mask], y[mask]
+    if x.size < 2 or np.ptp(x) == 0:
+        return None
+    slope, intercept = np.polyfit(x, y, 1)
+    return float(slope), float(intercept)
+
+def _fig_to_png(fig):
+    """Serializes a Matplotlib figure to PNG bytes and closes it to free memory."""
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight", dpi=100)
+    plt.close(fig)
+    return buf.getvalue()
+
+
+# --- Cached Renderers ---
+# Each renderer takes a `data_key` (see data_hash) and underscore-prefixed data
+# arguments, which Streamlit skips when hashing. Reruns with unchanged filtered
+# data therefore return the cached image without touching the data again.
+
+@st.cache_data(show_spinner=False, max_entries=FIGURE_CACHE_ENTRIES)
+def render_histogram(data_key, _values, bins, color, xlabel, ylabel="Number of Candidates"):
+    """Histogram as PNG bytes. Small sets keep the KDE; large sets are pre-binned."""
+    values = pd.Series(_values).dropna()
+    fig, ax = plt.subplots(figsize=(10, 5))
+    if len(values) <= LARGE_CANDIDATE_THRESHOLD:
+        sns.histplot(values, bins=bins, kde=True, color=color, ax=ax)
+    else:
+        counts, edges = prebin(values, bins)
+        if counts.size:
+            ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge", color=color, edgecolor="white")
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    return _fig_to_png(fig)
+
+@st.cache_data(show_spinner=False, max_entries=FIGURE_CACHE_ENTRIES)
+def render_score_bar_chart(data_key, _df, cutoff, label_col="Candidate Name", value_col="Score (%)"):
+    """Candidate score bar chart as PNG bytes, limited to the top N plus one aggregate bar."""
+    plot_df = top_n_with_other(_df, label_col, value_col)
+    scores = plot_df[value_col]
+    colors = ['#4CAF50' if s >= cutoff else '#FFC107' if s >= (cutoff * 0.75) else '#F44346' for s in scores]
+    if len(_df) > TOP_N_BARS:
+        colors[-1] = '#9E9E9E' # Aggregate bar
+
+    fig, ax = plt.subplots(figsize=(12, 7))
+    bars = ax.bar(plot_df[label_col].astype(str), scores, color=colors)
+    ax.set_xlabel("Candidate", fontsize=14)
+    ax.set_ylabel("Score (%)", fontsize=14)
+    title = "Resume Screening Scores Across Candidates"
+    if len(_df) > TOP_N_BARS:
+        title += f" (Top {TOP_N_BARS} of {len(_df)})"
+    ax.set_title(title, fontsize=16, fontweight='bold')
+    ax.set_ylim(0, 100)
+    plt.setp(ax.get_xticklabels(), rotation=60, ha='right', fontsize=10)
+    ax.tick_params(axis='y', labelsize=10)
+    for bar in bars:
+        yval = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2, yval + 1, f"{yval:.1f}", ha='center', va='bottom', fontsize=9)
+    fig.tight_layout()
+    return _fig_to_png(fig)
+
+@st.cache_data(show_spinner=False, max_entries=FIGURE_CACHE_ENTRIES)
+def render_score_vs_experience(data_key, _df, color_map, x="Years Experience", y="Score (%)", color="Shortlisted"):
+    """
+    Plotly scatter of score vs. experience with one NumPy OLS trendline per colour group.
+    Switches to WebGL above LARGE_CANDIDATE_THRESHOLD and to a binned density heatmap
+    above DENSITY_SCATTER_THRESHOLD.
+    """
+    labels = {x: "Years of Experience", y: "Matching Score (%)"}
+    title = "Candidate Score vs. Years Experience"
+
+    if len(_df) > DENSITY_SCATTER_THRESHOLD:
+        fig = px.density_heatmap(_df, x=x, y=y, nbinsx=40, nbinsy=40, labels=labels, title=title,
+                                 color_continuous_scale="Teal")
+    else:
+        fig = px.scatter(
+            _df,
+            x=x,
+            y=y,
+            hover_name="Candidate Name" if "Candidate Name" in _df.columns else None,
+            color=color,
+            title=title,
+            labels=labels,
+            color_discrete_map=color_map,
+            render_mode="webgl" if len(_df) > LARGE_CANDIDATE_THRESHOLD else "auto"
+        )
+
+    for group, group_df in _df.groupby(color):
+        fit = ols_fit(group_df[x], group_df[y])
+        if fit is None:
+            continue
+        slope, intercept = fit
+        x_line = np.array([group_df[x].min(), group_df[x].max()], dtype=float)
+        fig.add_trace(go.Scatter(
+            x=x_line,
+            y=slope * x_line + intercept,
+            mode="lines",
+            name=f"OLS trend ({group})",
+            line=dict(color=color_map.get(group), dash="dash")
+        ))
+    return fig
+
+@st.cache_data(show_spinner=False, max_entries=FIGURE_CACHE_ENTRIES)
+def render_wordcloud(data_key, _words, width=800, height=400, background_color="white"):
+    """WordCloud as an RGB array, generated once per distinct keyword set."""
+    wc = WordCloud(width=width, height=height, background_color=background_color, collocations=False)
+    return wc.generate(" ".join(_words)).to_array()
+
+@st.cache_data(show_spinner=False, max_entries=FIGURE_CACHE_ENTRIES)
+def render_top_counts_bar(data_key, _counts, xlabel, ylabel, palette="coolwarm"):
+    """Horizontal bar chart (PNG bytes) for an already aggregated value_counts Series."""
+    sns.set_style("whitegrid")
+    fig, ax = plt.subplots(figsize=(8, 4))
+    sns.barplot(x=_counts.values, y=_counts.index, ax=ax, palette=palette)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    return _fig_to_png(fig)
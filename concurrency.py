@@ -0,0 +1,107 @@
+"""
+One CPU budget for every layer that starts threads or processes.
+
+Left alone, torch's intra-op threads in model.encode, the forest's n_jobs, the
+PDF process pool and the screening job workers each size themselves to the
+whole machine and oversubscribe it several times over. Everything now asks
+this module instead. The budget is SCREENERPRO_CPU_BUDGET cores (default: the
+cores this process may run on) and is split as follows:
+
+  * torch threads   - half the budget: encoding is the heaviest stage
+  * PDF workers     - the other half: pdfplumber runs alongside encoding
+  * predict n_jobs  - a quarter of the budget; predictions are small and
+                      joblib's thread start-up dominates beyond that
+  * job workers     - at most 2, never more than the budget
+  * training        - GridSearchCV gets the whole budget and each forest fits
+                      single-threaded, instead of both using n_jobs=-1
+
+Each share can be pinned with its own environment variable; tune_concurrency.py
+measures the splits on the current box and prints the settings to use.
+"""
+import os
+
+# --- Configuration ---
+CPU_BUDGET_ENV = "SCREENERPRO_CPU_BUDGET"
+TORCH_THREADS_ENV = "SCREENERPRO_TORCH_THREADS"
+PREDICT_JOBS_ENV = "SCREENERPRO_PREDICT_JOBS"
+PDF_WORKERS_ENV = "SCREENERPRO_PDF_WORKERS"
+JOB_WORKERS_ENV = "SCREENERPRO_JOB_WORKERS"
+MAX_JOB_WORKERS = 2
+
+
+def _env_int(name):
+    value = os.environ.get(name, "").strip()
+    try:
+        return max(1, int(value)) if value else None
+    except ValueError:
+        return None
+
+
+def available_cpus():
+    """Cores this process may run on (respects taskset/cgroup CPU sets where the OS reports them)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
+
+
+class CpuPlan:
+    """How the CPU budget is split between torch, sklearn and the worker pools."""
+
+    def __init__(self, budget=None):
+        self.budget = budget or _env_int(CPU_BUDGET_ENV) or available_cpus()
+        self.torch_threads = _env_int(TORCH_THREADS_ENV) or max(1, self.budget // 2)
+        self.pdf_workers = _env_int(PDF_WORKERS_ENV) or max(1, self.budget - self.torch_threads)
+        self.predict_jobs = _env_int(PREDICT_JOBS_ENV) or max(1, self.budget // 4)
+        self.job_workers = _env_int(JOB_WORKERS_ENV) or min(MAX_JOB_WORKERS, self.budget)
+        # Training: parallelize across the grid's fits, not inside each forest
+        self.search_jobs = self.budget
+        self.fit_jobs = 1
+
+    def as_rows(self):
+        return [
+            {"Setting": "CPU budget", "Value": self.budget, "Environment": CPU_BUDGET_ENV},
+            {"Setting": "Torch threads", "Value": self.torch_threads, "Environment": TORCH_THREADS_ENV},
+            {"Setting": "PDF workers", "Value": self.pdf_workers, "Environment": PDF_WORKERS_ENV},
+            {"Setting": "Predict n_jobs", "Value": self.predict_jobs, "Environment": PREDICT_JOBS_ENV},
+            {"Setting": "Screening job workers", "Value": self.job_workers, "Environment": JOB_WORKERS_ENV},
+        ]
+
+
+_plan = None
+
+def get_cpu_plan():
+    """The process-wide plan, read from the environment once."""
+    global _plan
+    if _plan is None:
+        _plan = CpuPlan()
+    return _plan
+
+
+# --- Applying the Plan ---
+def apply_torch_threads(threads=None):
+    """Sets torch's intra-op threads (and caps BLAS pools to match). No-op without torch."""
+    threads = threads or get_cpu_plan().torch_threads
+    try:
+        import torch
+    except ImportError:
+        torch = None
+    if torch is not None:
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(1) # Callers already parallelize across requests
+        except RuntimeError:
+            pass # Only allowed before torch's first parallel work; keep whatever is set
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=threads)
+    except ImportError:
+        pass
+    return threads
+
+
+def configure_estimator(estimator, n_jobs=None):
+    """Sets n_jobs on a fitted sklearn estimator (e.g. the screening forest) that has one."""
+    if estimator is not None and hasattr(estimator, "n_jobs"):
+        estimator.n_jobs = n_jobs or get_cpu_plan().predict_jobs
+    return estimator
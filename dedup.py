@@ -0,0 +1,148 @@
+"""
+Exact and near-duplicate detection for resumes, so each copy is scored once.
+
+Three levels, cheapest first:
+  * bytes - hash of the uploaded file (search_index.hash_bytes); a
+            byte-identical copy is not even extracted
+  * text  - sha256 of the normalized text (case, punctuation and whitespace
+            ignored), for the same resume exported twice
+  * near  - MinHash over word 5-gram shingles with LSH banding; candidates
+            whose estimated Jaccard similarity reaches NEAR_DUPLICATE_THRESHOLD
+            join the cluster (agency copies with a changed header or footer)
+
+Each cluster has one representative that is scored; every other member gets a
+copy of its result, flagged with "Duplicate Of".
+"""
+import hashlib
+import re
+import threading
+import zlib
+
+import numpy as np
+
+# --- Configuration ---
+SHINGLE_WORDS = 5
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 16                   # 16 bands x 8 rows: pairs above ~0.7 Jaccard almost always share a band
+NEAR_DUPLICATE_THRESHOLD = 0.85  # Estimated Jaccard similarity for a near-duplicate
+MIN_SHINGLES = 10                # Shorter texts are only matched exactly
+
+_rng = np.random.default_rng(20240517) # Fixed seed: signatures stay comparable across runs
+_HASH_A = _rng.integers(1, 2**63, NUM_PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+_HASH_B = _rng.integers(0, 2**63, NUM_PERMUTATIONS, dtype=np.uint64)
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+EXACT_BYTES, EXACT_TEXT, NEAR = "Identical file", "Identical text", "Near-duplicate"
+
+
+def normalize_text(text):
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+def text_hash(text):
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+def shingles(text):
+    """Hashed word 5-grams of the normalized text."""
+    words = normalize_text(text).split()
+    grams = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(max(1, len(words) - SHINGLE_WORDS + 1))}
+    return np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint64, count=len(grams))
+
+def minhash_signature(text):
+    """NUM_PERMUTATIONS minima of multiply-shift hashes over the shingles, or None for very short texts."""
+    values = shingles(text)
+    if len(values) < MIN_SHINGLES:
+        return None
+    with np.errstate(over="ignore"): # Wrapping 64-bit arithmetic is the hash
+        hashed = (values[None, :] * _HASH_A[:, None] + _HASH_B[:, None]) >> np.uint64(32)
+    return hashed.min(axis=1).astype(np.uint32)
+
+def estimated_jaccard(signature_a, signature_b):
+    return float(np.mean(signature_a == signature_b))
+
+
+class DedupIndex:
+    """
+    Clusters of duplicate resumes, built up as files arrive.
+
+    Resumes are keyed by their file hash, not their file name, so two different
+    candidates uploaded as "resume.pdf" never share a cluster or a result.
+    match_bytes() and match_text() return (representative's file hash, its file
+    name, match type, similarity) for a duplicate, or None for a new resume,
+    which becomes the representative of its own cluster. Safe to share between
+    pipeline stages.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.by_bytes = {}   # file sha256 -> (representative hash, match type, similarity)
+        self.by_text = {}    # normalized text sha256 -> representative hash
+        self.names = {}      # representative hash -> file name it was first uploaded as
+        self.signatures = {} # representative hash -> MinHash signature
+        self.buckets = {}    # (band, band hash) -> [representative hashes]
+        self.members = {}    # representative hash -> duplicate file names
+        self.results = {}    # file hash -> screening result, filled in by the pipeline
+
+    def copy(self):
+        """An independent copy, so an interrupted run can't leave clusters without results behind."""
+        with self.lock:
+            clone = DedupIndex()
+            clone.by_bytes = dict(self.by_bytes)
+            clone.by_text = dict(self.by_text)
+            clone.names = dict(self.names)
+            clone.signatures = dict(self.signatures)
+            clone.buckets = {key: list(hashes) for key, hashes in self.buckets.items()}
+            clone.members = {key: list(members) for key, members in self.members.items()}
+            clone.results = dict(self.results)
+            return clone
+
+    def match_bytes(self, file_hash, file_name):
+        with self.lock:
+            match = self.by_bytes.get(file_hash)
+            if match is None:
+                self.by_bytes[file_hash] = (file_hash, EXACT_BYTES, 1.0)
+                self.names[file_hash] = file_name
+                return None
+            return self._join(match[0], file_hash, file_name, match[1], match[2])
+
+    def match_text(self, text, file_hash, file_name):
+        """Checks normalized-text and MinHash matches; registers the resume as a new representative otherwise."""
+        digest = text_hash(text)
+        signature = minhash_signature(text)
+        with self.lock:
+            representative = self.by_text.get(digest)
+            if representative is not None:
+                return self._join(representative, file_hash, file_name, EXACT_TEXT, 1.0)
+            if signature is not None:
+                band_keys = self._band_keys(signature)
+                best, best_similarity = None, 0.0
+                for key in band_keys:
+                    for candidate in self.buckets.get(key, ()):
+                        similarity = estimated_jaccard(signature, self.signatures[candidate])
+                        if similarity > best_similarity:
+                            best, best_similarity = candidate, similarity
+                if best is not None and best_similarity >= NEAR_DUPLICATE_THRESHOLD:
+                    self.by_text[digest] = best
+                    return self._join(best, file_hash, file_name, NEAR, best_similarity)
+                self.signatures[file_hash] = signature
+                for key in band_keys:
+                    self.buckets.setdefault(key, []).append(file_hash)
+            self.by_text[digest] = file_hash
+            self.names.setdefault(file_hash, file_name)
+            return None
+
+    def _band_keys(self, signature):
+        rows = NUM_PERMUTATIONS // LSH_BANDS
+        return [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(LSH_BANDS)]
+
+    def _join(self, representative, file_hash, file_name, match_type, similarity):
+        # Later byte-identical copies join the same cluster without being extracted
+        self.by_bytes[file_hash] = (representative, match_type, similarity)
+        representative_name = self.names[representative]
+        if not (file_hash == representative and file_name == representative_name):
+            self.members.setdefault(representative, []).append(file_name)
+        return representative, representative_name, match_type, similarity
+
+    def clusters(self):
+        """{representative file name: [duplicate file names]} for clusters with at least one duplicate."""
+        with self.lock:
+            return {self.names[key]: list(members) for key, members in self.members.items() if members}
@@ -0,0 +1,475 @@
+import streamlit as st
+import sqlite3
+import smtplib
+import threading
+import hashlib
+import random
+import time
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from email.utils import formatdate
+
+# --- Configuration ---
+OUTBOX_DB_FILE = "email_outbox.db"
+SMTP_WORKERS = 4                 # Worker threads, each with its own SMTP connection per account
+DEFAULT_RATE_PER_SECOND = 5.0    # Per SMTP server; most providers throttle bursts hard
+DEFAULT_BURST = 10
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 2.0       # Retry n waits ~ BACKOFF_BASE_SECONDS * 2**(n-1), with jitter
+BACKOFF_MAX_SECONDS = 300.0
+STALE_CLAIM_SECONDS = 600        # 'sending' rows older than this (process died mid-send) are re-queued
+SMTP_TIMEOUT_SECONDS = 30
+IDLE_POLL_SECONDS = 1.0
+LEDGER_MAX_ROWS = 50000          # The send ledger keeps only the most recent outcomes
+LEDGER_TRIM_EVERY = 500          # Trim the ledger after this many new entries
+
+# Message statuses
+QUEUED, SENDING, SENT, FAILED = "queued", "sending", "sent", "failed"
+
+
+# --- Helpers ---
+def idempotency_key(sender, recipient, subject, body):
+    """Same sender, recipient and content -> same key, so re-queuing a batch after a rerun is a no-op."""
+    digest = hashlib.sha256("\x1f".join([sender, recipient.strip().lower(), subject, body]).encode("utf-8"))
+    return digest.hexdigest()
+
+def account_key(smtp_server, smtp_port, sender):
+    return f"{sender}@{smtp_server}:{int(smtp_port)}"
+
+def build_message(sender, recipient, subject, body, key):
+    msg = MIMEMultipart()
+    msg['From'] = sender
+    msg['To'] = recipient
+    msg['Subject'] = subject
+    msg['Date'] = formatdate(localtime=True)
+    # Deterministic Message-ID lets receiving servers drop a duplicate if a send is retried after a lost reply
+    msg['Message-ID'] = f"<{key[:32]}@screenerpro>"
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+def is_transient(error):
+    """4xx replies, dropped connections and network errors are retried; 5xx and auth errors are not."""
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError))
+
+
+def _reset_after_error(server, error):
+    """After an SMTP error reply the session is still usable (RSET); anything else closes it. Returns True if kept."""
+    if isinstance(error, smtplib.SMTPResponseException) and not isinstance(error, smtplib.SMTPAuthenticationError):
+        try:
+            server.rset()
+            return True
+        except Exception:
+            pass
+    try:
+        server.close()
+    except Exception:
+        pass
+    return False
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` sends per second with bursts of up to `burst`."""
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.capacity = float(max(1, burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, stop_event=None):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if stop_event is not None and stop_event.wait(wait):
+                return False
+            elif stop_event is None:
+                time.sleep(wait)
+
+
+class EmailOutbox:
+    """
+    Persistent outbox (SQLite, WAL) drained by a small pool of worker threads.
+
+    Messages are queued with an idempotency key (INSERT OR IGNORE), so a rerun that
+    queues the same batch again sends nothing twice. Each worker keeps one SMTP
+    connection per account, sends are rate limited per SMTP server with a token
+    bucket, and transient failures are retried with exponential backoff.
+    SMTP passwords are only kept in memory: after a restart, queued mail waits
+    until the account is registered again.
+    """
+
+    def __init__(self, db_path=OUTBOX_DB_FILE, workers=SMTP_WORKERS):
+        self.db_path = db_path
+        self.accounts = {}       # account key -> connection settings (incl. password)
+        self.buckets = {}        # smtp server -> TokenBucket
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stop_event = threading.Event()
+        self._local = threading.local()
+        conn = self._conn()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    idempotency_key TEXT NOT NULL UNIQUE,
+                    batch_id TEXT NOT NULL,
+                    account TEXT NOT NULL,
+                    smtp_server TEXT NOT NULL,
+                    sender TEXT NOT NULL,
+                    recipient TEXT NOT NULL,
+                    candidate_name TEXT,
+                    subject TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL DEFAULT 0,
+                    claimed_at REAL,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    sent_at REAL
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_pending ON outbox(status, next_attempt_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_batch ON outbox(batch_id, status)")
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(outbox)")}
+            if "raw_message" not in columns: # Outboxes created before pre-serialized messages
+                conn.execute("ALTER TABLE outbox ADD COLUMN raw_message BLOB")
+            if "owner" not in columns: # The logged-in user who queued the message
+                conn.execute("ALTER TABLE outbox ADD COLUMN owner TEXT")
+            # Bounded log of send outcomes (no message bodies), replacing the per-session sent_emails_log
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS send_ledger (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    logged_at REAL NOT NULL,
+                    batch_id TEXT NOT NULL,
+                    candidate_name TEXT,
+                    recipient TEXT NOT NULL,
+                    subject TEXT,
+                    status TEXT NOT NULL,
+                    error TEXT
+                )""")
+            if "owner" not in {row[1] for row in conn.execute("PRAGMA table_info(send_ledger)")}:
+                conn.execute("ALTER TABLE send_ledger ADD COLUMN owner TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_send_ledger_owner ON send_ledger(owner, id)")
+        self._ledger_writes = 0
+        self.unrecorded_sends = [] # Delivered messages whose 'sent' update hit a busy database
+        self.workers = [
+            threading.Thread(target=self._worker_loop, name=f"smtp-worker-{i}", daemon=True) for i in range(workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --- Accounts ---
+    def register_account(self, smtp_server, smtp_port, sender, password, use_tls=True,
+                         rate_per_second=DEFAULT_RATE_PER_SECOND, burst=DEFAULT_BURST):
+        """Makes credentials available to the workers (memory only) and sets the server's rate limit."""
+        key = account_key(smtp_server, smtp_port, sender)
+        with self.lock:
+            self.accounts[key] = {
+                "server": smtp_server, "port": int(smtp_port), "sender": sender,
+                "password": password, "use_tls": use_tls, "error": None,
+            }
+            bucket = self.buckets.get(smtp_server)
+            if bucket is None or bucket.rate != rate_per_second or bucket.capacity != burst:
+                self.buckets[smtp_server] = TokenBucket(rate_per_second, burst)
+        self.wakeup.set()
+        return key
+
+    def account_error(self, key):
+        with self.lock:
+            account = self.accounts.get(key)
+            return account and account["error"]
+
+    # --- Queueing ---
+    def enqueue(self, batch_id, smtp_server, smtp_port, sender, messages, owner=None):
+        """
+        Queues (recipient, candidate_name, subject, body) tuples in one transaction.
+        `owner` is the user queueing them; their send log only shows their own messages.
+        Returns (queued, duplicates); duplicates were already in the outbox.
+        """
+        key = account_key(smtp_server, smtp_port, sender)
+        now = time.time()
+        return self._insert([
+            (idempotency_key(sender, recipient, subject, body), batch_id, key, smtp_server, sender,
+             recipient, candidate_name, subject, body, None, owner, now)
+            for recipient, candidate_name, subject, body in messages
+        ])
+
+    def enqueue_serialized(self, batch_id, smtp_server, smtp_port, sender, messages, owner=None):
+        """
+        Queues already rendered and serialized messages, given as
+        (idempotency_key, recipient, candidate_name, subject, raw_message_bytes) tuples.
+        Workers send the bytes as-is instead of building a MIME object per message.
+        """
+        key = account_key(smtp_server, smtp_port, sender)
+        now = time.time()
+        return self._insert([
+            (message_key, batch_id, key, smtp_server, sender, recipient, candidate_name, subject, "", raw, owner, now)
+            for message_key, recipient, candidate_name, subject, raw in messages
+        ])
+
+    def _insert(self, rows):
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            before = conn.total_changes
+            conn.executemany(
+                """INSERT OR IGNORE INTO outbox (idempotency_key, batch_id, account, smtp_server, sender,
+                       recipient, candidate_name, subject, body, raw_message, owner, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                rows
+            )
+            queued = conn.total_changes - before
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self.wakeup.set()
+        return queued, len(rows) - queued
+
+    def retry_failed(self, batch_id):
+        """Puts a batch's failed messages back in the queue."""
+        cursor = self._conn().execute(
+            "UPDATE outbox SET status = ?, attempts = 0, next_attempt_at = 0, last_error = NULL WHERE batch_id = ? AND status = ?",
+            (QUEUED, batch_id, FAILED)
+        )
+        self.wakeup.set()
+        return cursor.rowcount
+
+    # --- Progress ---
+    def batch_progress(self, batch_id):
+        """Counts by status for one batch, e.g. {'queued': 10, 'sent': 90, ...}."""
+        rows = self._conn().execute(
+            "SELECT status, COUNT(*) FROM outbox WHERE batch_id = ? GROUP BY status", (batch_id,)
+        ).fetchall()
+        progress = {QUEUED: 0, SENDING: 0, SENT: 0, FAILED: 0}
+        progress.update({status: count for status, count in rows})
+        progress["total"] = sum(count for _, count in rows)
+        return progress
+
+    def batch_failures(self, batch_id, limit=100):
+        rows = self._conn().execute(
+            "SELECT recipient, candidate_name, attempts, last_error FROM outbox WHERE batch_id = ? AND status = ? LIMIT ?",
+            (batch_id, FAILED, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def recent_sends(self, owner=None, batch_ids=None, limit=200):
+        """
+        Latest entries of the send ledger, newest first: `owner`'s messages if given,
+        otherwise those of `batch_ids` if given, otherwise everyone's (scripts only).
+        """
+        query = "SELECT logged_at, batch_id, candidate_name, recipient, subject, status, error FROM send_ledger"
+        params = ()
+        if owner is not None:
+            query, params = query + " WHERE owner = ?", (owner,)
+        elif batch_ids is not None:
+            if not batch_ids:
+                return []
+            query, params = query + f" WHERE batch_id IN ({','.join('?' * len(batch_ids))})", tuple(batch_ids)
+        rows = self._conn().execute(query + " ORDER BY id DESC LIMIT ?", (*params, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def _log_outcome(self, message, status, error=None):
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO send_ledger (logged_at, batch_id, owner, candidate_name, recipient, subject, status, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (time.time(), message["batch_id"], message["owner"], message["candidate_name"], message["recipient"], message["subject"], status, error)
+        )
+        with self.lock:
+            self._ledger_writes += 1
+            trim = self._ledger_writes % LEDGER_TRIM_EVERY == 0
+        if trim:
+            conn.execute("DELETE FROM send_ledger WHERE id <= (SELECT MAX(id) FROM send_ledger) - ?", (LEDGER_MAX_ROWS,))
+
+    def wait_for_batch(self, batch_id, timeout=None, poll_seconds=0.2):
+        """Blocks until nothing in the batch is queued or sending (used by scripts, not the UI)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            progress = self.batch_progress(batch_id)
+            if progress[QUEUED] == 0 and progress[SENDING] == 0:
+                return progress
+            if deadline is not None and time.monotonic() > deadline:
+                return progress
+            time.sleep(poll_seconds)
+
+    # --- Workers ---
+    def _claim(self):
+        """Atomically claims the next due message for a registered account, or returns None."""
+        with self.lock:
+            ready_accounts = [key for key, account in self.accounts.items() if not account["error"]]
+        if not ready_accounts:
+            return None
+        conn = self._conn()
+        now = time.time()
+        placeholders = ",".join("?" * len(ready_accounts))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                f"UPDATE outbox SET status = ?, next_attempt_at = 0 WHERE status = ? AND claimed_at < ? AND account IN ({placeholders})",
+                (QUEUED, SENDING, now - STALE_CLAIM_SECONDS, *ready_accounts)
+            )
+            row = conn.execute(
+                f"""SELECT * FROM outbox WHERE status = ? AND next_attempt_at <= ? AND account IN ({placeholders})
+                    ORDER BY next_attempt_at, id LIMIT 1""",
+                (QUEUED, now, *ready_accounts)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE outbox SET status = ?, attempts = attempts + 1, claimed_at = ? WHERE id = ?",
+                    (SENDING, now, row["id"])
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        message = dict(row)
+        message["attempts"] += 1 # The row was read before the claim counted this attempt
+        return message
+
+    def _smtp(self, connections, key):
+        """Returns this worker's open connection for an account, connecting (and logging in) if needed."""
+        server = connections.get(key)
+        if server is not None:
+            return server
+        with self.lock:
+            account = dict(self.accounts[key])
+        server = smtplib.SMTP(account["server"], account["port"], timeout=SMTP_TIMEOUT_SECONDS)
+        try:
+            if account["use_tls"]:
+                server.starttls()
+            if account["password"]:
+                server.login(account["sender"], account["password"])
+        except BaseException:
+            server.close()
+            raise
+        connections[key] = server
+        return server
+
+    def _mark_sent(self, message):
+        # Sent rows keep their idempotency key but drop the message content
+        self._conn().execute(
+            "UPDATE outbox SET status = ?, sent_at = ?, last_error = NULL, body = '', raw_message = NULL WHERE id = ?",
+            (SENT, time.time(), message["id"])
+        )
+        self._log_outcome(message, SENT)
+
+    def _flush_unrecorded_sends(self):
+        """Retries the 'sent' update of delivered messages, ahead of claiming new ones."""
+        with self.lock:
+            pending, self.unrecorded_sends = self.unrecorded_sends, []
+        for i, message in enumerate(pending):
+            try:
+                self._mark_sent(message)
+            except sqlite3.OperationalError:
+                with self.lock:
+                    self.unrecorded_sends.extend(pending[i:])
+                return
+
+    def _worker_loop(self):
+        connections = {}
+        while not self.stop_event.is_set():
+            self._flush_unrecorded_sends()
+            try:
+                message = self._claim()
+            except sqlite3.OperationalError:
+                message = None # Database busy; try again shortly
+            if message is None:
+                self.wakeup.wait(IDLE_POLL_SECONDS)
+                self.wakeup.clear()
+                continue
+
+            bucket = self.buckets.get(message["smtp_server"])
+            if bucket is not None and not bucket.acquire(self.stop_event):
+                break
+            try:
+                server = self._smtp(connections, message["account"])
+                if message["raw_message"] is not None:
+                    server.sendmail(message["sender"], [message["recipient"]], message["raw_message"])
+                else:
+                    server.send_message(build_message(
+                        message["sender"], message["recipient"], message["subject"], message["body"], message["idempotency_key"]
+                    ))
+            except Exception as e:
+                server = connections.get(message["account"])
+                if server is not None and not _reset_after_error(server, e):
+                    connections.pop(message["account"], None)
+                try:
+                    self._record_failure(message, e)
+                except sqlite3.OperationalError:
+                    pass # Database busy: the claim goes stale and is re-queued
+                continue
+
+            # SMTP accepted the message: from here on only the bookkeeping may be retried, never the send
+            try:
+                self._mark_sent(message)
+            except sqlite3.OperationalError:
+                with self.lock:
+                    self.unrecorded_sends.append(message)
+
+        for server in connections.values():
+            try:
+                server.quit()
+            except Exception:
+                pass
+
+    def _record_failure(self, message, error):
+        if isinstance(error, smtplib.SMTPAuthenticationError):
+            # Every message for this account would fail the same way: pause it until credentials are re-entered
+            with self.lock:
+                if message["account"] in self.accounts:
+                    self.accounts[message["account"]]["error"] = "Authentication failed"
+            self._conn().execute(
+                "UPDATE outbox SET status = ?, attempts = attempts - 1, last_error = ? WHERE id = ?",
+                (QUEUED, str(error), message["id"])
+            )
+            return
+        if is_transient(error) and message["attempts"] < MAX_ATTEMPTS:
+            delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (message["attempts"] - 1))
+            delay *= random.uniform(0.5, 1.5)
+            self._conn().execute(
+                "UPDATE outbox SET status = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (QUEUED, time.time() + delay, str(error), message["id"])
+            )
+        else:
+            self._conn().execute(
+                "UPDATE outbox SET status = ?, last_error = ? WHERE id = ?",
+                (FAILED, str(error), message["id"])
+            )
+            self._log_outcome(message, FAILED, str(error))
+
+    def shutdown(self, timeout=5):
+        self.stop_event.set()
+        self.wakeup.set()
+        for worker in self.workers:
+            worker.join(timeout)
+
+
+@st.cache_resource
+def get_email_outbox():
+    """Process-wide outbox and worker pool shared by every session."""
+    return EmailOutbox()
@@ -2,11 +2,11 @@
 
 import streamlit as st
 import pandas as pd
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 import json
 import os
+import hashlib
+from email_outbox import get_email_outbox, SENT, QUEUED, SENDING, FAILED, DEFAULT_RATE_PER_SECOND
+from mail_merge import compile_template, merge_into_outbox, TemplateError
 
 def send_email_to_candidate():
     st.markdown("## 📤 Email Candidates")
@@ -56,6 +56,8 @@ def send_email_to_candidate():
         sender_password = st.text_input("Your Email Password (App Password)", type="password", key="sender_password")
         smtp_server = st.text_input("SMTP Server", "smtp.gmail.com", key="smtp_server")
         smtp_port = st.number_input("SMTP Port", 587, key="smtp_port")
+        use_tls = st.checkbox("Use STARTTLS", value=True, key="smtp_use_tls")
+        rate_per_second = st.number_input("Max emails per second (per SMTP server)", min_value=0.1, value=DEFAULT_RATE_PER_SECOND, step=0.5, key="smtp_rate")
 
         st.markdown("### ✍️ Email Content")
         email_subject = st.text_input("Email Subject", "Job Application Update - Your Application to [Job Title]")
@@ -82,58 +84,83 @@ def send_email_to_candidate():
                 return
 
             try:
-                with smtplib.SMTP(smtp_server, smtp_port) as server:
-                    server.starttls() # Secure the connection
-                    server.login(sender_email, sender_password)
-
-                    for index, row in shortlisted_candidates.iterrows():
-                        candidate_name = row['Candidate Name']
-                        candidate_email = row['Email']
-                        score_percent = row['Score (%)']
-                        years_experience = row['Years Experience']
-                        ai_suggestion = row['AI Suggestion']
-
-                        # Format the email body with actual candidate data
-                        formatted_body = email_body.format(
-                            candidate_name=candidate_name,
-                            score_percent=score_percent,
-                            years_experience=years_experience,
-                            ai_suggestion=ai_suggestion
-                        )
-
-                        msg = MIMEMultipart()
-                        msg['From'] = sender_email
-                        msg['To'] = candidate_email
-                        msg['Subject'] = email_subject
-                        msg.attach(MIMEText(formatted_body, 'plain'))
-
-                        server.send_message(msg)
-                        st.success(f"Email sent to {candidate_name} ({candidate_email})")
-                        
-                        # Add sent email to session state for tracking
-                        if 'sent_emails_log' not in st.session_state:
-                            st.session_state['sent_emails_log'] = []
-                        st.session_state['sent_emails_log'].append({
-                            "timestamp": pd.Timestamp.now().isoformat(),
-                            "candidate_name": candidate_name,
-                            "candidate_email": candidate_email,
-                            "subject": email_subject,
-                            "body_snippet": formatted_body[:100] + "..." # Log a snippet
-                        })
-
-                st.success("All emails sent successfully!")
-            except smtplib.SMTPAuthenticationError:
-                st.error("Email sending failed: Invalid email or app password. For Gmail, you might need to use an App Password.")
-                st.info("If using Gmail, please ensure you've enabled '2-Step Verification' and generated an 'App password' for your app, then use that password here.")
-            except smtplib.SMTPConnectError:
-                st.error(f"Email sending failed: Could not connect to SMTP server {smtp_server}:{smtp_port}. Check server address and port.")
+                # Validate and compile the templates once for the whole batch
+                subject_template = compile_template(email_subject)
+                body_template = compile_template(email_body)
+            except TemplateError as e:
+                st.error(f"❌ {e}")
+                return
+
+            try:
+                outbox = get_email_outbox()
+                account = outbox.register_account(
+                    smtp_server, smtp_port, sender_email, sender_password, use_tls=use_tls, rate_per_second=rate_per_second
+                )
+                # Same sender + content -> same batch, so pressing the button again just shows its progress
+                batch_id = hashlib.sha256(f"{sender_email}|{email_subject}|{email_body}".encode("utf-8")).hexdigest()[:16]
+                merge_progress = st.progress(0.0, text="Preparing emails...")
+                queued, duplicates = merge_into_outbox(
+                    outbox, batch_id, smtp_server, smtp_port, sender_email, shortlisted_candidates,
+                    subject_template, body_template,
+                    progress=lambda done, total: merge_progress.progress(done / total, text=f"Prepared {done} of {total} emails"),
+                    owner=st.session_state.get('username')
+                )
+                st.session_state['email_batch_id'] = batch_id
+                session_batches = st.session_state.setdefault('email_batch_ids', [])
+                if batch_id not in session_batches:
+                    session_batches.append(batch_id)
+                st.session_state['email_account'] = account
+                if duplicates:
+                    st.info(f"ℹ️ {duplicates} email(s) were already queued or sent earlier and will not be sent again.")
+                st.success(f"📬 Queued {queued} email(s). They are sent in the background; you can keep working.")
             except Exception as e:
-                st.error(f"An unexpected error occurred during email sending: {e}")
+                st.error(f"An unexpected error occurred while queueing emails: {e}")
+
+        if st.session_state.get('email_batch_id'):
+            _show_delivery_progress(st.session_state['email_batch_id'], st.session_state.get('email_account'))
 
     except Exception as e:
         st.error(f"An error occurred while preparing candidate data: {e}")
 
 
+def _show_delivery_progress(batch_id, account):
+    """Progress of the last queued batch, read from the persistent outbox."""
+    outbox = get_email_outbox()
+    st.markdown("### 📬 Delivery Progress")
+    progress = outbox.batch_progress(batch_id)
+    total = progress["total"] or 1
+    finished = progress[SENT] + progress[FAILED]
+    st.progress(finished / total, text=f"{finished} of {progress['total']} processed")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("✅ Sent", progress[SENT])
+    col2.metric("⏳ Queued", progress[QUEUED] + progress[SENDING])
+    col3.metric("❌ Failed", progress[FAILED])
+
+    account_error = outbox.account_error(account) if account else None
+    if account_error:
+        st.error("Email sending is paused: invalid email or app password. Re-enter your credentials and press send again.")
+        st.info("If using Gmail, please ensure you've enabled '2-Step Verification' and generated an 'App password' for your app, then use that password here.")
+
+    if progress[FAILED]:
+        st.dataframe(pd.DataFrame(outbox.batch_failures(batch_id)), use_container_width=True)
+        if st.button("🔁 Retry Failed Emails"):
+            st.success(f"Re-queued {outbox.retry_failed(batch_id)} email(s).")
+    if progress[QUEUED] + progress[SENDING]:
+        st.button("🔄 Refresh Progress")
+
+    with st.expander("📜 Recent Send Log"):
+        # Only this user's sends (this session's batches when not logged in), never other recruiters' candidates
+        recent = outbox.recent_sends(
+            owner=st.session_state.get('username'), batch_ids=st.session_state.get('email_batch_ids', []), limit=200
+        )
+        if recent:
+            log_df = pd.DataFrame(recent)
+            log_df["logged_at"] = pd.to_datetime(log_df["logged_at"], unit="s")
+            st.dataframe(log_df, use_container_width=True)
+        else:
+            st.info("Nothing sent yet.")
+
+
 # This ensures the function is called when email_sender.py is executed (via exec() or direct import)
 if __name__ == "__main__":
     send_email_to_candidate()
@@ -0,0 +1,132 @@
+import streamlit as st
+import threading
+import collections
+import time
+from concurrent.futures import Future
+import numpy as np
+
+# --- Configuration ---
+MAX_BATCH_TEXTS = 64          # A batch closes once it holds this many texts...
+MAX_WAIT_SECONDS = 0.010      # ...or this long after its first request arrived
+LATENCY_WINDOW = 2000         # Recent request latencies kept for the percentiles
+
+
+class EmbeddingService:
+    """
+    Dynamic micro-batching in front of the shared SentenceTransformer.
+
+    Sessions call encode() as they would model.encode(). Requests are queued and
+    a single service thread gathers everything that arrives within
+    MAX_WAIT_SECONDS (or up to MAX_BATCH_TEXTS texts) into one forward pass, then
+    hands each caller its rows through a Future. Many small concurrent calls
+    become a few large ones instead of contending for the model one by one.
+    The window only opens while there is concurrent traffic, so a single user
+    pays no extra latency.
+    """
+
+    def __init__(self, model, max_batch=MAX_BATCH_TEXTS, max_wait=MAX_WAIT_SECONDS):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.pending = collections.deque() # (texts, future, enqueued_at)
+        self.condition = threading.Condition()
+        self.stop_event = threading.Event()
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self.batch_sizes = collections.deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.texts = 0
+        self.batches = 0
+        self.max_depth = 0
+        self.concurrent = False # Whether the last batch saw other callers; a lone caller isn't kept waiting
+        self.thread = threading.Thread(target=self._serve, name="embedding-service", daemon=True)
+        self.thread.start()
+
+    def submit(self, texts):
+        """Queues a list of texts; the Future resolves to a 2-D array with one row per text."""
+        future = Future()
+        if not texts:
+            future.set_result(np.zeros((0, 0), dtype=np.float32))
+            return future
+        with self.condition:
+            self.pending.append((list(texts), future, time.perf_counter()))
+            self.max_depth = max(self.max_depth, len(self.pending))
+            self.condition.notify()
+        return future
+
+    def encode(self, sentences, batch_size=None, timeout=None):
+        """Drop-in for model.encode(): a single string gives a 1-D vector, a list a 2-D array."""
+        if isinstance(sentences, str):
+            return self.submit([sentences]).result(timeout)[0]
+        return self.submit(sentences).result(timeout)
+
+    # --- Service Thread ---
+    def _next_batch(self):
+        """Waits for a request, then gathers more until the batch is full or its window closes."""
+        with self.condition:
+            while not self.pending and not self.stop_event.is_set():
+                self.condition.wait()
+            if self.stop_event.is_set():
+                return []
+            deadline = self.pending[0][2] + (self.max_wait if self.concurrent else 0)
+            batch, size = [], 0
+            while True:
+                while self.pending and (not batch or size + len(self.pending[0][0]) <= self.max_batch):
+                    request = self.pending.popleft()
+                    batch.append(request)
+                    size += len(request[0])
+                remaining = deadline - time.perf_counter()
+                if size >= self.max_batch or remaining <= 0 or (self.pending and size + len(self.pending[0][0]) > self.max_batch):
+                    return batch
+                self.condition.wait(remaining)
+
+    def _serve(self):
+        while not self.stop_event.is_set():
+            batch = self._next_batch()
+            if not batch:
+                continue
+            with self.condition:
+                self.concurrent = len(batch) > 1 or bool(self.pending)
+            texts = [text for request_texts, _, _ in batch for text in request_texts]
+            try:
+                embeddings = np.asarray(self.model.encode(texts, batch_size=self.max_batch))
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            done_at = time.perf_counter()
+            offset = 0
+            for request_texts, future, enqueued_at in batch:
+                future.set_result(embeddings[offset:offset + len(request_texts)])
+                offset += len(request_texts)
+                self.latencies.append(done_at - enqueued_at)
+            self.requests += len(batch)
+            self.texts += len(texts)
+            self.batches += 1
+            self.batch_sizes.append(len(texts))
+
+    # --- Metrics ---
+    def metrics(self):
+        latencies = sorted(self.latencies)
+        percentile = lambda pct: round(latencies[min(len(latencies) - 1, int(len(latencies) * pct))] * 1000, 1) if latencies else None
+        return {
+            "Queue Depth": len(self.pending),
+            "Max Queue Depth": self.max_depth,
+            "Requests": self.requests,
+            "Texts": self.texts,
+            "Batches": self.batches,
+            "Avg Batch Size": round(sum(self.batch_sizes) / len(self.batch_sizes), 1) if self.batch_sizes else None,
+            "p50 Latency (ms)": percentile(0.5),
+            "p95 Latency (ms)": percentile(0.95),
+        }
+
+    def shutdown(self, timeout=5):
+        self.stop_event.set()
+        with self.condition:
+            self.condition.notify_all()
+        self.thread.join(timeout)
+
+
+@st.cache_resource
+def get_embedding_service(_model):
+    """Process-wide embedding service for the shared model (the model argument is not hashed)."""
+    return EmbeddingService(_model)
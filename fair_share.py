@@ -0,0 +1,287 @@
+import streamlit as st
+import pandas as pd
+import threading
+import collections
+import itertools
+import json
+import os
+import time
+from concurrency import get_cpu_plan
+
+# --- Configuration ---
+QUOTAS_FILE = "screening_quotas.json"
+DEFAULT_WEIGHT = 1.0
+DEFAULT_MAX_IN_FLIGHT = 8    # Resumes one user may have in the pipeline at once
+SMALL_JOB_RESUMES = 10       # Screens with this few resumes left are admitted ahead of larger ones
+THROUGHPUT_WINDOW = 200      # Recent completions used for the ETA
+WAIT_POLL_SECONDS = 0.1
+
+
+def default_capacity():
+    """Resumes in flight across all users: enough to keep the PDF workers and the model busy."""
+    plan = get_cpu_plan()
+    return max(4, (plan.pdf_workers + plan.torch_threads) * 2)
+
+
+def load_quotas(path=QUOTAS_FILE):
+    """{"capacity": int|None, "default": {...}, "users": {username: {"weight", "max_in_flight"}}}"""
+    quotas = {"capacity": None, "default": {"weight": DEFAULT_WEIGHT, "max_in_flight": DEFAULT_MAX_IN_FLIGHT}, "users": {}}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        quotas["capacity"] = saved.get("capacity")
+        quotas["default"].update(saved.get("default", {}))
+        quotas["users"].update(saved.get("users", {}))
+    return quotas
+
+
+def save_quotas(quotas, path=QUOTAS_FILE):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(quotas, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class Ticket:
+    """One resume (or a batch of `count`) waiting for (or holding) scoring slots."""
+
+    def __init__(self, user, remaining, seq, count=1):
+        self.user = user
+        self.remaining = remaining # Resumes the user's screen still has to go, this one included
+        self.seq = seq
+        self.count = count         # Slots requested; set to the slots granted on admission
+        self.enqueued_at = time.monotonic()
+        self.admitted = False
+
+
+class FairShareScheduler:
+    """
+    Admission control in front of the shared model and PDF workers.
+
+    Every resume takes a slot before it is extracted and gives it back once it
+    is scored. At most `capacity` resumes are in flight across all users and at
+    most `max_in_flight` per user. Free slots go to the waiting resume whose
+    user has received the least service relative to their weight (start-time
+    fair queuing on a per-user virtual clock), with screens of
+    SMALL_JOB_RESUMES or fewer remaining resumes going first. A recruiter with
+    2,000 PDFs therefore shares the model with everyone else instead of
+    queueing them behind the whole batch.
+    """
+
+    def __init__(self, quotas=None, quotas_path=QUOTAS_FILE):
+        self.quotas_path = quotas_path
+        self.quotas = quotas or load_quotas(quotas_path)
+        self.quotas_mtime = self._quotas_mtime()
+        self.condition = threading.Condition()
+        self.waiting = []
+        self.in_flight = collections.Counter()
+        self.served = collections.Counter()
+        self.virtual = {} # user -> virtual finish time (service received / weight)
+        self.clock = 0.0  # Virtual start time of the most recent admission
+        self.completions = collections.deque(maxlen=THROUGHPUT_WINDOW)
+        self.seq = itertools.count()
+
+    # --- Quotas ---
+    def _quotas_mtime(self):
+        try:
+            return os.path.getmtime(self.quotas_path)
+        except OSError:
+            return None
+
+    def _reload_quotas(self):
+        """Picks up quotas saved by another process (another replica's Admin Tools)."""
+        mtime = self._quotas_mtime()
+        if mtime != self.quotas_mtime:
+            self.quotas_mtime = mtime
+            try:
+                self.quotas = load_quotas(self.quotas_path)
+            except (OSError, ValueError):
+                pass
+
+    def set_quotas(self, quotas):
+        save_quotas(quotas, self.quotas_path)
+        with self.condition:
+            self.quotas = quotas
+            self.quotas_mtime = self._quotas_mtime()
+            self._dispatch() # A raised cap may admit waiting resumes right away
+
+    def quota(self, user):
+        quota = dict(self.quotas["default"])
+        quota.update(self.quotas["users"].get(user or "", {}))
+        return quota
+
+    @property
+    def capacity(self):
+        return self.quotas.get("capacity") or default_capacity()
+
+    # --- Admission ---
+    def _key(self, ticket):
+        return (ticket.remaining > SMALL_JOB_RESUMES, self.virtual.get(ticket.user, 0.0), ticket.seq)
+
+    def _slots_needed(self, ticket):
+        """A batch never asks for more than its user may hold or the scheduler has."""
+        return max(1, min(ticket.count, self.quota(ticket.user)["max_in_flight"], self.capacity))
+
+    def _dispatch(self):
+        admitted = False
+        while self.waiting:
+            eligible = [t for t in self.waiting
+                        if self.in_flight[t.user] + self._slots_needed(t) <= self.quota(t.user)["max_in_flight"]]
+            if not eligible:
+                break
+            ticket = min(eligible, key=self._key)
+            needed = self._slots_needed(ticket)
+            # All of a batch's slots are granted at once (no holder ever waits for more), and
+            # the next ticket in line waits for room instead of being overtaken by smaller ones
+            if sum(self.in_flight.values()) + needed > self.capacity:
+                break
+            self.waiting.remove(ticket)
+            ticket.count = needed
+            ticket.admitted = True
+            self.in_flight[ticket.user] += needed
+            start = self.virtual.get(ticket.user, 0.0)
+            self.clock = start
+            self.virtual[ticket.user] = start + needed / max(float(self.quota(ticket.user)["weight"]), 0.01)
+            admitted = True
+        if admitted:
+            self.condition.notify_all()
+
+    def acquire(self, user, remaining=1, cancel_event=None, count=1):
+        """
+        Blocks until one resume of `user` (or a batch of `count`, capped at the
+        user's max_in_flight and the capacity) may be scored; returns its Ticket,
+        whose count is the slots granted, or None if `cancel_event` is set first
+        (the ticket keeps its place while waiting).
+        """
+        with self.condition:
+            self._reload_quotas()
+            if not self.in_flight[user] and not any(t.user == user for t in self.waiting):
+                # A returning user starts at the current virtual time instead of cashing in idle time
+                self.virtual[user] = max(self.virtual.get(user, 0.0), self.clock)
+            ticket = Ticket(user, remaining, next(self.seq), count)
+            self.waiting.append(ticket)
+            self._dispatch()
+            while not ticket.admitted:
+                if cancel_event is not None and cancel_event.is_set():
+                    self.waiting.remove(ticket)
+                    self._dispatch()
+                    return None
+                self.condition.wait(WAIT_POLL_SECONDS)
+            return ticket
+
+    def release(self, user, count=1):
+        """Gives back `count` slots of `user` once their resumes are scored (or dropped)."""
+        if count <= 0:
+            return
+        with self.condition:
+            count = min(count, self.in_flight[user])
+            self.in_flight[user] -= count
+            self.served[user] += count
+            now = time.monotonic()
+            self.completions.extend([now] * count)
+            self._dispatch()
+
+    # --- Status ---
+    def _throughput(self):
+        """Resumes completed per second across all users, over the recent window (lock held)."""
+        if len(self.completions) < 2:
+            return None
+        return len(self.completions) / max(time.monotonic() - self.completions[0], 1e-3)
+
+    def status(self, user):
+        """The user's place in line: waiting/in-flight counts, position of their next resume and its ETA."""
+        with self.condition:
+            mine = [t for t in self.waiting if t.user == user]
+            position = 0
+            if mine:
+                first = min(mine, key=self._key)
+                position = sum(1 for t in self.waiting if t.user != user and self._key(t) < self._key(first))
+            rate = self._throughput()
+            return {
+                "waiting": len(mine),
+                "in_flight": self.in_flight[user],
+                "position": position,
+                "eta_seconds": (position + 1) / rate if mine and rate else None,
+            }
+
+    def snapshot(self):
+        """One row per user with work in the scheduler, for Admin Tools."""
+        with self.condition:
+            users = set(self.in_flight) | {t.user for t in self.waiting} | set(self.served)
+            rows = []
+            for user in sorted(users, key=str):
+                quota = self.quota(user)
+                rows.append({
+                    "User": user,
+                    "Weight": quota["weight"],
+                    "Max In-Flight": quota["max_in_flight"],
+                    "In Flight": self.in_flight[user],
+                    "Waiting": sum(1 for t in self.waiting if t.user == user),
+                    "Served": self.served[user],
+                })
+            return rows
+
+
+@st.cache_resource
+def get_fair_scheduler():
+    """Process-wide scheduler shared by every session and the background screening jobs."""
+    return FairShareScheduler()
+
+
+def format_queue_status(status):
+    """Short status line for a user whose resumes are waiting for a slot."""
+    eta = f", next resume starts in ~{status['eta_seconds']:.0f}s" if status["eta_seconds"] is not None else ""
+    return f"⏳ Waiting for a screening slot: {status['position']} resumes from other users ahead of yours{eta}."
+
+
+# --- Admin Tools ---
+def admin_screening_quotas_section(usernames):
+    """Admin form for per-user weights and in-flight caps, plus the scheduler's live state."""
+    st.subheader("🚦 Screening Quotas")
+    scheduler = get_fair_scheduler()
+    quotas = load_quotas(scheduler.quotas_path)
+    st.caption(
+        f"Up to {scheduler.capacity} resumes are screened at once across all users. Free slots go to the user "
+        f"with the least screening time relative to their weight; screens with {SMALL_JOB_RESUMES} or fewer "
+        "resumes left go first."
+    )
+
+    # Outside the form so picking a user shows that user's current quota
+    options = ["(default for all users)"] + list(usernames)
+    selected = st.selectbox("User", options, key="quota_user_select")
+    is_default = selected == options[0]
+    current = quotas["default"] if is_default else {**quotas["default"], **quotas["users"].get(selected, {})}
+    with st.form("admin_screening_quotas_form"):
+        col1, col2 = st.columns(2)
+        with col1:
+            weight = st.number_input("Weight (share of the model)", min_value=0.1, max_value=100.0, value=float(current["weight"]), step=0.5, key=f"quota_weight_{selected}")
+        with col2:
+            max_in_flight = st.number_input("Max resumes in flight", min_value=1, max_value=256, value=int(current["max_in_flight"]), key=f"quota_in_flight_{selected}")
+        capacity = st.number_input("Total resumes in flight (0 = sized from the CPU budget)", min_value=0, max_value=1024, value=int(quotas["capacity"] or 0))
+        col_save, col_reset = st.columns(2)
+        save = col_save.form_submit_button("💾 Save Quota")
+        reset = col_reset.form_submit_button("↩️ Reset User to Default", disabled=is_default)
+
+    if save or reset:
+        quotas["capacity"] = int(capacity) or None
+        if is_default:
+            quotas["default"] = {"weight": weight, "max_in_flight": int(max_in_flight)}
+        elif reset:
+            quotas["users"].pop(selected, None)
+        else:
+            quotas["users"][selected] = {"weight": weight, "max_in_flight": int(max_in_flight)}
+        try:
+            scheduler.set_quotas(quotas)
+            st.success(f"✅ Quota for '{selected}' {'reset' if reset else 'saved'}.")
+        except OSError as e:
+            st.error(f"❌ Could not save quotas: {e}")
+
+    if quotas["users"]:
+        st.dataframe(
+            pd.DataFrame([{"User": user, "Weight": q.get("weight"), "Max In-Flight": q.get("max_in_flight")} for user, q in quotas["users"].items()]),
+            use_container_width=True, hide_index=True
+        )
+    live = scheduler.snapshot()
+    if live:
+        st.markdown("**Live scheduler state**")
+        st.dataframe(pd.DataFrame(live), use_container_width=True, hide_index=True)
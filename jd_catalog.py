@@ -0,0 +1,263 @@
+import streamlit as st
+import sqlite3
+import hashlib
+import threading
+import json
+import os
+import time
+import numpy as np
+
+# --- Configuration ---
+JD_FOLDER = "data"
+CATALOG_DB_FILE = "jd_catalog.db"
+FULL_RESCAN_SECONDS = 30 # In-place edits don't change the folder mtime, so rescan file stats at most this often
+
+
+# --- Helpers ---
+def jd_title(file_name):
+    """Display title for a JD file ("data_scientist.txt" -> "Data Scientist")."""
+    return file_name.replace(".txt", "").replace("_", " ").title()
+
+def hash_text_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class JDCatalog:
+    """
+    Catalog of the job descriptions in `data/`: file name, title, size, mtime and
+    content hash, plus extracted skills and an embedding that are computed on
+    first use and stored by content hash (so renames and re-uploads of the same
+    text reuse them).
+
+    refresh() is incremental: it only stats the folder unless its mtime changed
+    (or FULL_RESCAN_SECONDS passed), and only re-reads files whose size/mtime moved.
+    Pages that write JDs call upsert()/remove() so the catalog never goes stale.
+    """
+
+    def __init__(self, folder=JD_FOLDER, db_path=CATALOG_DB_FILE):
+        self.folder = folder
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS jds (
+                    file_name TEXT PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )""")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS jd_features (
+                    content_hash TEXT PRIMARY KEY,
+                    skills TEXT,
+                    embedding BLOB
+                )""")
+        self.entries = {
+            row[0]: {"file_name": row[0], "title": row[1], "size": row[2], "mtime_ns": row[3], "content_hash": row[4]}
+            for row in self.conn.execute("SELECT file_name, title, size, mtime_ns, content_hash FROM jds")
+        }
+        self.texts = {}          # content hash -> text, filled on demand
+        self.skills = {}         # content hash -> frozenset of skills
+        self.embeddings = {}     # content hash -> np.ndarray
+        self.version = 0         # Bumped whenever a JD is added, changed or removed
+        self._matrix = None      # (version, with embeddings, stacked features) from feature_matrix()
+        self._folder_mtime = None
+        self._scanned_at = 0.0
+        self.refresh(force=True)
+
+    # --- Change detection ---
+    def refresh(self, force=False):
+        """Brings the catalog in line with the folder. Returns True if anything changed."""
+        with self.lock:
+            os.makedirs(self.folder, exist_ok=True)
+            folder_mtime = os.stat(self.folder).st_mtime_ns
+            if not force and folder_mtime == self._folder_mtime and time.monotonic() - self._scanned_at < FULL_RESCAN_SECONDS:
+                return False
+            changed = False
+            seen = set()
+            for entry in os.scandir(self.folder):
+                if not entry.name.endswith(".txt") or not entry.is_file():
+                    continue
+                seen.add(entry.name)
+                stat = entry.stat()
+                known = self.entries.get(entry.name)
+                if known is None or known["size"] != stat.st_size or known["mtime_ns"] != stat.st_mtime_ns:
+                    changed |= self._update_entry(entry.name, stat)
+            for file_name in set(self.entries) - seen:
+                self._delete_entry(file_name)
+                changed = True
+            self._folder_mtime = folder_mtime
+            self._scanned_at = time.monotonic()
+            return changed
+
+    def _update_entry(self, file_name, stat=None, data=None, commit=True):
+        path = os.path.join(self.folder, file_name)
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+        stat = stat or os.stat(path)
+        content_hash = hash_text_bytes(data)
+        known = self.entries.get(file_name)
+        entry = {"file_name": file_name, "title": jd_title(file_name), "size": stat.st_size,
+                 "mtime_ns": stat.st_mtime_ns, "content_hash": content_hash}
+        self.entries[file_name] = entry
+        self.texts[content_hash] = data.decode("utf-8", errors="replace")
+        self.conn.execute(
+            "INSERT OR REPLACE INTO jds (file_name, title, size, mtime_ns, content_hash, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (file_name, entry["title"], entry["size"], entry["mtime_ns"], content_hash, time.time())
+        )
+        if commit:
+            self.conn.commit()
+        # Touched but identical content (e.g. re-saved) keeps its features
+        changed = known is None or known["content_hash"] != content_hash
+        if changed:
+            self.version += 1
+        return changed
+
+    def _delete_entry(self, file_name):
+        if self.entries.pop(file_name, None) is not None:
+            self.version += 1
+        with self.conn:
+            self.conn.execute("DELETE FROM jds WHERE file_name = ?", (file_name,))
+
+    def upsert(self, file_name):
+        """Registers a JD file that was just written to the folder."""
+        with self.lock:
+            self._update_entry(file_name)
+            self._folder_mtime = os.stat(self.folder).st_mtime_ns
+
+    def upsert_many(self, files):
+        """
+        Registers many just-written JD files in one transaction. `files` is a list of
+        (file_name, data) so the bytes the caller already holds aren't read back.
+        """
+        with self.lock:
+            with self.conn:
+                for file_name, data in files:
+                    self._update_entry(file_name, data=data, commit=False)
+            self._folder_mtime = os.stat(self.folder).st_mtime_ns
+
+    def remove(self, file_name):
+        """Deletes a JD file and its catalog entry."""
+        with self.lock:
+            path = os.path.join(self.folder, file_name)
+            if os.path.exists(path):
+                os.remove(path)
+            self._delete_entry(file_name)
+            self._folder_mtime = os.stat(self.folder).st_mtime_ns
+
+    # --- Lookups ---
+    def __len__(self):
+        return len(self.entries)
+
+    def list_jds(self):
+        """Catalog entries sorted by title."""
+        with self.lock:
+            return sorted(self.entries.values(), key=lambda entry: entry["title"])
+
+    def get(self, file_name):
+        return self.entries.get(file_name)
+
+    def get_text(self, file_name):
+        with self.lock:
+            entry = self.entries.get(file_name)
+            if entry is None:
+                return None
+            text = self.texts.get(entry["content_hash"])
+            if text is None:
+                with open(os.path.join(self.folder, file_name), "r", encoding="utf-8", errors="replace") as f:
+                    text = f.read()
+                self.texts[entry["content_hash"]] = text
+            return text
+
+    # --- Features ---
+    def _load_features(self, content_hash):
+        row = self.conn.execute("SELECT skills, embedding FROM jd_features WHERE content_hash = ?", (content_hash,)).fetchone()
+        if row is None:
+            return
+        if row[0] is not None:
+            self.skills[content_hash] = frozenset(json.loads(row[0]))
+        if row[1] is not None:
+            self.embeddings[content_hash] = np.frombuffer(row[1], dtype=np.float32)
+
+    def store_features(self, content_hash, skills=None, embedding=None):
+        """Persists computed features for a content hash."""
+        self.store_features_many([(content_hash, skills, embedding)])
+
+    def store_features_many(self, items):
+        """Persists (content_hash, skills, embedding) triples in one transaction (used by bulk imports)."""
+        with self.lock:
+            with self.conn:
+                for content_hash, skills, embedding in items:
+                    if skills is not None:
+                        self.skills[content_hash] = frozenset(skills)
+                    if embedding is not None:
+                        self.embeddings[content_hash] = np.asarray(embedding, dtype=np.float32)
+                    self.conn.execute("INSERT OR IGNORE INTO jd_features (content_hash) VALUES (?)", (content_hash,))
+                    if skills is not None:
+                        self.conn.execute("UPDATE jd_features SET skills = ? WHERE content_hash = ?",
+                                          (json.dumps(sorted(skills)), content_hash))
+                    if embedding is not None:
+                        self.conn.execute("UPDATE jd_features SET embedding = ? WHERE content_hash = ?",
+                                          (self.embeddings[content_hash].tobytes(), content_hash))
+
+    def features(self, file_name, extract_skills, encode):
+        """
+        Returns (skills, embedding) for a JD, computing each on first use with the
+        given callbacks (`extract_skills(text) -> set`, `encode(text) -> vector`).
+        Either callback may be None to skip that feature.
+        """
+        with self.lock:
+            entry = self.entries.get(file_name)
+            if entry is None:
+                return None, None
+            content_hash = entry["content_hash"]
+            if content_hash not in self.skills or content_hash not in self.embeddings:
+                self._load_features(content_hash)
+            skills = self.skills.get(content_hash)
+            embedding = self.embeddings.get(content_hash)
+            new_skills = extract_skills(self.get_text(file_name)) if skills is None and extract_skills else None
+            new_embedding = encode(self.get_text(file_name)) if embedding is None and encode else None
+            if new_skills is not None or new_embedding is not None:
+                self.store_features(content_hash, new_skills, new_embedding)
+            return self.skills.get(content_hash), self.embeddings.get(content_hash)
+
+    def feature_matrix(self, extract_skills, encode_batch=None):
+        """
+        Features of every JD stacked for vectorized scoring: (entries sorted by title,
+        skill sets, embedding matrix or None). Missing features are computed in one
+        batch (`encode_batch(list_of_texts) -> 2-D array`), and the stack is only
+        rebuilt when the catalog changes.
+        """
+        with self.lock:
+            with_embeddings = encode_batch is not None
+            if self._matrix is not None and self._matrix[:2] == (self.version, with_embeddings):
+                return self._matrix[2]
+            entries = self.list_jds()
+            for entry in entries:
+                content_hash = entry["content_hash"]
+                if content_hash not in self.skills or (with_embeddings and content_hash not in self.embeddings):
+                    self._load_features(content_hash)
+            need_skills = [entry for entry in entries if entry["content_hash"] not in self.skills]
+            need_embeddings = [entry for entry in entries if with_embeddings and entry["content_hash"] not in self.embeddings]
+            new_features = [(entry["content_hash"], extract_skills(self.get_text(entry["file_name"])), None) for entry in need_skills]
+            if need_embeddings:
+                new_embeddings = encode_batch([self.get_text(entry["file_name"]) for entry in need_embeddings])
+                if new_embeddings is not None:
+                    new_features += [(entry["content_hash"], None, new_embeddings[i]) for i, entry in enumerate(need_embeddings)]
+            if new_features:
+                self.store_features_many(new_features)
+            skills = [self.skills[entry["content_hash"]] for entry in entries]
+            embeddings = None
+            if with_embeddings and entries and all(entry["content_hash"] in self.embeddings for entry in entries):
+                embeddings = np.vstack([self.embeddings[entry["content_hash"]] for entry in entries])
+            self._matrix = (self.version, with_embeddings, (entries, skills, embeddings))
+            return self._matrix[2]
+
+
+@st.cache_resource
+def get_jd_catalog():
+    """Process-wide JD catalog shared by every session."""
+    return JDCatalog()
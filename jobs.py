@@ -0,0 +1,106 @@
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+from jd_catalog import get_jd_catalog
+from login import is_current_user_admin
+from screening_jobs import get_screening_jobs, QUEUED, RUNNING, CANCELLING, CANCELLED, DONE, FAILED, ACTIVE_STATUSES
+
+STATUS_LABELS = {
+    QUEUED: "⏳ Queued", RUNNING: "⚙️ Running", CANCELLING: "🛑 Cancelling",
+    CANCELLED: "⏹️ Cancelled", DONE: "✅ Done", FAILED: "❌ Failed",
+}
+
+
+def screening_jobs_page():
+    """Submit screening batches as background jobs and follow, cancel, resume or load them."""
+    st.title("🗂️ Screening Jobs")
+    st.caption("Jobs keep running when you switch pages or close the tab, and pick up where they left off after a server restart.")
+
+    jobs = get_screening_jobs()
+    username = st.session_state.get("username")
+
+    # --- Submit a Job ---
+    with st.expander("➕ New Screening Job", expanded=not jobs.list_jobs(owner=username, limit=1)):
+        jd_catalog = get_jd_catalog()
+        jd_catalog.refresh()
+        job_roles = {entry["title"]: entry["file_name"] for entry in jd_catalog.list_jds()}
+        jd_option = st.selectbox("📌 Job Role", list(job_roles.keys()) + ["Upload my own"], key="job_jd_option")
+        jd_text = ""
+        if jd_option == "Upload my own":
+            jd_file = st.file_uploader("Upload Job Description (TXT)", type="txt", key="job_jd_file")
+            if jd_file:
+                jd_text = jd_file.getvalue().decode("utf-8", errors="replace")
+        else:
+            jd_text = jd_catalog.get_text(job_roles[jd_option]) or ""
+        resume_files = st.file_uploader("📄 Upload Resumes (PDF)", type="pdf", accept_multiple_files=True, key="job_resumes")
+        if st.button("🚀 Submit Job", disabled=not (jd_text and resume_files)):
+            job_id = jobs.submit(username, jd_option, jd_text, [(file.name, file.getvalue()) for file in resume_files])
+            st.success(f"✅ Job `{job_id}` queued with {len(resume_files)} resumes.")
+
+    # --- Job List ---
+    show_all = is_current_user_admin() and st.checkbox("Show jobs from all users")
+    job_list = jobs.list_jobs(owner=None if show_all else username)
+    if not job_list:
+        st.info("No screening jobs yet.")
+        return
+    if any(job["status"] in ACTIVE_STATUSES for job in job_list):
+        st.button("🔄 Refresh Status")
+
+    for job in job_list:
+        finished = job["scored"] + job["failed"]
+        created = datetime.fromtimestamp(job["created_at"]).strftime("%Y-%m-%d %H:%M")
+        with st.container(border=True):
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.markdown(f"**{job['jd_title']}** · `{job['id']}` · {created}" + (f" · {job['owner']}" if show_all else ""))
+            with col2:
+                st.markdown(STATUS_LABELS.get(job["status"], job["status"]))
+            st.progress(finished / job["total"] if job["total"] else 1.0,
+                        text=f"{finished} of {job['total']} resumes" + (f" · {job['failed']} failed" if job["failed"] else ""))
+            details = []
+            if job["per_minute"]:
+                details.append(f"{job['per_minute']:.1f} resumes/min")
+            if job["eta_seconds"] is not None:
+                details.append(f"~{job['eta_seconds'] / 60:.1f} min left")
+            if job["error"]:
+                details.append(f"Error: {job['error']}")
+            if details:
+                st.caption(" · ".join(details))
+            for warning in job["warnings"]:
+                st.warning(warning)
+
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                if job["status"] in (QUEUED, RUNNING) and st.button("🛑 Cancel", key=f"cancel_{job['id']}"):
+                    jobs.cancel(job["id"])
+                    st.rerun()
+                if job["status"] in (CANCELLED, FAILED) and finished < job["total"] and st.button("▶️ Resume", key=f"resume_{job['id']}"):
+                    jobs.resume(job["id"])
+                    st.rerun()
+            with col2:
+                if job["scored"] and st.button("👀 View Results", key=f"view_{job['id']}"):
+                    st.session_state['viewing_job'] = job["id"]
+            with col3:
+                if job["scored"] and st.button("📥 Load into Analytics", key=f"load_{job['id']}"):
+                    results = jobs.results(job["id"])
+                    st.session_state['screening_results'] = results
+                    pd.DataFrame(results).sort_values(by="Score (%)", ascending=False).to_csv("results.csv", index=False)
+                    st.success(f"Loaded {len(results)} candidates. Open **📊 Screening Analytics** or **📤 Email Candidates**.")
+            with col4:
+                if job["status"] not in ACTIVE_STATUSES and st.button("🗑️ Delete", key=f"delete_{job['id']}"):
+                    jobs.delete(job["id"])
+                    st.session_state.pop('viewing_job', None)
+                    st.rerun()
+
+            if st.session_state.get('viewing_job') == job["id"]:
+                results_df = pd.DataFrame(jobs.results(job["id"]))
+                if not results_df.empty:
+                    st.dataframe(
+                        results_df.drop(columns=["Resume Raw Text", "Detailed HR Assessment"], errors="ignore")
+                        .sort_values(by="Score (%)", ascending=False).reset_index(drop=True),
+                        use_container_width=True
+                    )
+                failures = jobs.failures(job["id"])
+                if failures:
+                    st.markdown("**Failed files**")
+                    st.dataframe(pd.DataFrame(failures), use_container_width=True)
@@ -2,38 +2,249 @@ import streamlit as st
 import json
 import bcrypt
 import os
+import tempfile
+import threading
+import time
+import hmac
+import hashlib
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 # File to store user credentials
 USER_DB_FILE = "users.json"
 ADMIN_USERNAME = "admin@forscreenerpro" # Define your admin username here
 
+# --- User Store ---
+# users.json stays the source of truth, but reads are served from an in-memory
+# copy that is only re-parsed when the file's mtime/size change. Writes take an
+# exclusive file lock, re-read the file, change just the affected user and
+# replace the file atomically, so concurrent admin edits cannot clobber each other.
+USER_DB_LOCK_FILE = USER_DB_FILE + ".lock"
+USER_CACHE_RECHECK_SECONDS = 1.0 # How often the file is stat()ed for changes made by other processes
+
+try:
+    import fcntl
+except ImportError: # Windows: fall back to the in-process lock only
+    fcntl = None
+
+_users_lock = threading.RLock()
+_users_cache = {"signature": None, "users": None, "checked_at": 0.0}
+
+def _normalize_users(users):
+    # Ensure each user has a 'status' key for backward compatibility
+    for username, data in users.items():
+        if isinstance(data, str): # Old format: "username": "hashed_password"
+            users[username] = {"password": data, "status": "active"}
+        elif "status" not in data:
+            data["status"] = "active"
+    return users
+
+def _file_signature():
+    try:
+        stat = os.stat(USER_DB_FILE)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _read_users_file():
+    """Parses users.json and records its signature in the cache."""
+    signature = _file_signature()
+    if signature is None:
+        users = {}
+    else:
+        with open(USER_DB_FILE, "r") as f:
+            users = _normalize_users(json.load(f))
+    _users_cache.update(signature=signature, users=users, checked_at=time.monotonic())
+    return users
+
+def _cached_users():
+    """Returns the cached users dict, re-reading the file only when it changed on disk."""
+    with _users_lock:
+        now = time.monotonic()
+        if _users_cache["users"] is not None and now - _users_cache["checked_at"] < USER_CACHE_RECHECK_SECONDS:
+            return _users_cache["users"]
+        if _users_cache["users"] is None or _file_signature() != _users_cache["signature"]:
+            return _read_users_file()
+        _users_cache["checked_at"] = now
+        return _users_cache["users"]
+
+@contextmanager
+def _locked_users_file():
+    """Exclusive lock across threads and processes for read-modify-write cycles."""
+    with _users_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(USER_DB_LOCK_FILE, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _write_users_file(users):
+    """Writes users.json atomically (temp file + fsync + rename) and refreshes the cache."""
+    directory = os.path.dirname(os.path.abspath(USER_DB_FILE))
+    fd, tmp_path = tempfile.mkstemp(prefix=".users-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(users, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, USER_DB_FILE)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _users_cache.update(signature=_file_signature(), users=users, checked_at=time.monotonic())
+
 def load_users():
-    """Loads user data from the JSON file."""
-    if not os.path.exists(USER_DB_FILE):
-        with open(USER_DB_FILE, "w") as f:
-            json.dump({}, f)
-    with open(USER_DB_FILE, "r") as f:
-        users = json.load(f)
-        # Ensure each user has a 'status' key for backward compatibility
-        for username, data in users.items():
-            if isinstance(data, str): # Old format: "username": "hashed_password"
-                users[username] = {"password": data, "status": "active"}
-            elif "status" not in data:
-                data["status"] = "active"
-        return users
+    """Returns a copy of all users (served from memory unless users.json changed)."""
+    return {username: dict(data) for username, data in _cached_users().items()}
+
+def get_user(username):
+    """Returns a copy of one user's record, or None. No file I/O on the steady-state path."""
+    data = _cached_users().get(username)
+    return dict(data) if data is not None else None
 
 def save_users(users):
-    """Saves user data to the JSON file."""
-    with open(USER_DB_FILE, "w") as f:
-        json.dump(users, f, indent=4)
+    """Replaces the whole user file atomically. Prefer create_user/update_user for single changes."""
+    with _locked_users_file():
+        _write_users_file(_normalize_users({username: dict(data) for username, data in users.items()}))
+
+def create_user(username, password_hash, status="active"):
+    """Adds a user under the file lock. Returns False if the username is already taken."""
+    with _locked_users_file():
+        users = _read_users_file()
+        if username in users:
+            return False
+        users = dict(users)
+        users[username] = {"password": password_hash, "status": status}
+        _write_users_file(users)
+        return True
+
+def update_user(username, expected=None, **fields):
+    """
+    Updates fields of one user against the latest file contents.
+    `expected` ({field: value}) makes the update conditional on the stored values.
+    Returns False if the user does not exist or the expectation does not hold.
+    """
+    with _locked_users_file():
+        users = _read_users_file()
+        if username not in users:
+            return False
+        if expected and any(users[username].get(field) != value for field, value in expected.items()):
+            return False
+        users = dict(users)
+        users[username] = {**users[username], **fields}
+        _write_users_file(users)
+        return True
+
+# --- Password Hashing ---
+# bcrypt releases the GIL, so hashing and verification run on a small shared
+# thread pool instead of the Streamlit script thread. The pool and its queue are
+# bounded: a login burst waits for a slot (up to AUTH_QUEUE_TIMEOUT_SECONDS)
+# rather than piling unbounded CPU work onto the server.
+BCRYPT_ROUNDS = int(os.environ.get("SCREENERPRO_BCRYPT_ROUNDS", "12"))
+AUTH_WORKERS = int(os.environ.get("SCREENERPRO_AUTH_WORKERS", str(min(4, os.cpu_count() or 1))))
+AUTH_MAX_PENDING = AUTH_WORKERS * 8
+AUTH_QUEUE_TIMEOUT_SECONDS = 30
+
+class AuthBusyError(RuntimeError):
+    """Raised when the password hashing pool stays saturated for too long."""
+
+@st.cache_resource
+def get_auth_executor():
+    """Process-wide bounded pool for bcrypt work, shared by every session."""
+    return ThreadPoolExecutor(max_workers=AUTH_WORKERS, thread_name_prefix="bcrypt"), threading.BoundedSemaphore(AUTH_MAX_PENDING)
 
-def hash_password(password):
-    """Hashes a password using bcrypt."""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+def _run_bcrypt(fn, *args):
+    executor, slots = get_auth_executor()
+    if not slots.acquire(timeout=AUTH_QUEUE_TIMEOUT_SECONDS):
+        raise AuthBusyError("Too many logins in progress. Please try again in a moment.")
+    try:
+        future = executor.submit(fn, *args)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return future
+
+def hash_password(password, rounds=None):
+    """Hashes a password using bcrypt at the configured work factor."""
+    salt = bcrypt.gensalt(rounds=rounds or BCRYPT_ROUNDS)
+    return _run_bcrypt(bcrypt.hashpw, password.encode('utf-8'), salt).result().decode('utf-8')
 
 def check_password(password, hashed_password):
     """Checks a password against its bcrypt hash."""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+    return _run_bcrypt(bcrypt.checkpw, password.encode('utf-8'), hashed_password.encode('utf-8')).result()
+
+def hash_rounds(hashed_password):
+    """Work factor encoded in a bcrypt hash ("$2b$12$..." -> 12), or None if unparseable."""
+    try:
+        return int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+def needs_rehash(hashed_password):
+    return hash_rounds(hashed_password) != BCRYPT_ROUNDS
+
+def _upgrade_hash(username, password, old_hash):
+    """Re-hashes a password at the current work factor after a successful login."""
+    try:
+        new_hash = hash_password(password)
+    except AuthBusyError:
+        return # Try again on the next login
+    # Skip if an admin reset the password in the meantime
+    update_user(username, expected={"password": old_hash}, password=new_hash)
+
+# --- Session Tokens ---
+# A successful login stores a signed token in the session. Reruns validate the
+# token with one HMAC and a cached user lookup instead of re-running bcrypt; the
+# token is bound to the stored hash, so a password reset or a disabled account
+# ends existing sessions.
+SESSION_TOKEN_TTL_SECONDS = 12 * 60 * 60
+SESSION_SECRET = os.environ.get("SCREENERPRO_SESSION_SECRET", "").encode("utf-8") or secrets.token_bytes(32)
+
+def _token_signature(username, issued_at, password_hash):
+    message = f"{username}|{issued_at}|{password_hash}".encode("utf-8")
+    return hmac.new(SESSION_SECRET, message, hashlib.sha256).hexdigest()
+
+def issue_session_token(username, password_hash):
+    issued_at = int(time.time())
+    return {"username": username, "issued_at": issued_at, "signature": _token_signature(username, issued_at, password_hash)}
+
+def validate_session_token(token):
+    """True if the token is unexpired, correctly signed and its user is still active with the same password."""
+    if not token:
+        return False
+    if time.time() - token["issued_at"] > SESSION_TOKEN_TTL_SECONDS:
+        return False
+    user_data = get_user(token["username"])
+    if user_data is None or user_data["status"] == "disabled":
+        return False
+    expected = _token_signature(token["username"], token["issued_at"], user_data["password"])
+    return hmac.compare_digest(expected, token["signature"])
+
+def authenticate(username, password):
+    """
+    Verifies credentials off the script thread. Returns (ok, message); on success
+    the stored hash is transparently upgraded if the work factor changed.
+    """
+    user_data = get_user(username)
+    if user_data is None:
+        return False, "❌ Invalid username or password. Please register if you don't have an account."
+    if user_data["status"] == "disabled":
+        return False, "❌ Your account has been disabled. Please contact an administrator."
+    try:
+        if not check_password(password, user_data["password"]):
+            return False, "❌ Invalid username or password."
+    except AuthBusyError as e:
+        return False, f"⏳ {e}"
+    if needs_rehash(user_data["password"]):
+        _upgrade_hash(username, password, user_data["password"])
+    return True, "✅ Login successful!"
 
 def register_section():
     """Public self-registration form."""
@@ -50,15 +261,17 @@ def register_section():
             elif new_password != confirm_password:
                 st.error("Passwords do not match.")
             else:
-                users = load_users()
-                if new_username in users:
-                    st.error("Username already exists. Please choose a different one.")
+                try:
+                    created = get_user(new_username) is None and create_user(new_username, hash_password(new_password))
+                except AuthBusyError as e:
+                    st.error(f"⏳ {e}")
                 else:
-                    users[new_username] = {"password": hash_password(new_password), "status": "active"}
-                    save_users(users)
-                    st.success("✅ Registration successful! You can now switch to the 'Login' option.")
-                    # Manually set the session state to switch to Login option
-                    st.session_state.active_login_tab_selection = "Login"
+                    if not created:
+                        st.error("Username already exists. Please choose a different one.")
+                    else:
+                        st.success("✅ Registration successful! You can now switch to the 'Login' option.")
+                        # Manually set the session state to switch to Login option
+                        st.session_state.active_login_tab_selection = "Login"
 
 def admin_registration_section():
     """Admin-driven user creation form."""
@@ -72,13 +285,15 @@ def admin_registration_section():
             if not new_username or not new_password:
                 st.error("Please fill in all fields.")
             else:
-                users = load_users()
-                if new_username in users:
-                    st.error(f"User '{new_username}' already exists.")
+                try:
+                    created = get_user(new_username) is None and create_user(new_username, hash_password(new_password))
+                except AuthBusyError as e:
+                    st.error(f"⏳ {e}")
                 else:
-                    users[new_username] = {"password": hash_password(new_password), "status": "active"}
-                    save_users(users)
-                    st.success(f"✅ User '{new_username}' added successfully!")
+                    if not created:
+                        st.error(f"User '{new_username}' already exists.")
+                    else:
+                        st.success(f"✅ User '{new_username}' added successfully!")
 
 def admin_password_reset_section():
     """Admin-driven password reset form."""
@@ -99,9 +314,15 @@ def admin_password_reset_section():
             if not new_password:
                 st.error("Please enter a new password.")
             else:
-                users[selected_user]["password"] = hash_password(new_password)
-                save_users(users)
-                st.success(f"✅ Password for '{selected_user}' has been reset.")
+                try:
+                    updated = update_user(selected_user, password=hash_password(new_password))
+                except AuthBusyError as e:
+                    st.error(f"⏳ {e}")
+                else:
+                    if updated:
+                        st.success(f"✅ Password for '{selected_user}' has been reset.")
+                    else:
+                        st.error(f"User '{selected_user}' no longer exists.")
 
 def admin_disable_enable_user_section():
     """Admin-driven user disable/enable form."""
@@ -121,8 +342,7 @@ def admin_disable_enable_user_section():
 
         if st.form_submit_button(f"Toggle to {'Disable' if current_status == 'active' else 'Enable'} User"):
             new_status = "disabled" if current_status == "active" else "active"
-            users[selected_user]["status"] = new_status
-            save_users(users)
+            update_user(selected_user, status=new_status)
             st.success(f"✅ User '{selected_user}' status set to **{new_status.upper()}**.")
             st.rerun() # Rerun to update the displayed status immediately
 
@@ -137,14 +357,20 @@ def login_section():
     # Initialize active_login_tab_selection if not present
     if "active_login_tab_selection" not in st.session_state:
         # Default to 'Register' if no users, otherwise 'Login'
-        if not os.path.exists(USER_DB_FILE) or len(load_users()) == 0:
+        if not _cached_users():
             st.session_state.active_login_tab_selection = "Register"
         else:
             st.session_state.active_login_tab_selection = "Login"
 
 
     if st.session_state.authenticated:
-        return True
+        # Cheap per-rerun check instead of re-verifying the password
+        if validate_session_token(st.session_state.get("session_token")):
+            return True
+        st.session_state.authenticated = False
+        st.session_state.username = None
+        st.session_state.pop("session_token", None)
+        st.warning("🔒 Your session has expired or your account changed. Please log in again.")
 
     # Use st.radio to simulate tabs if st.tabs() default_index is not supported
     tab_selection = st.radio(
@@ -163,20 +389,15 @@ def login_section():
             submitted = st.form_submit_button("Login")
 
             if submitted:
-                users = load_users()
-                if username not in users:
-                    st.error("❌ Invalid username or password. Please register if you don't have an account.")
+                ok, message = authenticate(username, password)
+                if ok:
+                    st.session_state.authenticated = True
+                    st.session_state.username = username
+                    st.session_state.session_token = issue_session_token(username, get_user(username)["password"])
+                    st.success(message)
+                    st.rerun()
                 else:
-                    user_data = users[username]
-                    if user_data["status"] == "disabled":
-                        st.error("❌ Your account has been disabled. Please contact an administrator.")
-                    elif check_password(password, user_data["password"]):
-                        st.session_state.authenticated = True
-                        st.session_state.username = username
-                        st.success("✅ Login successful!")
-                        st.rerun()
-                    else:
-                        st.error("❌ Invalid username or password.")
+                    st.error(message)
     
     elif tab_selection == "Register": # This will be the initially selected option for new users
         register_section()
@@ -193,10 +414,8 @@ if __name__ == "__main__":
     st.title("ScreenerPro Authentication (Test)")
     
     # Ensure admin user exists for testing
-    users = load_users()
-    if ADMIN_USERNAME not in users:
-        users[ADMIN_USERNAME] = {"password": hash_password("adminpass"), "status": "active"} # Set a default admin password for testing
-        save_users(users)
+    if get_user(ADMIN_USERNAME) is None:
+        create_user(ADMIN_USERNAME, hash_password("adminpass")) # Set a default admin password for testing
         st.info(f"Created default admin user: {ADMIN_USERNAME} with password 'adminpass'")
 
     if login_section():
@@ -235,6 +454,7 @@ if __name__ == "__main__":
         if st.button("Logout"):
             st.session_state.authenticated = False
             st.session_state.pop('username', None)
+            st.session_state.pop('session_token', None)
             st.rerun()
     else:
         st.info("Please login or register to continue.")
@@ -29,6 +29,7 @@ st.markdown("""
 
 # --- Logout Logic ---
 st.session_state.authenticated = False
+st.session_state.pop('session_token', None)
 
 # --- Message UI ---
 st.markdown("""
@@ -0,0 +1,199 @@
+import re
+import string
+import numpy as np
+import pandas as pd
+from email import quoprimime
+from email.header import Header
+from email.utils import formatdate
+
+from email_outbox import idempotency_key
+
+# --- Configuration ---
+# Template placeholder -> screening results column
+MERGE_FIELDS = {
+    "candidate_name": "Candidate Name",
+    "candidate_email": "Email",
+    "score_percent": "Score (%)",
+    "years_experience": "Years Experience",
+    "ai_suggestion": "AI Suggestion",
+}
+RECIPIENT_COLUMN = "Email"
+NAME_COLUMN = "Candidate Name"
+MERGE_CHUNK_SIZE = 1000          # Rows rendered and queued per step, so sending starts before the whole batch is rendered
+MAX_7BIT_LINE_LENGTH = 998       # RFC 5322 line limit; longer lines are quoted-printable encoded
+
+# Format specs that printf-style formatting renders identically to format(), so a
+# whole numeric column can be formatted in one numpy call
+FAST_NUMERIC_SPEC_RE = re.compile(r"^(\.\d+)?[fFeEgG]$")
+LINE_BREAK_RE = re.compile(r"\s*[\r\n]+\s*") # Inside a header value this would start a new header
+
+
+class TemplateError(ValueError):
+    """Raised when an email template cannot be compiled."""
+
+
+class CompiledTemplate:
+    """
+    A str.format-style template parsed and validated once. render() fills it for
+    every row of a DataFrame column by column instead of calling str.format per row.
+    """
+
+    def __init__(self, template, fields=MERGE_FIELDS):
+        self.template = template
+        self.fields = fields
+        self.segments = [] # ("literal", text) or ("field", column, spec, conversion)
+        try:
+            parsed = list(string.Formatter().parse(template))
+        except ValueError as e:
+            raise TemplateError(f"Invalid template: {e}. Use {{{{ and }}}} for literal braces.") from None
+
+        for literal, field_name, spec, conversion in parsed:
+            if literal:
+                if self.segments and self.segments[-1][0] == "literal":
+                    self.segments[-1] = ("literal", self.segments[-1][1] + literal)
+                else:
+                    self.segments.append(("literal", literal))
+            if field_name is None:
+                continue
+            if field_name not in fields:
+                allowed = ", ".join("{" + name + "}" for name in fields)
+                raise TemplateError(f"Unknown placeholder {{{field_name}}}. Available placeholders: {allowed}")
+            if "{" in (spec or ""):
+                raise TemplateError(f"Nested placeholders are not supported in {{{field_name}:{spec}}}")
+            if spec and not _spec_is_valid(spec):
+                raise TemplateError(f"Invalid format '{spec}' for {{{field_name}}}")
+            self.segments.append(("field", fields[field_name], spec, conversion))
+
+    @property
+    def columns(self):
+        return {segment[1] for segment in self.segments if segment[0] == "field"}
+
+    def render(self, df):
+        """Returns a numpy object array with the rendered text for every row of `df`."""
+        missing = self.columns - set(df.columns)
+        if missing:
+            raise TemplateError(f"Missing columns for template: {', '.join(sorted(missing))}")
+        rendered = np.full(len(df), "", dtype=object)
+        for segment in self.segments:
+            if segment[0] == "literal":
+                rendered = rendered + segment[1]
+            else:
+                _, column, spec, conversion = segment
+                rendered = rendered + _format_column(df[column], spec, conversion)
+        return rendered
+
+
+def _spec_is_valid(spec):
+    for sample in (0.0, 0, ""):
+        try:
+            format(sample, spec)
+            return True
+        except (ValueError, TypeError):
+            continue
+    return False
+
+def _format_column(series, spec, conversion):
+    """format(value, spec) for a whole column; numeric specs run as one vectorized numpy call."""
+    if conversion:
+        convert = {"r": repr, "s": str, "a": ascii}[conversion]
+        series = series.map(convert)
+    if not spec:
+        return series.astype(str).to_numpy(dtype=object)
+    if (FAST_NUMERIC_SPEC_RE.match(spec) and pd.api.types.is_numeric_dtype(series)
+            and not pd.api.types.is_bool_dtype(series)):
+        return np.char.mod("%" + spec, series.to_numpy(dtype=float)).astype(object)
+    return np.array([format(value, spec) for value in series.to_numpy(dtype=object)], dtype=object)
+
+
+def compile_template(template):
+    """Validates and compiles a template once per batch. Raises TemplateError with a user-facing message."""
+    return CompiledTemplate(template)
+
+
+# --- Serialization ---
+def _single_line(values):
+    """Rendered header values with line breaks (from a merge field) collapsed to a space."""
+    return pd.Series(values, dtype=object).str.replace(LINE_BREAK_RE, " ", regex=True).to_numpy(dtype=object)
+
+def _check_address(address):
+    if "\r" in address or "\n" in address:
+        raise ValueError(f"Email address contains a line break: {address!r}")
+    return address
+
+def _encode_header(value, cache):
+    encoded = cache.get(value)
+    if encoded is None:
+        encoded = value if value.isascii() else Header(value, "utf-8").encode()
+        cache[value] = encoded
+    return encoded
+
+def _encode_body(body):
+    """7bit for plain ASCII bodies with short lines, quoted-printable otherwise."""
+    body = body.replace("\r\n", "\n")
+    if body.isascii() and all(len(line) <= MAX_7BIT_LINE_LENGTH for line in body.split("\n")):
+        return "7bit", body.replace("\n", "\r\n")
+    # quoprimime escapes one character per byte, so hand it the UTF-8 bytes as latin-1 characters
+    return "quoted-printable", quoprimime.body_encode(body.encode("utf-8").decode("latin-1"), eol="\r\n")
+
+def serialize_messages(sender, recipients, subjects, bodies, keys):
+    """
+    Builds raw RFC 5322 messages (bytes) from already rendered parts. Headers
+    shared by the whole batch are built once, and subjects are encoded once per
+    distinct value. Line breaks in subjects are collapsed; an address with one
+    raises ValueError, so no header can be injected.
+    """
+    sender_header = _encode_header(_check_address(sender), {})
+    date = formatdate(localtime=True)
+    subject_cache = {}
+    messages = []
+    for recipient, subject, body, key in zip(recipients, _single_line(subjects), bodies, keys):
+        _check_address(recipient)
+        encoding, payload = _encode_body(body)
+        messages.append((
+            f"From: {sender_header}\r\nTo: {recipient}\r\nSubject: {_encode_header(subject, subject_cache)}\r\n"
+            f"Date: {date}\r\nMessage-ID: <{key[:32]}@screenerpro>\r\nMIME-Version: 1.0\r\n"
+            f"Content-Type: text/plain; charset=\"utf-8\"\r\nContent-Transfer-Encoding: {encoding}\r\n\r\n{payload}"
+        ).encode("utf-8"))
+    return messages
+
+
+# --- Merge ---
+def merge_messages(df, subject_template, body_template, sender, chunk_size=MERGE_CHUNK_SIZE):
+    """
+    Renders and serializes the batch in chunks. Yields lists of
+    (idempotency_key, recipient, candidate_name, subject, raw_message) tuples,
+    ready for EmailOutbox.enqueue_serialized.
+    """
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        subjects = _single_line(subject_template.render(chunk)) # Same subject in the outbox as in the header
+        bodies = body_template.render(chunk)
+        recipients = chunk[RECIPIENT_COLUMN].astype(str).str.strip().to_numpy(dtype=object)
+        names = chunk[NAME_COLUMN].astype(str).to_numpy(dtype=object)
+        keys = [idempotency_key(sender, recipient, subject, body)
+                for recipient, subject, body in zip(recipients, subjects, bodies)]
+        raws = serialize_messages(sender, recipients, subjects, bodies, keys)
+        yield list(zip(keys, recipients, names, subjects, raws))
+
+def merge_into_outbox(outbox, batch_id, smtp_server, smtp_port, sender, df, subject_template, body_template,
+                      progress=None, owner=None):
+    """
+    Streams a mail-merge batch into the outbox chunk by chunk. Workers start
+    sending the first chunk while the rest is still being rendered.
+    `progress(done, total)` and `owner` (the user queueing the batch) are optional.
+    Returns (queued, duplicates).
+    Raises ValueError before queueing anything if an email address contains a line break.
+    """
+    broken = df[RECIPIENT_COLUMN].astype(str).str.strip().str.contains(r"[\r\n]", regex=True)
+    if broken.any():
+        names = ", ".join(_single_line(df.loc[broken, NAME_COLUMN].astype(str).head(5)))
+        raise ValueError(f"Email addresses with line breaks for: {names}. Fix them in the screening results first.")
+    queued = duplicates = done = 0
+    for messages in merge_messages(df, subject_template, body_template, sender):
+        new, existing = outbox.enqueue_serialized(batch_id, smtp_server, smtp_port, sender, messages, owner=owner)
+        queued += new
+        duplicates += existing
+        done += len(messages)
+        if progress:
+            progress(done, len(df))
+    return queued, duplicates
@@ -4,6 +4,7 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from wordcloud import WordCloud
 import os
+import sys
 import json
 
 # Import the page functions from their respective files
@@ -12,10 +13,9 @@ from login import (
     admin_password_reset_section, admin_disable_enable_user_section,
     is_current_user_admin
 )
-# Assuming these files exist in your project structure (you'll need to create them)
-# from email_sender import send_email_to_candidate
-# from screener import resume_screener_page
-# from analytics import analytics_dashboard_page
+# Pages are imported lazily on first navigation (see page_registry.py)
+from page_registry import PAGES, render_page, get_page_timings
+from jd_catalog import get_jd_catalog
 
 
 # --- Page Config ---
@@ -136,7 +136,7 @@ is_admin = is_current_user_admin()
 
 # --- Navigation Control ---
 navigation_options = [
-    "🏠 Dashboard", "🧠 Resume Screener", "📁 Manage JDs", "📊 Screening Analytics",
+    "🏠 Dashboard", "🧠 Resume Screener", "🧮 Matrix Screening", "🎯 Find Roles", "🗂️ Screening Jobs", "📁 Manage JDs", "📊 Screening Analytics",
     "📤 Email Candidates", "🔍 Search Resumes", "📝 Candidate Notes"
 ]
 if is_admin: # Only add Admin Tools if the user is an admin
@@ -161,10 +161,9 @@ if tab == "🏠 Dashboard":
 
     # Initialize metrics
     resume_count = 0
-    # Create the 'data' directory if it doesn't exist
-    if not os.path.exists("data"):
-        os.makedirs("data")
-    jd_count = len([f for f in os.listdir("data") if f.endswith(".txt")])
+    jd_catalog = get_jd_catalog()
+    jd_catalog.refresh()
+    jd_count = len(jd_catalog)
     shortlisted = 0
     avg_score = 0.0
     df_results = pd.DataFrame()
@@ -375,6 +374,10 @@ elif tab == "⚙️ Admin Tools":
         admin_disable_enable_user_section() # Disable/Enable User Form
         st.markdown("---")
 
+        from fair_share import admin_screening_quotas_section
+        admin_screening_quotas_section(list(load_users().keys())) # Per-user screening weights and caps
+        st.markdown("---")
+
         st.subheader("👥 All Registered Users")
         st.warning("⚠️ **SECURITY WARNING:** This table displays usernames (email IDs) and **hashed passwords**. This is for **ADMINISTRATIVE DEBUGGING ONLY IN A SECURE ENVIRONMENT**. **NEVER expose this in a public or production application.**")
         try:
@@ -390,78 +393,40 @@ elif tab == "⚙️ Admin Tools":
                 st.info("No users registered yet.")
         except Exception as e:
             st.error(f"Error loading user data: {e}")
+
+        st.markdown("---")
+        st.subheader("⏱️ Page Load Timings")
+        page_timings = get_page_timings().snapshot()
+        if page_timings:
+            st.dataframe(pd.DataFrame(page_timings), use_container_width=True)
+        else:
+            st.info("No pages opened yet.")
+
+        st.subheader("🧠 Embedding Service")
+        screener_module = sys.modules.get("screener") # Not imported just for this: it loads the models
+        if screener_module is not None and screener_module.embedder is not None:
+            st.dataframe(pd.DataFrame([screener_module.embedder.metrics()]), use_container_width=True, hide_index=True)
+        else:
+            st.info("The embedding model loads with the first screening page.")
+
+        st.subheader("🖥️ CPU Budget")
+        from concurrency import get_cpu_plan
+        st.dataframe(pd.DataFrame(get_cpu_plan().as_rows()), use_container_width=True, hide_index=True)
+        st.caption("Set the environment variables before starting the app; run tune_concurrency.py to find the best split for this machine.")
     else:
         st.error("🔒 Access Denied: You must be an administrator to view this page.")
 
 # ======================
-# Page Routing via function calls (remaining pages)
+# Page Routing via the page registry (remaining pages)
 # ======================
-# Placeholder for screener.py, email_sender.py, analytics.py, manage_jds.py, search.py, notes.py
-# You need to ensure these files exist and define the respective page functions.
-# For demonstration, these will print a message if the files are not available.
-
-elif tab == "🧠 Resume Screener":
-    try:
-        from screener import resume_screener_page
-        resume_screener_page()
-    except ImportError:
-        st.info("`screener.py` not found or function not defined. Please create it.")
-    except Exception as e:
-        st.error(f"Error loading Resume Screener: {e}")
-
-
-elif tab == "📁 Manage JDs":
-    try:
-        # Assuming manage_jds.py contains its Streamlit code directly or in a function
-        with open("manage_jds.py", encoding="utf-8") as f:
-            exec(f.read())
-    except FileNotFoundError:
-        st.info("`manage_jds.py` not found. Please ensure the file exists in the same directory.")
-    except Exception as e:
-        st.error(f"Error loading Manage JDs: {e}")
-
-
-elif tab == "📊 Screening Analytics":
-    try:
-        from analytics import analytics_dashboard_page
-        analytics_dashboard_page()
-    except ImportError:
-        st.info("`analytics.py` not found or function not defined. Please create it.")
-    except Exception as e:
-        st.error(f"Error loading Screening Analytics: {e}")
-
-elif tab == "📤 Email Candidates":
-    try:
-        from email_sender import send_email_to_candidate
-        send_email_to_candidate()
-    except ImportError:
-        st.info("`email_sender.py` not found or function not defined. Please create it.")
-    except Exception as e:
-        st.error(f"Error loading Email Candidates: {e}")
-
-
-elif tab == "🔍 Search Resumes":
-    try:
-        # Assuming search.py contains its Streamlit code directly or in a function
-        with open("search.py", encoding="utf-8") as f:
-            exec(f.read())
-    except FileNotFoundError:
-        st.info("`search.py` not found. Please ensure the file exists in the same directory.")
-    except Exception as e:
-        st.error(f"Error loading Search Resumes: {e}")
-
-elif tab == "📝 Candidate Notes":
-    try:
-        # Assuming notes.py contains its Streamlit code directly or in a function
-        with open("notes.py", encoding="utf-8") as f:
-            exec(f.read())
-    except FileNotFoundError:
-        st.info("`notes.py` not found. Please ensure the file exists in the same directory.")
-    except Exception as e:
-        st.error(f"Error loading Candidate Notes: {e}")
+# Each page module is imported on first navigation and its render function is
+# called on every rerun; see page_registry.py.
+elif tab in PAGES:
+    render_page(tab)
 
 elif tab == "🚪 Logout":
     st.session_state.authenticated = False
     st.session_state.pop('username', None)
+    st.session_state.pop('session_token', None)
     st.success("✅ Logged out.")
     st.rerun() # Rerun to redirect to login page
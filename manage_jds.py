@@ -1,87 +1,128 @@
 import streamlit as st
 import os
+import tempfile
+from jd_catalog import get_jd_catalog, hash_text_bytes, JD_FOLDER
 
 # --- JD Folder ---
-jd_folder = "data"
-os.makedirs(jd_folder, exist_ok=True)
-
-# --- UI Styling ---
-st.markdown("""
-<style>
-.manage-jd-container {
-    padding: 2rem;
-    background: rgba(255, 255, 255, 0.96);
-    border-radius: 20px;
-    box-shadow: 0 10px 30px rgba(0,0,0,0.1);
-    animation: fadeSlideUp 0.7s ease-in-out;
-    margin-bottom: 2rem;
-}
-@keyframes fadeSlideUp {
-    0% { opacity: 0; transform: translateY(20px); }
-    100% { opacity: 1; transform: translateY(0); }
-}
-h3 {
-    color: #00cec9;
-    font-weight: 700;
-}
-.upload-box {
-    background: #f9f9f9;
-    padding: 1rem;
-    border-radius: 10px;
-    border: 1px dashed #ccc;
-}
-.select-box, .text-box {
-    background: #fff;
-    padding: 1rem;
-    border-radius: 10px;
-    box-shadow: 0 2px 6px rgba(0,0,0,0.05);
-}
-</style>
-""", unsafe_allow_html=True)
-
-# --- Header ---
-st.markdown('<div class="manage-jd-container">', unsafe_allow_html=True)
-st.markdown("### 📁 Job Description Manager")
-
-# --- JD Upload ---
-with st.container():
-    st.markdown('<div class="upload-box">', unsafe_allow_html=True)
-    st.markdown("#### 📤 Upload New JD (.txt)")
-    uploaded_jd = st.file_uploader("Select file", type="txt", key="upload_jd")
-    if uploaded_jd:
-        jd_path = os.path.join(jd_folder, uploaded_jd.name)
-        with open(jd_path, "wb") as f:
-            f.write(uploaded_jd.read())
-        st.success(f"✅ Uploaded: `{uploaded_jd.name}`")
-    st.markdown('</div>', unsafe_allow_html=True)
+jd_folder = JD_FOLDER
 
-# --- JD Listing & Viewer ---
-jd_files = [f for f in os.listdir(jd_folder) if f.endswith(".txt")]
 
-if jd_files:
-    st.markdown('<div class="select-box">', unsafe_allow_html=True)
-    selected_jd = st.selectbox("📄 Select JD to view or delete", jd_files)
-    st.markdown('</div>', unsafe_allow_html=True)
+def manage_jds_page():
+    """Upload, view, download and delete job description files."""
+    os.makedirs(jd_folder, exist_ok=True)
+    jd_catalog = get_jd_catalog()
+
+    # --- UI Styling ---
+    st.markdown("""
+    <style>
+    .manage-jd-container {
+        padding: 2rem;
+        background: rgba(255, 255, 255, 0.96);
+        border-radius: 20px;
+        box-shadow: 0 10px 30px rgba(0,0,0,0.1);
+        animation: fadeSlideUp 0.7s ease-in-out;
+        margin-bottom: 2rem;
+    }
+    @keyframes fadeSlideUp {
+        0% { opacity: 0; transform: translateY(20px); }
+        100% { opacity: 1; transform: translateY(0); }
+    }
+    h3 {
+        color: #00cec9;
+        font-weight: 700;
+    }
+    .upload-box {
+        background: #f9f9f9;
+        padding: 1rem;
+        border-radius: 10px;
+        border: 1px dashed #ccc;
+    }
+    .select-box, .text-box {
+        background: #fff;
+        padding: 1rem;
+        border-radius: 10px;
+        box-shadow: 0 2px 6px rgba(0,0,0,0.05);
+    }
+    </style>
+    """, unsafe_allow_html=True)
+
+    # --- Header ---
+    st.markdown('<div class="manage-jd-container">', unsafe_allow_html=True)
+    st.markdown("### 📁 Job Description Manager")
+
+    # --- JD Upload ---
+    with st.container():
+        st.markdown('<div class="upload-box">', unsafe_allow_html=True)
+        st.markdown("#### 📤 Upload New JD (.txt)")
+        uploaded_jd = st.file_uploader("Select file", type="txt", key="upload_jd")
+        if uploaded_jd:
+            file_name = os.path.basename(uploaded_jd.name)
+            jd_bytes = uploaded_jd.getvalue()
+            existing = jd_catalog.get(file_name)
+            # Streamlit keeps the uploaded file across reruns; only write it once
+            if existing is None or existing["content_hash"] != hash_text_bytes(jd_bytes):
+                fd, tmp_path = tempfile.mkstemp(dir=jd_folder, suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(jd_bytes)
+                os.replace(tmp_path, os.path.join(jd_folder, file_name))
+                jd_catalog.upsert(file_name)
+            st.success(f"✅ Uploaded: `{file_name}`")
+        st.markdown('</div>', unsafe_allow_html=True)
 
-    if selected_jd:
-        with open(os.path.join(jd_folder, selected_jd), "r", encoding="utf-8") as f:
-            jd_content = f.read()
+    # --- Bulk JD Import ---
+    with st.expander("📦 Bulk Import (CSV, JSONL or ZIP)"):
+        st.caption("CSV/JSONL need a description column (`description`, `text`, `jd`, ...) and optionally a `title` column. "
+                   "ZIP files may contain `.txt` JDs or CSV/JSONL files. Identical JDs are skipped.")
+        bulk_file = st.file_uploader("Select file", type=["csv", "jsonl", "json", "zip"], key="bulk_upload_jd")
+        if bulk_file and st.button("📥 Import JDs"):
+            from bulk_import_jds import import_records, read_records, ImportFormatError
+            from screener import jd_skill_keywords, encode_jds
+            progress_bar = st.progress(0.0, text="Writing JDs...")
 
-        st.markdown('<div class="text-box">', unsafe_allow_html=True)
-        st.markdown("#### 📜 Job Description Content")
-        st.text_area("View or Copy", jd_content, height=300, key="jd_content", disabled=True)
+            def show_progress(stage, done, total):
+                if stage == "features" and total:
+                    progress_bar.progress(done / total, text=f"Precomputing keywords and embeddings: {done}/{total}")
 
-        col1, col2 = st.columns(2)
-        with col1:
-            if st.button(f"🗑️ Delete `{selected_jd}`"):
-                os.remove(os.path.join(jd_folder, selected_jd))
-                st.success(f"🗑️ Deleted: `{selected_jd}`")
-                st.experimental_rerun()
-        with col2:
-            st.download_button("⬇️ Download JD", data=jd_content, file_name=selected_jd, mime="text/plain")
+            try:
+                summary = import_records(read_records(bulk_file.name, bulk_file.getvalue()), jd_catalog,
+                                         extract_skills=jd_skill_keywords, encode_batch=encode_jds, progress=show_progress)
+            except ImportFormatError as e:
+                progress_bar.empty()
+                st.error(f"❌ {e}")
+            else:
+                progress_bar.progress(1.0, text="Done")
+                st.success(f"✅ Imported {summary['imported']} JDs in {summary['total_seconds']:.1f}s "
+                           f"({summary['duplicates']} duplicates skipped, {summary['invalid']} empty rows ignored)")
 
+    # --- JD Listing & Viewer ---
+    jd_catalog.refresh()
+    jd_files = [entry["file_name"] for entry in jd_catalog.list_jds()]
+
+    if jd_files:
+        st.markdown('<div class="select-box">', unsafe_allow_html=True)
+        selected_jd = st.selectbox("📄 Select JD to view or delete", jd_files)
         st.markdown('</div>', unsafe_allow_html=True)
-else:
-    st.warning("📂 No JD files uploaded yet.")
 
-st.markdown('</div>', unsafe_allow_html=True)
+        if selected_jd:
+            jd_content = jd_catalog.get_text(selected_jd) or ""
+            jd_entry = jd_catalog.get(selected_jd)
+
+            st.markdown('<div class="text-box">', unsafe_allow_html=True)
+            st.markdown("#### 📜 Job Description Content")
+            st.caption(f"{jd_entry['title']} · {jd_entry['size'] / 1024:.1f} KB · hash `{jd_entry['content_hash'][:12]}`")
+            st.text_area("View or Copy", jd_content, height=300, key="jd_content", disabled=True)
+
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button(f"🗑️ Delete `{selected_jd}`"):
+                    jd_catalog.remove(selected_jd)
+                    st.success(f"🗑️ Deleted: `{selected_jd}`")
+                    st.rerun()
+            with col2:
+                st.download_button("⬇️ Download JD", data=jd_content, file_name=selected_jd, mime="text/plain")
+
+            st.markdown('</div>', unsafe_allow_html=True)
+    else:
+        st.warning("📂 No JD files uploaded yet.")
+
+    st.markdown('</div>', unsafe_allow_html=True)
@@ -0,0 +1,295 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import time
+from screener import (
+    model, ml_model, jd_skill_keywords, encode_jd, encode_jds, extract_text_from_pdf,
+    extract_years_of_experience, extract_email, extract_name
+)
+from search_index import hash_bytes
+from jd_catalog import get_jd_catalog
+from score_weights import blend_scores
+
+# --- Configuration ---
+PREDICT_CHUNK_ROWS = 8192 # Feature rows per ml_model.predict call (bounds memory for very large grids)
+
+
+# --- Matrix Scoring ---
+# Same scoring as semantic_score() in screener.py, but for every resume x JD pair
+# at once: each text is embedded once, cosine similarities come from a single
+# product of row-normalized embedding matrices, keyword overlaps from a product of
+# skill bit-matrices, and the ML model scores all pairs in batched predict calls.
+
+def normalize_rows(matrix):
+    matrix = np.asarray(matrix, dtype=np.float64)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def similarity_matrix(resume_embeds, jd_embeds):
+    """Cosine similarity of every resume (rows) with every JD (columns), clipped to [0, 1]."""
+    return np.clip(normalize_rows(resume_embeds) @ normalize_rows(jd_embeds).T, 0, 1)
+
+def skill_bitsets(skill_sets, vocabulary):
+    """One boolean row per skill set over a shared vocabulary (skill -> column)."""
+    bits = np.zeros((len(skill_sets), len(vocabulary)), dtype=bool)
+    for row, skills in enumerate(skill_sets):
+        columns = [vocabulary[skill] for skill in skills if skill in vocabulary]
+        bits[row, columns] = True
+    return bits
+
+def overlap_matrix(resume_skills, jd_skills):
+    """
+    Number of shared keywords for every resume x JD pair, and each JD's keyword count.
+    Only JD keywords can overlap, so the vocabulary is the union of the JD sets.
+    """
+    vocabulary = {skill: column for column, skill in enumerate(sorted(set().union(*jd_skills)))} if jd_skills else {}
+    resume_bits = skill_bitsets(resume_skills, vocabulary).astype(np.float32)
+    jd_bits = skill_bitsets(jd_skills, vocabulary).astype(np.float32)
+    overlap = (resume_bits @ jd_bits.T).astype(np.int64)
+    return overlap, jd_bits.sum(axis=1).astype(np.int64)
+
+def predict_matrix(predictor, resume_embeds, jd_embeds, years_exp, overlap):
+    """ML model scores for every pair, with the same feature layout as semantic_score()."""
+    resume_embeds = np.asarray(resume_embeds, dtype=np.float64)
+    jd_embeds = np.asarray(jd_embeds, dtype=np.float64)
+    n_resumes, n_jds = overlap.shape
+    predictions = np.empty(n_resumes * n_jds)
+    for start in range(0, n_resumes * n_jds, PREDICT_CHUNK_ROWS):
+        pairs = np.arange(start, min(start + PREDICT_CHUNK_ROWS, n_resumes * n_jds))
+        rows, columns = pairs // n_jds, pairs % n_jds
+        features = np.hstack([
+            jd_embeds[columns], resume_embeds[rows],
+            years_exp[rows, None], overlap[rows, columns, None].astype(np.float64)
+        ])
+        predictions[start:start + len(pairs)] = predictor.predict(features)
+    return predictions.reshape(n_resumes, n_jds)
+
+def score_components(resume_skills, jd_skills, years_exp, resume_embeds=None, jd_embeds=None, predictor=None):
+    """
+    Returns (predictions, JD coverage, similarities, years) with the first three
+    as unrounded resume x JD arrays and years per resume. Without embeddings or a
+    predictor the predictions are NaN and the similarities zero.
+    """
+    years_exp = np.array([float(years or 0.0) for years in years_exp])
+    overlap, jd_sizes = overlap_matrix(resume_skills, jd_skills)
+    coverage = np.divide(overlap, jd_sizes, out=np.zeros(overlap.shape), where=jd_sizes > 0)
+
+    if predictor is None or resume_embeds is None or jd_embeds is None:
+        return np.full(overlap.shape, np.nan), coverage, np.zeros(overlap.shape), years_exp
+
+    similarity = similarity_matrix(resume_embeds, jd_embeds)
+    predicted = predict_matrix(predictor, resume_embeds, jd_embeds, years_exp, overlap)
+    return predicted, coverage, similarity, years_exp
+
+def score_matrix(resume_skills, jd_skills, years_exp, resume_embeds=None, jd_embeds=None, predictor=None):
+    """
+    Returns (scores, semantic similarities) as resume x JD arrays.
+    Without embeddings or a predictor it falls back to the keyword + experience
+    score that semantic_score() uses when the ML models are not loaded.
+    """
+    predicted, coverage, similarity, years_exp = score_components(
+        resume_skills, jd_skills, years_exp, resume_embeds, jd_embeds, predictor
+    )
+    return blend_scores(predicted, coverage, similarity, years_exp[:, None]), np.round(similarity, 2)
+
+def best_roles(scores, jd_titles):
+    """Best and runner-up role per resume as (title, score) pairs."""
+    order = np.argsort(-scores, axis=1, kind="stable")
+    best = [(jd_titles[row[0]], float(scores[i, row[0]])) for i, row in enumerate(order)]
+    runner_up = [(jd_titles[row[1]], float(scores[i, row[1]])) if len(row) > 1 else (None, None) for i, row in enumerate(order)]
+    return best, runner_up
+
+
+# --- Matrix Screening Page ---
+def matrix_screening_page():
+    """Screens many resumes against many JDs at once and recommends a best role per candidate."""
+    st.title("🧮 Matrix Screening – Many Resumes × Many Roles")
+    st.caption("Scores every uploaded resume against every selected job description in one pass and recommends the best-fitting role per candidate.")
+
+    jd_catalog = get_jd_catalog()
+    jd_catalog.refresh()
+    jd_entries = {entry["title"]: entry["file_name"] for entry in jd_catalog.list_jds()}
+    if not jd_entries:
+        st.warning("📂 No job descriptions found. Add some under **📁 Manage JDs** first.")
+        return
+
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        selected_titles = st.multiselect("📌 **Job Roles to Screen Against**", list(jd_entries.keys()), default=list(jd_entries.keys()))
+    with col2:
+        cutoff = st.slider("📈 **Minimum Score Cutoff (%)**", 0, 100, st.session_state.get('screening_cutoff_score', 75))
+
+    resume_files = st.file_uploader("📄 **Upload Resumes (PDF)**", type="pdf", accept_multiple_files=True, key="matrix_resumes")
+    if not selected_titles or not resume_files:
+        st.info("Select at least one role and upload resumes to build the score matrix.")
+        return
+
+    # Sliders rerun the page; only recompute when the resumes or roles change
+    run_key = (tuple(hash_bytes(file.getvalue()) for file in resume_files),
+               tuple(jd_catalog.get(jd_entries[title])["content_hash"] for title in selected_titles))
+    cached = st.session_state.get('matrix_results')
+    if cached is None or cached["key"] != run_key:
+        if not st.button(f"🚀 Screen {len(resume_files)} resumes × {len(selected_titles)} roles"):
+            return
+
+        progress_bar = st.progress(0.0, text="Reading resumes...")
+        candidates = []
+        for i, file in enumerate(resume_files):
+            text = extract_text_from_pdf(file)
+            progress_bar.progress((i + 1) / len(resume_files) * 0.7, text=f"Reading {file.name} ({i+1}/{len(resume_files)})")
+            if text.startswith("[ERROR]"):
+                st.error(f"Failed to process {file.name}: {text.replace('[ERROR] ', '')}")
+                continue
+            candidates.append({
+                "File Name": file.name,
+                "Candidate Name": extract_name(text) or file.name.replace('.pdf', '').replace('_', ' ').title(),
+                "Email": extract_email(text) or "Not Found",
+                "Years Experience": extract_years_of_experience(text),
+                "skills": jd_skill_keywords(text), # Same keyword extraction semantic_score() applies to resumes
+                "text": text,
+            })
+        if not candidates:
+            progress_bar.empty()
+            return
+
+        progress_bar.progress(0.8, text="Embedding resumes and roles...")
+        jd_features = [jd_catalog.features(jd_entries[title], jd_skill_keywords, encode_jd if model is not None else None)
+                       for title in selected_titles]
+        jd_skills = [skills or frozenset() for skills, _ in jd_features]
+        resume_embeds = jd_embeds = None
+        if model is not None and ml_model is not None and all(embed is not None for _, embed in jd_features):
+            resume_embeds = encode_jds([candidate["text"] for candidate in candidates])
+            jd_embeds = np.vstack([embed for _, embed in jd_features])
+        else:
+            st.warning("ML models not loaded. Scores are based on keyword overlap and experience only.")
+
+        progress_bar.progress(0.9, text="Scoring every pair...")
+        scores, similarity = score_matrix(
+            [candidate["skills"] for candidate in candidates], jd_skills,
+            [candidate["Years Experience"] for candidate in candidates],
+            resume_embeds, jd_embeds, ml_model
+        )
+        progress_bar.empty()
+        cached = {"key": run_key, "candidates": candidates, "titles": list(selected_titles), "scores": scores, "similarity": similarity}
+        st.session_state['matrix_results'] = cached
+
+    candidates, titles, scores, similarity = cached["candidates"], cached["titles"], cached["scores"], cached["similarity"]
+
+    # --- Best Role per Candidate ---
+    st.markdown("## 🎯 Best Role per Candidate")
+    best, runner_up = best_roles(scores, titles)
+    best_column = np.argmax(scores, axis=1)
+    recommendations = pd.DataFrame([{
+        "Candidate Name": candidate["Candidate Name"],
+        "File Name": candidate["File Name"],
+        "Email": candidate["Email"],
+        "Years Experience": candidate["Years Experience"],
+        "Best Role": best[i][0],
+        "Best Score (%)": best[i][1],
+        "Semantic Similarity": similarity[i, best_column[i]],
+        "Runner-up Role": runner_up[i][0],
+        "Runner-up Score (%)": runner_up[i][1],
+        "Meets Cutoff": "✅" if best[i][1] >= cutoff else "❌",
+    } for i, candidate in enumerate(candidates)]).sort_values(by="Best Score (%)", ascending=False).reset_index(drop=True)
+    st.dataframe(recommendations, use_container_width=True)
+
+    # --- Score Matrix ---
+    st.markdown("## 🧮 Score Matrix (Resume × Role)")
+    grid = pd.DataFrame(scores, columns=titles, index=[candidate["Candidate Name"] for candidate in candidates])
+    grid.index.name = "Candidate Name"
+    st.dataframe(grid.style.background_gradient(cmap="Greens", axis=None).format("{:.1f}"), use_container_width=True)
+
+    role_summary = pd.DataFrame({
+        "Role": titles,
+        "Candidates ≥ Cutoff": (scores >= cutoff).sum(axis=0),
+        "Best Fit For": [sum(1 for title, _ in best if title == role) for role in titles],
+        "Top Score (%)": scores.max(axis=0),
+    }).sort_values(by="Candidates ≥ Cutoff", ascending=False).reset_index(drop=True)
+    st.markdown("## 📋 Roles Overview")
+    st.dataframe(role_summary, use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("⬇️ Download Score Matrix (CSV)", data=grid.to_csv(), file_name="score_matrix.csv", mime="text/csv")
+    with col2:
+        st.download_button("⬇️ Download Recommendations (CSV)", data=recommendations.to_csv(index=False), file_name="best_roles.csv", mime="text/csv")
+
+
+# --- Find Roles Page (reverse matching) ---
+def rank_roles(resume_text, years_exp, jd_catalog):
+    """
+    Scores one resume against every JD in the catalog in a single vectorized pass,
+    using the catalog's cached skill sets and embeddings. Returns a DataFrame sorted
+    by score with matched and missing skills per role.
+    """
+    use_embeddings = model is not None and ml_model is not None
+    entries, jd_skills, jd_embeds = jd_catalog.feature_matrix(jd_skill_keywords, encode_jds if use_embeddings else None)
+    if not entries:
+        return pd.DataFrame()
+    resume_skills = jd_skill_keywords(resume_text)
+    resume_embed = encode_jds([resume_text]) if use_embeddings and jd_embeds is not None else None
+    scores, similarity = score_matrix([resume_skills], jd_skills, [years_exp], resume_embed, jd_embeds,
+                                      ml_model if resume_embed is not None else None)
+    ranked = pd.DataFrame({
+        "Role": [entry["title"] for entry in entries],
+        "Score (%)": scores[0],
+        "Semantic Similarity": similarity[0],
+        "Matched Skills": [", ".join(sorted(resume_skills & skills)) for skills in jd_skills],
+        "Missing Skills": [", ".join(sorted(skills - resume_skills)) for skills in jd_skills],
+        "Skill Coverage (%)": [round(len(resume_skills & skills) / len(skills) * 100, 1) if skills else 0.0 for skills in jd_skills],
+        "JD File": [entry["file_name"] for entry in entries],
+    })
+    return ranked.sort_values(by="Score (%)", ascending=False, kind="stable").reset_index(drop=True)
+
+def find_roles_page():
+    """Ranks every open JD for a single uploaded resume."""
+    st.title("🎯 Find Roles for a Candidate")
+    st.caption("Upload one resume to see which of the open roles it fits best, with matched and missing skills for each.")
+
+    jd_catalog = get_jd_catalog()
+    jd_catalog.refresh()
+    if not len(jd_catalog):
+        st.warning("📂 No job descriptions found. Add some under **📁 Manage JDs** first.")
+        return
+
+    resume_file = st.file_uploader("📄 **Upload Resume (PDF)**", type="pdf", key="find_roles_resume")
+    if not resume_file:
+        st.info(f"{len(jd_catalog)} open roles will be ranked for the uploaded resume.")
+        return
+
+    # Reruns (e.g. the slider below) reuse the ranking until the resume or the catalog changes
+    run_key = (hash_bytes(resume_file.getvalue()), jd_catalog.version)
+    cached = st.session_state.get('find_roles_results')
+    if cached is None or cached["key"] != run_key:
+        text = extract_text_from_pdf(resume_file)
+        if text.startswith("[ERROR]"):
+            st.error(f"Failed to process {resume_file.name}: {text.replace('[ERROR] ', '')}")
+            return
+        start = time.perf_counter()
+        with st.spinner("Ranking roles..."):
+            years_exp = extract_years_of_experience(text)
+            ranked = rank_roles(text, years_exp, jd_catalog)
+        cached = {
+            "key": run_key,
+            "candidate": extract_name(text) or resume_file.name.replace('.pdf', '').replace('_', ' ').title(),
+            "years_exp": years_exp,
+            "ranked": ranked,
+            "seconds": time.perf_counter() - start,
+        }
+        st.session_state['find_roles_results'] = cached
+
+    ranked = cached["ranked"]
+    st.markdown(f"### {cached['candidate']}")
+    st.caption(f"{cached['years_exp']:.1f} years experience · ranked {len(ranked)} roles in {cached['seconds']:.2f}s")
+    if model is None or ml_model is None:
+        st.warning("ML models not loaded. Scores are based on keyword overlap and experience only.")
+
+    top_n = st.slider("Roles to show", 1, max(1, len(ranked)), min(20, len(ranked)))
+    for i, role in ranked.head(3).iterrows():
+        st.markdown(f"**{i+1}. {role['Role']}** – {role['Score (%)']:.1f}% · {role['Skill Coverage (%)']:.0f}% skill coverage")
+        if role["Missing Skills"]:
+            st.caption(f"Missing: {role['Missing Skills']}")
+    st.dataframe(ranked.head(top_n).drop(columns=["JD File"]), use_container_width=True)
+    st.download_button("⬇️ Download Role Ranking (CSV)", data=ranked.to_csv(index=False),
+                       file_name=f"roles_for_{resume_file.name.replace('.pdf', '')}.csv", mime="text/csv")
@@ -0,0 +1,281 @@
+"""
+Model sidecar: one copy of the embedding model and the screening model per host.
+
+Several Streamlit replicas on one machine can share a single sidecar instead of
+each loading MiniLM and the RandomForest. Replicas connect over a Unix domain
+socket when SCREENERPRO_MODEL_SOCKET is set (see load_ml_model in screener.py)
+and fall back to in-process models whenever the sidecar cannot be reached.
+
+Frames are length-prefixed: an 8-byte header (JSON length, payload length), a
+JSON header, then a raw numpy payload, so a batch of texts or feature rows
+travels as one request and its embeddings/predictions as one binary reply.
+Embed requests from all replicas are micro-batched into shared forward passes.
+
+Usage:
+    python model_sidecar.py [--socket /tmp/screenerpro-models.sock] [--model-file ml_screening_model.pkl]
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+# --- Configuration ---
+SOCKET_ENV = "SCREENERPRO_MODEL_SOCKET"
+DEFAULT_SOCKET_PATH = "/tmp/screenerpro-models.sock"
+CONNECT_TIMEOUT_SECONDS = 2.0
+REQUEST_TIMEOUT_SECONDS = 120.0
+RETRY_SIDECAR_SECONDS = 30.0 # After a failure, use the in-process models this long before trying the sidecar again
+FRAME_HEADER = struct.Struct("!II")
+
+
+class SidecarUnavailable(ConnectionError):
+    """The sidecar could not be reached (not running, restarting, socket gone)."""
+
+
+class SidecarError(RuntimeError):
+    """The sidecar was reached but the model call itself failed."""
+
+
+# --- Framing ---
+def _recv_exact(sock, size):
+    chunks, remaining = [], size
+    while remaining:
+        chunk = sock.recv(min(remaining, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Connection closed mid-frame")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+def send_frame(sock, header, payload=b""):
+    header_bytes = json.dumps(header).encode("utf-8")
+    sock.sendall(FRAME_HEADER.pack(len(header_bytes), len(payload)) + header_bytes + payload)
+
+def recv_frame(sock):
+    header_size, payload_size = FRAME_HEADER.unpack(_recv_exact(sock, FRAME_HEADER.size))
+    header = json.loads(_recv_exact(sock, header_size))
+    return header, _recv_exact(sock, payload_size) if payload_size else b""
+
+def _array_frame(array):
+    array = np.ascontiguousarray(array)
+    return {"shape": list(array.shape), "dtype": str(array.dtype)}, array.tobytes()
+
+def _frame_array(header, payload):
+    return np.frombuffer(payload, dtype=header["dtype"]).reshape(header["shape"])
+
+
+# --- Server ---
+class _RequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        sidecar = self.server.sidecar
+        while True:
+            try:
+                header, payload = recv_frame(self.request)
+            except (ConnectionError, OSError, struct.error):
+                return
+            try:
+                op = header.get("op")
+                if op == "embed":
+                    reply, body = _array_frame(np.asarray(sidecar.embedder.encode(header["texts"]), dtype=np.float32))
+                elif op == "predict":
+                    reply, body = _array_frame(np.asarray(sidecar.ml_model.predict(_frame_array(header, payload)), dtype=np.float64))
+                elif op == "ping":
+                    reply, body = {"pid": os.getpid(), "started_at": sidecar.started_at, "metrics": sidecar.embedder.metrics()}, b""
+                else:
+                    raise ValueError(f"Unknown op {op!r}")
+                reply["ok"] = True
+            except Exception as e:
+                reply, body = {"ok": False, "error": f"{type(e).__name__}: {e}"}, b""
+            try:
+                send_frame(self.request, reply, body)
+            except OSError:
+                return
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ModelSidecar:
+    """Owns the models and serves them on a Unix socket until shutdown()."""
+
+    def __init__(self, model, ml_model, socket_path=DEFAULT_SOCKET_PATH):
+        from embedding_service import EmbeddingService
+        self.embedder = EmbeddingService(model)
+        self.ml_model = ml_model
+        self.socket_path = socket_path
+        self.started_at = time.time()
+        if os.path.exists(socket_path):
+            os.remove(socket_path) # Left over from a sidecar that didn't shut down cleanly
+        self.server = _UnixServer(socket_path, _RequestHandler)
+        self.server.sidecar = self
+        os.chmod(socket_path, 0o600)
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def shutdown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.embedder.shutdown()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+# --- Client ---
+class SidecarClient:
+    """One persistent connection per thread to the sidecar."""
+
+    def __init__(self, socket_path):
+        self.socket_path = socket_path
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(CONNECT_TIMEOUT_SECONDS)
+        try:
+            sock.connect(self.socket_path)
+        except OSError as e:
+            sock.close()
+            raise SidecarUnavailable(f"Model sidecar not reachable at {self.socket_path}: {e}") from None
+        sock.settimeout(REQUEST_TIMEOUT_SECONDS)
+        return sock
+
+    def request(self, header, payload=b""):
+        """Sends one frame and returns the reply, reconnecting once if a kept-alive connection went stale."""
+        for attempt in range(2):
+            sock = getattr(self._local, "sock", None)
+            if sock is None:
+                sock = self._local.sock = self._connect()
+            try:
+                send_frame(sock, header, payload)
+                reply, body = recv_frame(sock)
+                break
+            except (ConnectionError, OSError, struct.error) as e:
+                sock.close()
+                self._local.sock = None
+                if attempt:
+                    raise SidecarUnavailable(f"Model sidecar connection failed: {e}") from None
+        if not reply.get("ok"):
+            raise SidecarError(reply.get("error", "Unknown sidecar error"))
+        return reply, body
+
+    def ping(self):
+        return self.request({"op": "ping"})[0]
+
+    def embed(self, texts):
+        return _frame_array(*self.request({"op": "embed", "texts": list(texts)}))
+
+    def predict(self, features):
+        header, payload = _array_frame(np.asarray(features, dtype=np.float64))
+        header["op"] = "predict"
+        return _frame_array(*self.request(header, payload))
+
+
+class SidecarModels:
+    """
+    The sidecar's models behind the model.encode() / ml_model.predict() interfaces
+    the screener uses. If the sidecar is unreachable, calls go to in-process
+    models (loaded once, on first need, by `load_local`) and the sidecar is
+    tried again after RETRY_SIDECAR_SECONDS.
+    """
+
+    def __init__(self, client, load_local):
+        self.client = client
+        self.load_local = load_local
+        self.local_models = None
+        self.retry_at = 0.0
+        self.lock = threading.Lock()
+        self.embedder = _RemoteEmbedder(self)
+        self.predictor = _RemotePredictor(self)
+
+    def _local(self):
+        with self.lock:
+            if self.local_models is None:
+                self.local_models = self.load_local()
+            return self.local_models
+
+    def call(self, remote, local):
+        if time.monotonic() >= self.retry_at:
+            try:
+                return remote()
+            except SidecarUnavailable:
+                self.retry_at = time.monotonic() + RETRY_SIDECAR_SECONDS
+        return local(*self._local())
+
+
+class _RemoteEmbedder:
+    def __init__(self, models):
+        self.models = models
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        embeddings = self.models.call(
+            lambda: self.models.client.embed(texts),
+            lambda model, ml_model: np.asarray(model.encode(texts, batch_size=batch_size), dtype=np.float32)
+        )
+        return embeddings[0] if single else embeddings
+
+
+class _RemotePredictor:
+    def __init__(self, models):
+        self.models = models
+
+    def predict(self, features):
+        return self.models.call(
+            lambda: self.models.client.predict(features),
+            lambda model, ml_model: ml_model.predict(features)
+        )
+
+
+def connect_sidecar(load_local):
+    """
+    (embedding model, screening model) served by the sidecar, or None when
+    SCREENERPRO_MODEL_SOCKET is unset or nothing answers there.
+    """
+    socket_path = os.environ.get(SOCKET_ENV)
+    if not socket_path:
+        return None
+    client = SidecarClient(socket_path)
+    try:
+        client.ping()
+    except (SidecarUnavailable, SidecarError):
+        return None
+    models = SidecarModels(client, load_local)
+    return models.embedder, models.predictor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=os.environ.get(SOCKET_ENV, DEFAULT_SOCKET_PATH))
+    parser.add_argument("--model-file", default="ml_screening_model.pkl")
+    args = parser.parse_args()
+
+    import joblib
+    from sentence_transformers import SentenceTransformer
+    from concurrency import apply_torch_threads, configure_estimator
+    start = time.perf_counter()
+    apply_torch_threads()
+    sidecar = ModelSidecar(SentenceTransformer("all-MiniLM-L6-v2"), configure_estimator(joblib.load(args.model_file)), args.socket)
+    print(f"Models loaded in {time.perf_counter() - start:.1f}s; serving on {args.socket} "
+          f"(start replicas with {SOCKET_ENV}={args.socket})")
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0)) # Clean shutdown (and socket removal) under process managers
+    try:
+        sidecar.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sidecar.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,76 +1,113 @@
 import streamlit as st
-import json
-import os
+from notes_store import get_notes_store, NoteConflictError
 
-# --- Styling ---
-st.markdown("""
-<style>
-.notes-container {
-    padding: 2rem;
-    border-radius: 20px;
-    background: rgba(255, 255, 255, 0.9);
-    box-shadow: 0 8px 24px rgba(0, 0, 0, 0.06);
-    animation: fadeInSlide 0.6s ease-in-out;
-}
-.note-box {
-    background: #f0f9ff;
-    border-left: 4px solid #00cec9;
-    padding: 1rem;
-    margin-bottom: 1rem;
-    border-radius: 12px;
-    box-shadow: 0 4px 10px rgba(0, 0, 0, 0.03);
-}
-@keyframes fadeInSlide {
-    0% { opacity: 0; transform: translateY(20px); }
-    100% { opacity: 1; transform: translateY(0); }
-}
-</style>
-""", unsafe_allow_html=True)
+CANDIDATES_PER_PAGE = 50
 
-st.markdown('<div class="notes-container">', unsafe_allow_html=True)
-st.subheader("📝 Candidate Notes")
 
-notes_file = "notes.json"
-if os.path.exists(notes_file):
-    with open(notes_file, "r", encoding="utf-8") as f:
-        notes = json.load(f)
-else:
-    notes = {}
+def candidate_notes_page():
+    """Candidate notes: full-text search, candidate lookup and per-note editing."""
+    # --- Styling ---
+    st.markdown("""
+    <style>
+    .notes-container {
+        padding: 2rem;
+        border-radius: 20px;
+        background: rgba(255, 255, 255, 0.9);
+        box-shadow: 0 8px 24px rgba(0, 0, 0, 0.06);
+        animation: fadeInSlide 0.6s ease-in-out;
+    }
+    .note-box {
+        background: #f0f9ff;
+        border-left: 4px solid #00cec9;
+        padding: 1rem;
+        margin-bottom: 1rem;
+        border-radius: 12px;
+        box-shadow: 0 4px 10px rgba(0, 0, 0, 0.03);
+    }
+    @keyframes fadeInSlide {
+        0% { opacity: 0; transform: translateY(20px); }
+        100% { opacity: 1; transform: translateY(0); }
+    }
+    </style>
+    """, unsafe_allow_html=True)
 
-candidates = sorted(notes.keys())
-selected = st.selectbox("📄 Select Candidate", candidates)
+    st.markdown('<div class="notes-container">', unsafe_allow_html=True)
+    st.subheader("📝 Candidate Notes")
 
-if selected:
-    st.markdown(f"#### 🗒️ Notes for {selected}")
-    st.markdown('<div class="note-box">', unsafe_allow_html=True)
-    text = st.text_area("Edit Note", value=notes[selected], height=150)
-    col1, col2 = st.columns(2)
-    if col1.button("💾 Save Note"):
-        notes[selected] = text
-        with open(notes_file, "w", encoding="utf-8") as f:
-            json.dump(notes, f, indent=2)
-        st.success("✅ Note updated.")
+    notes_store = get_notes_store()
+    author = st.session_state.get("username")
 
-    if col2.button("🗑️ Delete Note"):
-        notes.pop(selected, None)
-        with open(notes_file, "w", encoding="utf-8") as f:
-            json.dump(notes, f, indent=2)
-        st.warning("🗑️ Note deleted.")
-        st.rerun()
-    st.markdown('</div>', unsafe_allow_html=True)
+    # --- Full-text search over note bodies ---
+    note_query = st.text_input("🔎 Search all notes", placeholder="e.g. strong sql, follow up")
+    if note_query.strip():
+        matches = notes_store.search(note_query, limit=50)
+        st.caption(f"{len(matches)} matching note(s){' (showing first 50)' if len(matches) == 50 else ''}")
+        for match in matches:
+            st.markdown(
+                f"**{match['candidate']}** · _{match['author'] or 'unknown'} · {match['updated_at']}_  \n{match['snippet']}"
+            )
+        st.divider()
+
+    # --- Candidate lookup (typeahead + paging) ---
+    name_prefix = st.text_input("👤 Find candidate", placeholder="Start typing a name...")
+    total_candidates = notes_store.count_candidates(name_prefix)
+    total_pages = max(1, -(-total_candidates // CANDIDATES_PER_PAGE))
+    page = 1
+    if total_pages > 1:
+        page = st.number_input(f"Page (of {total_pages})", min_value=1, max_value=total_pages, value=1, step=1)
+    candidates = notes_store.list_candidates(name_prefix, limit=CANDIDATES_PER_PAGE, offset=(page - 1) * CANDIDATES_PER_PAGE)
+    st.caption(f"{total_candidates} candidate(s) with notes")
+
+    selected = st.selectbox(
+        "📄 Select Candidate",
+        [c["candidate"] for c in candidates],
+        format_func=lambda name: f"{name} ({next(c['note_count'] for c in candidates if c['candidate'] == name)})",
+    )
+
+    if selected:
+        st.markdown(f"#### 🗒️ Notes for {selected}")
+        for note in notes_store.notes_for(selected):
+            note_id = note["id"]
+            # Remember the version this session started editing so a concurrent save is detected, not overwritten
+            version_key = f"note_version_{note_id}"
+            st.session_state.setdefault(version_key, note["version"])
 
-st.divider()
-st.markdown("### ➕ Add New Note")
-new_name = st.text_input("👤 Candidate Name")
-new_note = st.text_area("📝 Note", height=100)
-if st.button("➕ Save New Note"):
-    if new_name.strip():
-        notes[new_name.strip()] = new_note.strip()
-        with open(notes_file, "w", encoding="utf-8") as f:
-            json.dump(notes, f, indent=2)
-        st.success(f"✅ Note added for {new_name.strip()}")
-        st.rerun()
-    else:
-        st.error("❌ Candidate name cannot be empty.")
+            st.markdown('<div class="note-box">', unsafe_allow_html=True)
+            st.caption(f"✍️ {note['author'] or 'unknown'} · created {note['created_at']} · updated {note['updated_at']}")
+            text = st.text_area("Edit Note", value=note["body"], height=150, key=f"note_body_{note_id}")
+            col1, col2 = st.columns(2)
+            if col1.button("💾 Save Note", key=f"save_note_{note_id}"):
+                try:
+                    st.session_state[version_key] = notes_store.update_note(
+                        note_id, text, st.session_state[version_key], author=author
+                    )
+                    st.success("✅ Note updated.")
+                except NoteConflictError as e:
+                    st.session_state.pop(version_key, None)
+                    st.session_state.pop(f"note_body_{note_id}", None)
+                    st.error(f"⚠️ {e}")
 
-st.markdown('</div>', unsafe_allow_html=True)
+            if col2.button("🗑️ Delete Note", key=f"delete_note_{note_id}"):
+                try:
+                    notes_store.delete_note(note_id, st.session_state[version_key])
+                    st.warning("🗑️ Note deleted.")
+                except NoteConflictError as e:
+                    st.error(f"⚠️ {e}")
+                st.session_state.pop(version_key, None)
+                st.session_state.pop(f"note_body_{note_id}", None)
+                st.rerun()
+            st.markdown('</div>', unsafe_allow_html=True)
+
+    st.divider()
+    st.markdown("### ➕ Add New Note")
+    new_name = st.text_input("👤 Candidate Name", value=selected or "")
+    new_note = st.text_area("📝 Note", height=100)
+    if st.button("➕ Save New Note"):
+        if new_name.strip():
+            notes_store.add_note(new_name.strip(), new_note.strip(), author=author)
+            st.success(f"✅ Note added for {new_name.strip()}")
+            st.rerun()
+        else:
+            st.error("❌ Candidate name cannot be empty.")
+
+    st.markdown('</div>', unsafe_allow_html=True)
@@ -0,0 +1,198 @@
+import streamlit as st
+import sqlite3
+import threading
+import json
+import os
+from datetime import datetime
+
+# --- Configuration ---
+NOTES_DB_FILE = "notes.db"
+LEGACY_NOTES_FILE = "notes.json"
+BUSY_TIMEOUT_MS = 5000
+
+
+class NoteConflictError(Exception):
+    """Raised when a note was changed or deleted by someone else since it was loaded."""
+
+
+class NotesStore:
+    """
+    Candidate notes in SQLite (WAL mode): one row per note with author and
+    timestamps, an FTS5 index over note bodies and a NOCASE index on candidate
+    names for prefix lookups. Every save touches a single row, and updates use
+    a version column so concurrent editors cannot silently overwrite each other.
+    """
+
+    def __init__(self, db_path=NOTES_DB_FILE, legacy_path=LEGACY_NOTES_FILE):
+        self.db_path = db_path
+        self._local = threading.local()
+        self.has_fts = True
+        conn = self._conn()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS notes (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    candidate TEXT NOT NULL COLLATE NOCASE,
+                    body TEXT NOT NULL,
+                    author TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    version INTEGER NOT NULL DEFAULT 1
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_notes_candidate ON notes(candidate, updated_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            try:
+                conn.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts
+                    USING fts5(body, candidate, content='notes', content_rowid='id')""")
+                conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS notes_ai AFTER INSERT ON notes BEGIN
+                        INSERT INTO notes_fts(rowid, body, candidate) VALUES (new.id, new.body, new.candidate);
+                    END""")
+                conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS notes_ad AFTER DELETE ON notes BEGIN
+                        INSERT INTO notes_fts(notes_fts, rowid, body, candidate) VALUES ('delete', old.id, old.body, old.candidate);
+                    END""")
+                conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS notes_au AFTER UPDATE ON notes BEGIN
+                        INSERT INTO notes_fts(notes_fts, rowid, body, candidate) VALUES ('delete', old.id, old.body, old.candidate);
+                        INSERT INTO notes_fts(rowid, body, candidate) VALUES (new.id, new.body, new.candidate);
+                    END""")
+            except sqlite3.OperationalError:
+                # SQLite built without FTS5: fall back to LIKE scans for note search
+                self.has_fts = False
+        self._import_legacy(legacy_path)
+
+    def _conn(self):
+        """One connection per thread; WAL lets readers proceed while another session writes."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_MS / 1000)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+        return conn
+
+    def _import_legacy(self, legacy_path):
+        """
+        One-time import of the old notes.json ({candidate: note}). Completion is
+        recorded in the meta table, so deleting every note later doesn't bring
+        the legacy ones back.
+        """
+        if not legacy_path or not os.path.exists(legacy_path):
+            return
+        conn = self._conn()
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone():
+            return
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                legacy_notes = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = datetime.now().isoformat(timespec="seconds")
+        with conn:
+            # Claiming the marker first makes concurrent starts import once
+            claimed = conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('legacy_imported', ?)", (now,)).rowcount
+            # Stores that imported before the marker existed already hold the notes
+            if not claimed or conn.execute("SELECT 1 FROM notes LIMIT 1").fetchone():
+                return
+            conn.executemany(
+                "INSERT INTO notes (candidate, body, author, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                [(name, body, "imported", now, now) for name, body in legacy_notes.items() if str(name).strip()]
+            )
+
+    # --- Candidates ---
+    def count_candidates(self, prefix=""):
+        row = self._conn().execute(
+            "SELECT COUNT(DISTINCT candidate) FROM notes WHERE candidate LIKE ? ESCAPE '\\'",
+            (_like_prefix(prefix),)
+        ).fetchone()
+        return row[0]
+
+    def list_candidates(self, prefix="", limit=50, offset=0):
+        """Candidate names starting with `prefix` (case-insensitive), one page at a time."""
+        rows = self._conn().execute(
+            """SELECT candidate, COUNT(*) AS note_count, MAX(updated_at) AS last_updated
+               FROM notes WHERE candidate LIKE ? ESCAPE '\\'
+               GROUP BY candidate ORDER BY candidate LIMIT ? OFFSET ?""",
+            (_like_prefix(prefix), limit, offset)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    # --- Notes ---
+    def notes_for(self, candidate):
+        rows = self._conn().execute(
+            "SELECT * FROM notes WHERE candidate = ? ORDER BY updated_at DESC, id DESC", (candidate,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def add_note(self, candidate, body, author=None):
+        """Inserts one note and returns its id."""
+        now = datetime.now().isoformat(timespec="seconds")
+        conn = self._conn()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO notes (candidate, body, author, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (candidate.strip(), body, author, now, now)
+            )
+        return cursor.lastrowid
+
+    def update_note(self, note_id, body, expected_version, author=None):
+        """
+        Updates one note if nobody else changed it since `expected_version` was read.
+        Raises NoteConflictError otherwise. Returns the new version.
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        conn = self._conn()
+        with conn:
+            cursor = conn.execute(
+                """UPDATE notes SET body = ?, author = COALESCE(?, author), updated_at = ?, version = version + 1
+                   WHERE id = ? AND version = ?""",
+                (body, author, now, note_id, expected_version)
+            )
+        if cursor.rowcount == 0:
+            raise NoteConflictError("This note was changed or deleted by someone else. Reload to see the latest version.")
+        return expected_version + 1
+
+    def delete_note(self, note_id, expected_version=None):
+        conn = self._conn()
+        with conn:
+            if expected_version is None:
+                cursor = conn.execute("DELETE FROM notes WHERE id = ?", (note_id,))
+            else:
+                cursor = conn.execute("DELETE FROM notes WHERE id = ? AND version = ?", (note_id, expected_version))
+        if cursor.rowcount == 0:
+            raise NoteConflictError("This note was changed or deleted by someone else. Reload to see the latest version.")
+
+    def search(self, query, limit=50):
+        """Full-text search over note bodies (and candidate names). Returns notes with a highlighted snippet."""
+        conn = self._conn()
+        if self.has_fts:
+            fts_query = " ".join('"' + term.replace('"', '""') + '"*' for term in query.split())
+            if not fts_query:
+                return []
+            rows = conn.execute(
+                """SELECT notes.*, snippet(notes_fts, 0, '**', '**', ' … ', 12) AS snippet
+                   FROM notes_fts JOIN notes ON notes.id = notes_fts.rowid
+                   WHERE notes_fts MATCH ? ORDER BY bm25(notes_fts) LIMIT ?""",
+                (fts_query, limit)
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT notes.*, substr(body, 1, 120) AS snippet FROM notes WHERE body LIKE ? ORDER BY updated_at DESC LIMIT ?",
+                (f"%{query}%", limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def _like_prefix(prefix):
+    escaped = prefix.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+@st.cache_resource
+def get_notes_store():
+    """Process-wide NotesStore shared by every session."""
+    return NotesStore()
@@ -0,0 +1,97 @@
+import streamlit as st
+import importlib
+import sys
+import threading
+import time
+
+# --- Page Registry ---
+# Navigation label -> (module, render function). A page module is imported the
+# first time its tab is opened and then stays in sys.modules, so later visits
+# call the already compiled function (and restarts load bytecode from
+# __pycache__) instead of re-reading and exec()-ing the source on every rerun.
+PAGES = {
+    "🧠 Resume Screener": ("screener", "resume_screener_page"),
+    "🧮 Matrix Screening": ("matrix_screener", "matrix_screening_page"),
+    "🎯 Find Roles": ("matrix_screener", "find_roles_page"),
+    "🗂️ Screening Jobs": ("jobs", "screening_jobs_page"),
+    "📁 Manage JDs": ("manage_jds", "manage_jds_page"),
+    "📊 Screening Analytics": ("analytics", "analytics_dashboard_page"),
+    "📤 Email Candidates": ("email_sender", "send_email_to_candidate"),
+    "🔍 Search Resumes": ("search", "search_resumes_page"),
+    "📝 Candidate Notes": ("notes", "candidate_notes_page"),
+}
+
+
+class PageTimings:
+    """Process-wide import and render times per page, for the Admin Tools view."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def _entry(self, label):
+        return self.stats.setdefault(label, {"import_ms": None, "renders": 0, "total_ms": 0.0, "last_ms": 0.0, "max_ms": 0.0})
+
+    def record_import(self, label, ms):
+        with self.lock:
+            self._entry(label)["import_ms"] = ms
+
+    def record_render(self, label, ms):
+        with self.lock:
+            entry = self._entry(label)
+            entry["renders"] += 1
+            entry["total_ms"] += ms
+            entry["last_ms"] = ms
+            entry["max_ms"] = max(entry["max_ms"], ms)
+
+    def snapshot(self):
+        with self.lock:
+            return [
+                {
+                    "Page": label,
+                    "Import (ms)": round(entry["import_ms"], 1) if entry["import_ms"] is not None else None,
+                    "Renders": entry["renders"],
+                    "Avg Render (ms)": round(entry["total_ms"] / entry["renders"], 1) if entry["renders"] else None,
+                    "Last Render (ms)": round(entry["last_ms"], 1),
+                    "Max Render (ms)": round(entry["max_ms"], 1),
+                }
+                for label, entry in self.stats.items()
+            ]
+
+
+@st.cache_resource
+def get_page_timings():
+    return PageTimings()
+
+
+def load_page(label):
+    """Returns the render function for a page, importing its module on first use."""
+    module_name, function_name = PAGES[label]
+    first_import = module_name not in sys.modules
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    if first_import:
+        get_page_timings().record_import(label, (time.perf_counter() - start) * 1000)
+    return getattr(module, function_name)
+
+
+def render_page(label):
+    """Renders a registered page, recording how long it took. Errors are shown inside the page area."""
+    module_name, _ = PAGES[label]
+    title = label.split(" ", 1)[1]
+    try:
+        page = load_page(label)
+    except (ImportError, AttributeError):
+        st.info(f"`{module_name}.py` not found or function not defined. Please create it.")
+        return
+    except Exception as e:
+        st.error(f"Error loading {title}: {e}")
+        return
+
+    start = time.perf_counter()
+    try:
+        page()
+    except Exception as e:
+        st.error(f"Error loading {title}: {e}")
+    finally:
+        get_page_timings().record_render(label, (time.perf_counter() - start) * 1000)
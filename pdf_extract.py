@@ -0,0 +1,20 @@
+import io
+import time
+import pdfplumber
+
+# Kept free of Streamlit and model imports: this module is what the PDF worker
+# processes import, so starting a worker stays cheap.
+
+
+def extract_pdf_text(data):
+    """
+    Text of a PDF given its bytes, or "[ERROR] ..." like extract_text_from_pdf in screener.py.
+    Returns (text, seconds spent) so the caller can report worker utilization.
+    """
+    start = time.perf_counter()
+    try:
+        with pdfplumber.open(io.BytesIO(data)) as pdf:
+            text = ''.join(page.extract_text() or '' for page in pdf.pages)
+    except Exception as e:
+        text = f"[ERROR] {str(e)}"
+    return text, time.perf_counter() - start
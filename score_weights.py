@@ -0,0 +1,94 @@
+import streamlit as st
+import numpy as np
+
+# --- Configuration ---
+# The blend semantic_score() has always used: 0.6 model + 0.1 JD coverage + 0.3 similarity, +5 for
+# similarity above 0.7 with 3+ years. Experience only enters through the bonus unless weighted.
+DEFAULT_WEIGHTS = {
+    "model": 0.6,
+    "coverage": 0.1,
+    "similarity": 0.3,
+    "experience": 0.0,
+    "bonus_points": 5.0,
+    "bonus_min_similarity": 0.7,
+    "bonus_min_years": 3.0,
+}
+EXPERIENCE_FULL_YEARS = 6.0 # Experience component reaches 100 here (the no-model score's 30-point cap)
+
+# Per-candidate score components kept in every screening result
+MODEL_COLUMN = "Model Prediction"       # Forest prediction, NaN without the ML model (or for cascade-pruned resumes)
+COVERAGE_COLUMN = "JD Coverage"        # Share of JD keywords matched (0-1)
+SIMILARITY_COLUMN = "Similarity (Raw)"  # Unrounded like the coverage, so re-blending with the default weights gives the same score
+BONUS_COLUMN = "Bonus"
+COMPONENT_COLUMNS = [MODEL_COLUMN, COVERAGE_COLUMN, SIMILARITY_COLUMN, BONUS_COLUMN]
+
+
+def experience_component(years_exp):
+    return np.minimum(np.asarray(years_exp, dtype=np.float64) / EXPERIENCE_FULL_YEARS, 1.0) * 100
+
+def bonus_points(similarity, years_exp, weights=DEFAULT_WEIGHTS):
+    similarity, years_exp = np.asarray(similarity, dtype=np.float64), np.asarray(years_exp, dtype=np.float64)
+    return np.where((similarity > weights["bonus_min_similarity"]) & (years_exp >= weights["bonus_min_years"]), weights["bonus_points"], 0.0)
+
+def blend_scores(predicted, coverage, similarity, years_exp, weights=DEFAULT_WEIGHTS):
+    """
+    Blended score (0-100, 2 decimals) from score components; arrays of any
+    matching shape. `coverage` is the fraction of JD keywords matched. Where
+    there is no model prediction (NaN) the keyword + experience score used
+    without models applies instead, whatever the weights.
+    """
+    predicted = np.asarray(predicted, dtype=np.float64)
+    coverage = np.asarray(coverage, dtype=np.float64)
+    similarity = np.asarray(similarity, dtype=np.float64)
+    years_exp = np.asarray(years_exp, dtype=np.float64)
+    blended = predicted * weights["model"] + coverage * 100 * weights["coverage"] + similarity * 100 * weights["similarity"]
+    if weights["experience"]:
+        blended = blended + experience_component(years_exp) * weights["experience"]
+    blended = blended + bonus_points(similarity, years_exp, weights)
+    basic = np.minimum(coverage * 70 + np.minimum(years_exp * 5, 30), 100)
+    return np.round(np.where(np.isnan(predicted), basic, np.clip(blended, 0, 100)), 2)
+
+def components_record(predicted, coverage, similarity, years_exp):
+    """The component columns of one screening result."""
+    return {
+        MODEL_COLUMN: float(predicted),
+        COVERAGE_COLUMN: float(coverage),
+        SIMILARITY_COLUMN: float(similarity),
+        BONUS_COLUMN: 0.0 if np.isnan(predicted) else float(bonus_points(similarity, years_exp)),
+    }
+
+def reblend(df, weights):
+    """Recomputes "Score (%)" and "Bonus" of a results frame from its cached components (no model calls)."""
+    if not set(COMPONENT_COLUMNS).issubset(df.columns):
+        return df
+    df = df.copy()
+    years_exp = df["Years Experience"].to_numpy(dtype=np.float64)
+    df["Score (%)"] = blend_scores(
+        df[MODEL_COLUMN].to_numpy(dtype=np.float64), df[COVERAGE_COLUMN].to_numpy(dtype=np.float64),
+        df[SIMILARITY_COLUMN].to_numpy(dtype=np.float64), years_exp, weights
+    )
+    df[BONUS_COLUMN] = np.where(df[MODEL_COLUMN].isna(), 0.0, bonus_points(df[SIMILARITY_COLUMN], years_exp, weights))
+    return df
+
+
+# --- Controls ---
+def score_weight_controls():
+    """Sliders for the blend weights and the bonus rule; returns the weights dict."""
+    with st.expander("⚖️ Score Weights"):
+        st.caption("Re-rank instantly: scores are re-blended from each candidate's cached components, without re-running the AI model.")
+        weights = {
+            "model": st.slider("🤖 ML model prediction", 0.0, 1.0, DEFAULT_WEIGHTS["model"], 0.05, key="weight_model"),
+            "coverage": st.slider("🔑 JD keyword coverage", 0.0, 1.0, DEFAULT_WEIGHTS["coverage"], 0.05, key="weight_coverage"),
+            "similarity": st.slider("🧠 Semantic similarity", 0.0, 1.0, DEFAULT_WEIGHTS["similarity"], 0.05, key="weight_similarity"),
+            "experience": st.slider("💼 Experience", 0.0, 1.0, DEFAULT_WEIGHTS["experience"], 0.05, key="weight_experience",
+                                    help=f"Scaled so {EXPERIENCE_FULL_YEARS:.0f}+ years counts as 100."),
+            "bonus_points": st.slider("🎁 Bonus points", 0.0, 20.0, DEFAULT_WEIGHTS["bonus_points"], 1.0, key="weight_bonus_points"),
+            "bonus_min_similarity": st.slider("...when similarity is above", 0.0, 1.0, DEFAULT_WEIGHTS["bonus_min_similarity"], 0.05, key="weight_bonus_similarity"),
+            "bonus_min_years": st.slider("...and experience is at least (years)", 0.0, 15.0, DEFAULT_WEIGHTS["bonus_min_years"], 0.5, key="weight_bonus_years"),
+        }
+        if st.button("↩️ Reset Weights"):
+            for key in ("weight_model", "weight_coverage", "weight_similarity", "weight_experience",
+                        "weight_bonus_points", "weight_bonus_similarity", "weight_bonus_years"):
+                st.session_state.pop(key, None)
+            st.rerun()
+    return weights
@@ -7,13 +7,21 @@ import sklearn
 import joblib
 import numpy as np
 from datetime import datetime
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
 from sentence_transformers import SentenceTransformer
 import nltk
 import collections
+import heapq
+import time
 from sklearn.metrics.pairwise import cosine_similarity
 import urllib.parse # For encoding mailto links
+from charts import data_hash, render_score_bar_chart, render_wordcloud
+from search_index import get_resume_index, hash_bytes, hash_text
+from jd_catalog import get_jd_catalog
+from embedding_service import get_embedding_service
+from model_sidecar import connect_sidecar
+from concurrency import apply_torch_threads, configure_estimator
+from fair_share import get_fair_scheduler, format_queue_status
+from score_weights import DEFAULT_WEIGHTS, blend_scores, score_weight_controls, reblend
 
 # For Generative AI (Google Gemini Pro) - COMMENTED OUT AS PER USER REQUEST
 # import google.generativeai as genai
@@ -35,17 +43,29 @@ except LookupError:
     nltk.download('stopwords')
 
 # --- Load Embedding + ML Model ---
+def load_local_models():
+    """Loads the embedding model and the screening model into this process, sized to the CPU budget."""
+    apply_torch_threads()
+    model = SentenceTransformer("all-MiniLM-L6-v2")
+    ml_model = configure_estimator(joblib.load("ml_screening_model.pkl")) # Saved with n_jobs=-1
+    return model, ml_model
+
 @st.cache_resource
 def load_ml_model():
+    # With SCREENERPRO_MODEL_SOCKET set, replicas share the models of one sidecar process
+    # (model_sidecar.py); in-process models are loaded only if it can't be reached
+    sidecar_models = connect_sidecar(load_local_models)
+    if sidecar_models is not None:
+        return sidecar_models
     try:
-        model = SentenceTransformer("all-MiniLM-L6-v2")
-        ml_model = joblib.load("ml_screening_model.pkl")
-        return model, ml_model
+        return load_local_models()
     except Exception as e:
         st.error(f"❌ Error loading models: {e}. Please ensure 'ml_screening_model.pkl' is in the same directory.")
         return None, None
 
 model, ml_model = load_ml_model()
+# Every session's encode calls go through one micro-batching service thread instead of contending for the model
+embedder = get_embedding_service(model) if model is not None else None
 
 # --- Stop Words List (Using NLTK) ---
 NLTK_STOP_WORDS = set(nltk.corpus.stopwords.words('english'))
@@ -677,14 +697,30 @@ def generate_detailed_hr_assessment(candidate_name, score, years_exp, semantic_s
     return final_assessment
 
 
-def semantic_score(resume_text, jd_text, years_exp):
+def jd_skill_keywords(jd_text):
+    """Keyword set of a JD as used for model features and coverage (cleaned text, MASTER_SKILLS filter)."""
+    return extract_relevant_keywords(clean_text(jd_text), MASTER_SKILLS if MASTER_SKILLS else STOP_WORDS)
+
+def encode_jd(jd_text):
+    """Sentence embedding of a cleaned JD, or None when the embedding model is unavailable."""
+    return embedder.encode(clean_text(jd_text)) if model is not None else None
+
+def encode_jds(jd_texts, batch_size=64):
+    """Batched encode_jd for many JDs (bulk imports), or None when the embedding model is unavailable."""
+    return embedder.encode([clean_text(text) for text in jd_texts], batch_size=batch_size) if model is not None else None
+
+def semantic_score(resume_text, jd_text, years_exp, jd_embed=None, jd_words=None):
     """
     Calculates a semantic score using an ML model and provides additional details.
     Falls back to smart_score if the ML model is not loaded or prediction fails.
     Applies STOP_WORDS filtering for keyword analysis (internally, not for display).
+    `jd_embed` / `jd_words` take precomputed JD features (e.g. from the JD catalog)
+    so a batch does not re-encode the same JD for every resume.
     """
     jd_clean = clean_text(jd_text)
     resume_clean = clean_text(resume_text)
+    if jd_words is None:
+        jd_words = extract_relevant_keywords(jd_clean, MASTER_SKILLS if MASTER_SKILLS else STOP_WORDS)
 
     score = 0.0
     feedback = "Initial assessment." # This will be overwritten by the generate_concise_ai_suggestion function
@@ -695,7 +731,6 @@ def semantic_score(resume_text, jd_text, years_exp):
         # Simplified fallback for score and feedback
         # Use the new extraction logic for fallback as well
         resume_words = extract_relevant_keywords(resume_clean, MASTER_SKILLS if MASTER_SKILLS else STOP_WORDS)
-        jd_words = extract_relevant_keywords(jd_clean, MASTER_SKILLS if MASTER_SKILLS else STOP_WORDS)
         
         overlap_count = len(resume_words.intersection(jd_words))
         total_jd_words = len(jd_words)
@@ -710,8 +745,9 @@ def semantic_score(resume_text, jd_text, years_exp):
 
 
     try:
-        jd_embed = model.encode(jd_clean)
-        resume_embed = model.encode(resume_clean)
+        if jd_embed is None:
+            jd_embed = embedder.encode(jd_clean)
+        resume_embed = embedder.encode(resume_clean)
 
         semantic_similarity = cosine_similarity(jd_embed.reshape(1, -1), resume_embed.reshape(1, -1))[0][0]
         semantic_similarity = float(np.clip(semantic_similarity, 0, 1))
@@ -719,7 +755,7 @@ def semantic_score(resume_text, jd_text, years_exp):
         # Internal calculation for model, not for display
         # Use the new extraction logic for model features
         resume_words_filtered = extract_relevant_keywords(resume_clean, MASTER_SKILLS if MASTER_SKILLS else STOP_WORDS)
-        jd_words_filtered = extract_relevant_keywords(jd_clean, MASTER_SKILLS if MASTER_SKILLS else STOP_WORDS)
+        jd_words_filtered = jd_words
         keyword_overlap_count = len(resume_words_filtered.intersection(jd_words_filtered))
         
         years_exp_for_model = float(years_exp) if years_exp is not None else 0.0
@@ -729,21 +765,15 @@ def semantic_score(resume_text, jd_text, years_exp):
         predicted_score = ml_model.predict([features])[0]
 
         if len(jd_words_filtered) > 0:
-            jd_coverage_percentage = (keyword_overlap_count / len(jd_words_filtered)) * 100
+            jd_coverage = keyword_overlap_count / len(jd_words_filtered)
         else:
-            jd_coverage_percentage = 0.0
-
-        blended_score = (predicted_score * 0.6) + \
-                        (jd_coverage_percentage * 0.1) + \
-                        (semantic_similarity * 100 * 0.3)
+            jd_coverage = 0.0
 
-        if semantic_similarity > 0.7 and years_exp >= 3:
-            blended_score += 5
-
-        score = float(np.clip(blended_score, 0, 100))
+        # Default weights of score_weights.py: 0.6 model + 0.1 coverage + 0.3 similarity, plus the bonus
+        score = float(blend_scores(predicted_score, jd_coverage, semantic_similarity, years_exp_for_model))
         
         # The AI suggestion text will be generated separately for display by generate_concise_ai_suggestion.
-        return round(score, 2), "AI suggestion will be generated...", round(semantic_similarity, 2) # Placeholder feedback
+        return score, "AI suggestion will be generated...", round(semantic_similarity, 2) # Placeholder feedback
 
 
     except Exception as e:
@@ -751,7 +781,6 @@ def semantic_score(resume_text, jd_text, years_exp):
         # Simplified fallback for score and feedback if ML prediction fails
         # Use the new extraction logic for fallback
         resume_words = extract_relevant_keywords(resume_clean, MASTER_SKILLS if MASTER_SKILLS else STOP_WORDS)
-        jd_words = extract_relevant_keywords(jd_clean, MASTER_SKILLS if MASTER_SKILLS else STOP_WORDS)
         
         overlap_count = len(resume_words.intersection(jd_words))
         total_jd_words = len(jd_words)
@@ -780,6 +809,93 @@ Best regards,
 The {sender_name}""")
     return f"mailto:{recipient_email}?subject={subject}&body={body}"
 
+# --- Streaming Screening Pipeline ---
+LEADERBOARD_SIZE = 10
+LIVE_REFRESH_SECONDS = 0.5
+LIVE_COLUMNS = ["Candidate Name", "Score (%)", "Years Experience", "Semantic Similarity", "AI Suggestion"]
+
+class Leaderboard:
+    """Top-K candidates by score, kept in a min-heap while results stream in."""
+
+    def __init__(self, k):
+        self.k = k
+        self.heap = []
+        self.count = 0
+
+    def push(self, result):
+        self.count += 1
+        item = (result["Score (%)"], -self.count, result) # Equal scores: the earlier candidate ranks first
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, item)
+        elif item[:2] > self.heap[0][:2]:
+            heapq.heapreplace(self.heap, item)
+
+    def top(self):
+        return [item[2] for item in sorted(self.heap, key=lambda item: item[:2], reverse=True)]
+
+def screen_resumes(resume_files, jd_text, jd_words, jd_embed, jd_words_set):
+    """
+    Scores resumes one at a time and yields each result as soon as it is ready,
+    so the page can render candidates while the rest of the batch is still running.
+    Files that cannot be read yield {"File Name", "Error"}.
+    """
+    for file in resume_files:
+        text = extract_text_from_pdf(file)
+        if text.startswith("[ERROR]"):
+            yield {"File Name": file.name, "Error": text.replace('[ERROR] ', '')}
+            continue
+
+        exp = extract_years_of_experience(text)
+        email = extract_email(text)
+
+        # Keep the search page's index in step with every screened resume
+        try:
+            get_resume_index().add_document(file.name, text, file_hash=hash_bytes(file.getvalue()), years_exp=exp, has_email=bool(email))
+        except Exception as e:
+            st.warning(f"Could not add {file.name} to the search index: {e}")
+        candidate_name = extract_name(text) or file.name.replace('.pdf', '').replace('_', ' ').title()
+
+        # Calculate Matched Keywords and Missing Skills using the new function
+        resume_words_set = extract_relevant_keywords(text, MASTER_SKILLS)
+
+        matched_keywords = list(resume_words_set.intersection(jd_words_set))
+        missing_skills = list(jd_words_set.difference(resume_words_set)) 
+
+        # semantic_score now returns score, placeholder feedback, semantic_similarity
+        score, _, semantic_similarity = semantic_score(text, jd_text, exp, jd_embed=jd_embed, jd_words=jd_words)
+        
+        # Generate the CONCISE AI suggestion for the table
+        concise_ai_suggestion = generate_concise_ai_suggestion(
+            candidate_name=candidate_name,
+            score=score,
+            years_exp=exp,
+            semantic_similarity=semantic_similarity
+        )
+
+        # Generate the DETAILED HR assessment for the top candidate section
+        detailed_hr_assessment = generate_detailed_hr_assessment(
+            candidate_name=candidate_name,
+            score=score,
+            years_exp=exp,
+            semantic_similarity=semantic_similarity,
+            jd_text=jd_text,
+            resume_text=text
+        )
+
+        yield {
+            "File Name": file.name,
+            "Candidate Name": candidate_name,
+            "Score (%)": score,
+            "Years Experience": exp,
+            "Email": email or "Not Found",
+            "AI Suggestion": concise_ai_suggestion, # This is the concise one for the table
+            "Detailed HR Assessment": detailed_hr_assessment, # Store the detailed one for top candidate
+            "Matched Keywords": ", ".join(matched_keywords), # Added Matched Keywords
+            "Missing Skills": ", ".join(missing_skills),    # Added Missing Skills
+            "Semantic Similarity": semantic_similarity,
+            "Resume Raw Text": text
+        }
+
 # --- Function to encapsulate the Resume Screener logic ---
 def resume_screener_page():
     # st.set_page_config(layout="wide", page_title="ScreenerPro - AI Resume Screener", page_icon="🧠") # Removed: should be in main.py
@@ -791,11 +907,11 @@ def resume_screener_page():
 
     with col1:
         jd_text = ""
+        jd_catalog = get_jd_catalog()
+        jd_catalog.refresh()
         job_roles = {"Upload my own": None}
-        if os.path.exists("data"):
-            for fname in os.listdir("data"):
-                if fname.endswith(".txt"):
-                    job_roles[fname.replace(".txt", "").replace("_", " ").title()] = os.path.join("data", fname)
+        for entry in jd_catalog.list_jds():
+            job_roles[entry["title"]] = entry["file_name"]
 
         jd_option = st.selectbox("📌 **Select a Pre-Loaded Job Role or Upload Your Own Job Description**", list(job_roles.keys()))
         if jd_option == "Upload my own":
@@ -803,10 +919,7 @@ def resume_screener_page():
             if jd_file:
                 jd_text = jd_file.read().decode("utf-8")
         else:
-            jd_path = job_roles[jd_option]
-            if jd_path and os.path.exists(jd_path):
-                with open(jd_path, "r", encoding="utf-8") as f:
-                    jd_text = f.read()
+            jd_text = jd_catalog.get_text(job_roles[jd_option]) or ""
         
         if jd_text:
             with st.expander("📝 View Loaded Job Description"):
@@ -820,10 +933,18 @@ def resume_screener_page():
         min_experience = st.slider("💼 **Minimum Experience Required (Years)**", 0, 15, 2, help="Candidates with less than this experience will be noted.")
         st.session_state['screening_min_experience'] = min_experience # Store in session state
 
+        use_cascade = st.checkbox("⚡ **Cascade Prefilter** (large applicant pools)", help="Rank all resumes by keyword coverage and experience first, then run the AI model only on the best of them. The rest keep the quick score and are marked as not deep-scored.")
+        if use_cascade:
+            keep_percent = st.slider("Deep-score the top (%)", 5, 100, 30, help="Share of resumes, by prefilter score, that go on to the AI model.")
+            prefilter_floor = st.slider("...plus every resume with a prefilter score of at least", 0, 100, 50)
+
+        weights = score_weight_controls()
+
         st.markdown("---")
         st.info("Once criteria are set, upload resumes below to begin screening.")
 
     resume_files = st.file_uploader("📄 **Upload Resumes (PDF)**", type="pdf", accept_multiple_files=True, help="Upload one or more PDF resumes for screening.")
+    st.caption("Large batch? Submit it under **🗂️ Screening Jobs** so it keeps running in the background if you leave this page.")
 
     df = pd.DataFrame()
 
@@ -840,84 +961,147 @@ def resume_screener_page():
         jd_words_for_cloud = " ".join(list(jd_words_for_cloud_set))
 
         if jd_words_for_cloud:
-            wordcloud = WordCloud(width=800, height=400, background_color='white', collocations=False).generate(jd_words_for_cloud)
-            fig, ax = plt.subplots(figsize=(10, 5))
-            ax.imshow(wordcloud, interpolation='bilinear')
-            ax.axis('off')
-            st.pyplot(fig)
-            plt.close(fig) # Close the figure to free up memory
+            st.image(render_wordcloud(hash_text(jd_words_for_cloud), sorted(jd_words_for_cloud_set)), use_container_width=True)
         else:
             st.info("No significant keywords to display for the Job Description. Please ensure your JD has sufficient content or adjust your MASTER_SKILLS list.")
         st.markdown("---")
 
-        results = []
-        resume_text_map = {}
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-
-        for i, file in enumerate(resume_files):
-            status_text.text(f"Processing {file.name} ({i+1}/{len(resume_files)})...")
-            progress_bar.progress((i + 1) / len(resume_files))
-
-            text = extract_text_from_pdf(file)
-            if text.startswith("[ERROR]"):
-                st.error(f"Failed to process {file.name}: {text.replace('[ERROR] ', '')}")
-                continue
-
-            exp = extract_years_of_experience(text)
-            email = extract_email(text)
-            candidate_name = extract_name(text) or file.name.replace('.pdf', '').replace('_', ' ').title()
-
-            # Calculate Matched Keywords and Missing Skills using the new function
-            resume_words_set = extract_relevant_keywords(text, MASTER_SKILLS)
-            jd_words_set = extract_relevant_keywords(jd_text, MASTER_SKILLS)
-
-            matched_keywords = list(resume_words_set.intersection(jd_words_set))
-            missing_skills = list(jd_words_set.difference(resume_words_set)) 
-
-            # semantic_score now returns score, placeholder feedback, semantic_similarity
-            score, _, semantic_similarity = semantic_score(text, jd_text, exp)
-            
-            # Generate the CONCISE AI suggestion for the table
-            concise_ai_suggestion = generate_concise_ai_suggestion(
-                candidate_name=candidate_name,
-                score=score,
-                years_exp=exp,
-                semantic_similarity=semantic_similarity
-            )
-
-            # Generate the DETAILED HR assessment for the top candidate section
-            detailed_hr_assessment = generate_detailed_hr_assessment(
-                candidate_name=candidate_name,
-                score=score,
-                years_exp=exp,
-                semantic_similarity=semantic_similarity,
-                jd_text=jd_text,
-                resume_text=text
+        # Results keep their score components, so a rerun with the same JD, uploads and screening settings
+        # (e.g. only a score weight moved) re-blends the stored screen instead of screening again
+        rerank_started = time.perf_counter()
+        screen_key = (
+            hash_text(jd_text), tuple((file.name, hash_bytes(file.getvalue())) for file in resume_files),
+            (keep_percent, prefilter_floor, cutoff) if use_cascade else None
+        )
+        stored_screen = st.session_state.get('screening_components')
+        reused = stored_screen is not None and stored_screen["key"] == screen_key
+        if reused:
+            results, duplicates = stored_screen["results"], stored_screen["duplicates"]
+            messages, pipeline_stats, shown_messages = stored_screen["messages"], stored_screen["stats"], 0
+        else:
+            # JD features are computed once per batch (and cached in the catalog for pre-loaded JDs)
+            if job_roles.get(jd_option):
+                jd_words, jd_embed = jd_catalog.features(job_roles[jd_option], jd_skill_keywords, encode_jd if model is not None else None)
+            else:
+                jd_words, jd_embed = jd_skill_keywords(jd_text), encode_jd(jd_text)
+            jd_words_set = jd_words_for_cloud_set
+
+            results = []
+            messages = [] # (st function, text), shown again when a rerun reuses this screen
+            resume_text_map = {}
+            leaderboard = Leaderboard(LEADERBOARD_SIZE)
+            progress_bar = st.progress(0)
+            status_text = st.empty()
+            st.markdown("### 🏁 Live Leaderboard")
+            leaderboard_placeholder = st.empty()
+            table_placeholder = st.empty()
+            last_refresh = 0.0
+
+            # PDF extraction, parsing and batched scoring run as overlapping stages (imported here: it builds on this module)
+            from screening_pipeline import ScreeningPipeline
+            from cascade import Cascade
+            from dedup import DedupIndex
+            cascade = Cascade(keep_fraction=keep_percent / 100, floor=prefilter_floor, relevance_cutoff=cutoff) if use_cascade else None
+            # Duplicate clusters (and their results) carry over to later uploads against the same JD and settings
+            dedup_key = (hash_text(jd_text), (keep_percent, prefilter_floor) if use_cascade else None)
+            stored_dedup = st.session_state.get('screening_dedup')
+            dedup = stored_dedup["index"].copy() if stored_dedup and stored_dedup["key"] == dedup_key else DedupIndex()
+            duplicates = []
+            # Resumes take fair-share slots, so a large batch from one recruiter doesn't hold up everyone else's
+            scheduler = get_fair_scheduler()
+            username = st.session_state.get("username")
+            pipeline = ScreeningPipeline(jd_text, jd_words, jd_embed, jd_words_set, user=username, scheduler=scheduler, cascade=cascade, dedup=dedup)
+            if ml_model is None or model is None:
+                st.warning("ML models not loaded. Providing basic score and generic feedback.")
+
+            def show_queue_status():
+                queue_status = scheduler.status(username)
+                if queue_status["waiting"] and not queue_status["in_flight"]:
+                    status_text.text(format_queue_status(queue_status))
+                elif cascade is not None and not results:
+                    status_text.text(f"⚡ Prefiltering: parsed {pipeline.prefiltered} of {len(resume_files)} resumes...")
+
+            # Candidates are shown as they are scored; the table is redrawn at most every LIVE_REFRESH_SECONDS
+            screen_started = time.monotonic()
+            for i, result in enumerate(pipeline.run(resume_files, on_wait=show_queue_status)):
+                progress_bar.progress((i + 1) / len(resume_files))
+                if "Error" in result:
+                    messages.append(("error", f"Failed to process {result['File Name']}: {result['Error']}"))
+                    st.error(messages[-1][1])
+                    continue
+                if result.get("Duplicate Of"):
+                    duplicates.append(result) # Flagged and listed separately, not ranked twice
+                else:
+                    results.append(result)
+                    resume_text_map[result["File Name"]] = result["Resume Raw Text"]
+                    leaderboard.push(result)
+
+                done = i + 1 == len(resume_files)
+                # An upload of only duplicates (or failures) has nothing to rank yet
+                if results and (done or time.monotonic() - last_refresh >= LIVE_REFRESH_SECONDS):
+                    elapsed = time.monotonic() - screen_started
+                    remaining = len(resume_files) - (i + 1)
+                    eta = f" (about {elapsed / (i + 1) * remaining:.0f}s left)" if remaining else ""
+                    duplicate_note = f", {len(duplicates)} duplicates" if duplicates else ""
+                    status_text.text(f"Scored {len(results)} of {len(resume_files)} resumes{duplicate_note}{eta}...")
+                    leaderboard_placeholder.dataframe(
+                        pd.DataFrame(leaderboard.top())[LIVE_COLUMNS], use_container_width=True, hide_index=True
+                    )
+                    table_placeholder.dataframe(
+                        pd.DataFrame(results)[LIVE_COLUMNS].sort_values(by="Score (%)", ascending=False),
+                        use_container_width=True, hide_index=True, height=300
+                    )
+                    last_refresh = time.monotonic()
+
+            progress_bar.empty()
+            status_text.empty()
+            table_placeholder.empty()
+            shown_messages = len(messages) # Failures were shown as they happened
+            messages += [("warning", warning) for warning in pipeline.warnings]
+            st.session_state['screening_dedup'] = {"key": dedup_key, "index": dedup}
+            if cascade is not None and cascade.pool:
+                cascade_report = cascade.report()
+                recall = f"{cascade_report['recall'] * 100:.0f}%" if cascade_report["recall"] is not None else "n/a (no candidate reached the cutoff)"
+                recall_basis = "exact" if cascade_report["exact"] else f"estimated from {cascade_report['audited']} audited pruned resumes"
+                messages.append(("info",
+                    f"⚡ **Cascade:** deep-scored {cascade_report['deep_scored']} of {cascade_report['pool']} resumes "
+                    f"({cascade_report['compute_fraction'] * 100:.0f}% of full compute); {cascade_report['pruned']} marked as not deep-scored. "
+                    f"Prefilter recall at the {cutoff}% cutoff: **{recall}** ({recall_basis})."
+                ))
+            pipeline_stats = pipeline.stats()
+            st.session_state['screening_components'] = {
+                "key": screen_key, "results": results, "duplicates": duplicates, "messages": messages, "stats": pipeline_stats,
+            }
+            rerank_started = time.perf_counter()
+
+        for kind, text in messages[shown_messages:]:
+            getattr(st, kind)(text)
+        if duplicates:
+            with st.expander(f"🧬 Duplicates ({len(duplicates)} resumes scored once with their original)"):
+                # Same weights as the ranked table, so a candidate's score agrees in both
+                st.dataframe(
+                    reblend(pd.DataFrame(duplicates), weights)[["File Name", "Duplicate Of", "Duplicate Match", "Candidate Name", "Score (%)"]],
+                    use_container_width=True, hide_index=True
+                )
+        with st.expander(f"⚙️ Pipeline Stats ({len(resume_files)} resumes in {pipeline_stats['wall_seconds']:.1f}s{', last run' if reused else ''})"):
+            st.dataframe(pd.DataFrame(pipeline_stats["stages"]), use_container_width=True, hide_index=True)
+            st.caption(f"Peak parsed-resume queue depth: {pipeline_stats['max_queue_depth']}")
+
+
+        if not results:
+            st.info("ℹ️ No new candidates to rank: every resume in this upload duplicates one screened earlier (see 🧬 Duplicates) or could not be read.")
+            return
+
+        # Scores are re-blended from each result's cached components; no model calls
+        df = reblend(pd.DataFrame(results), weights).sort_values(by="Score (%)", ascending=False).reset_index(drop=True)
+        if weights != DEFAULT_WEIGHTS:
+            source = "the stored screen" if reused else "this screen"
+            st.caption(
+                f"⚖️ Re-ranked {len(df)} candidates from {source} with custom score weights in {(time.perf_counter() - rerank_started) * 1000:.1f} ms. "
+                "AI suggestions and assessments still describe the default-weighted score."
             )
 
-            results.append({
-                "File Name": file.name,
-                "Candidate Name": candidate_name,
-                "Score (%)": score,
-                "Years Experience": exp,
-                "Email": email or "Not Found",
-                "AI Suggestion": concise_ai_suggestion, # This is the concise one for the table
-                "Detailed HR Assessment": detailed_hr_assessment, # Store the detailed one for top candidate
-                "Matched Keywords": ", ".join(matched_keywords), # Added Matched Keywords
-                "Missing Skills": ", ".join(missing_skills),    # Added Missing Skills
-                "Semantic Similarity": semantic_similarity,
-                "Resume Raw Text": text
-            })
-            resume_text_map[file.name] = text
-        
-        progress_bar.empty()
-        status_text.empty()
-
-
-        df = pd.DataFrame(results).sort_values(by="Score (%)", ascending=False).reset_index(drop=True)
-
-        st.session_state['screening_results'] = results
+        st.session_state['screening_results'] = df.to_dict("records")
         
         # Save results to CSV for analytics.py to use (re-added as analytics.py was updated to use it)
         df.to_csv("results.csv", index=False)
@@ -927,22 +1111,8 @@ def resume_screener_page():
         st.markdown("## 📊 Candidate Score Comparison")
         st.caption("Visual overview of how each candidate ranks against the job requirements.")
         if not df.empty:
-            fig, ax = plt.subplots(figsize=(12, 7))
-            # Define colors: Green for top, Yellow for moderate, Red for low
-            colors = ['#4CAF50' if s >= cutoff else '#FFC107' if s >= (cutoff * 0.75) else '#F44346' for s in df['Score (%)']]
-            bars = ax.bar(df['Candidate Name'], df['Score (%)'], color=colors)
-            ax.set_xlabel("Candidate", fontsize=14)
-            ax.set_ylabel("Score (%)", fontsize=14)
-            ax.set_title("Resume Screening Scores Across Candidates", fontsize=16, fontweight='bold')
-            ax.set_ylim(0, 100)
-            plt.xticks(rotation=60, ha='right', fontsize=10)
-            plt.yticks(fontsize=10)
-            for bar in bars:
-                yval = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2, yval + 1, f"{yval:.1f}", ha='center', va='bottom', fontsize=9)
-            plt.tight_layout()
-            st.pyplot(fig)
-            plt.close(fig) # Close the figure to free up memory
+            chart_key = data_hash(df, ['Candidate Name', 'Score (%)'])
+            st.image(render_score_bar_chart(chart_key, df, cutoff))
         else:
             st.info("Upload resumes to see a comparison chart.")
 
@@ -1053,6 +1223,7 @@ def resume_screener_page():
             'Years Experience',
             'Semantic Similarity',
             'Tag', # Keep the custom tag
+            'Deep Scored', # Only present for cascade runs
             'Email',
             'AI Suggestion', # This will still contain the concise AI suggestion text
             'Matched Keywords',
@@ -0,0 +1,333 @@
+import streamlit as st
+import sqlite3
+import threading
+import shutil
+import json
+import uuid
+import time
+import os
+from concurrency import get_cpu_plan
+from fair_share import get_fair_scheduler
+
+# --- Configuration ---
+JOBS_DB_FILE = "screening_jobs.db"
+JOBS_SPOOL_DIR = "screening_jobs"  # Uploaded PDFs wait here until their result is checkpointed
+JOB_WORKERS = get_cpu_plan().job_workers # Jobs screened in parallel (files within a job run in order)
+JOB_STALE_SECONDS = 60             # A 'running' job without a heartbeat this long (server restarted) is resumed
+IDLE_POLL_SECONDS = 1.0
+
+# Job statuses
+QUEUED, RUNNING, CANCELLING, CANCELLED, DONE, FAILED = "queued", "running", "cancelling", "cancelled", "done", "failed"
+ACTIVE_STATUSES = (QUEUED, RUNNING, CANCELLING)
+# File statuses
+PENDING, SCORED = "pending", "scored"
+
+
+# --- Helpers ---
+def screener_scorer(jd_text):
+    """
+    Returns score(file_name, data) -> result dict for one JD, screened by
+    ScreeningPipeline.score_file like the Resume Screener page: results carry
+    the score components (so they can be re-weighted) and duplicates within the
+    job are scored once. JD features are computed once per job. Workers have no
+    script context, so warnings are collected in score.warnings.
+    """
+    from screener import model, ml_model, jd_skill_keywords, encode_jd, extract_relevant_keywords, MASTER_SKILLS
+    from screening_pipeline import ScreeningPipeline
+    from dedup import DedupIndex
+    pipeline = ScreeningPipeline(
+        jd_text, jd_skill_keywords(jd_text), encode_jd(jd_text), extract_relevant_keywords(jd_text, MASTER_SKILLS),
+        dedup=DedupIndex()
+    )
+    if model is None or ml_model is None:
+        pipeline.warnings.append("ML models not loaded. Providing basic score and generic feedback.")
+
+    def score(file_name, data):
+        return pipeline.score_file(file_name, data)
+    score.warnings = pipeline.warnings
+    return score
+
+
+class ScreeningJobQueue:
+    """
+    Persistent screening jobs (SQLite, WAL) run by worker threads outside the script run.
+
+    Submitting spools the uploaded PDFs to disk and queues a job. Workers score a
+    job's files one at a time and checkpoint every result, so reruns, page switches
+    and closed tabs don't lose work, any session can follow progress, cancelling
+    stops after the current file, and after a server restart a job picks up at its
+    first unscored file once its heartbeat goes stale.
+    """
+
+    def __init__(self, db_path=JOBS_DB_FILE, spool_dir=JOBS_SPOOL_DIR, workers=JOB_WORKERS, scorer=screener_scorer, scheduler=None):
+        self.db_path = db_path
+        self.spool_dir = spool_dir
+        self.scorer = scorer # jd_text -> score(file_name, data) -> result dict
+        self.scheduler = scheduler # Optional fair_share.FairShareScheduler: job files share slots with live screens
+        self.wakeup = threading.Event()
+        self.stop_event = threading.Event()
+        self._local = threading.local()
+        os.makedirs(spool_dir, exist_ok=True)
+        conn = self._conn()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    owner TEXT,
+                    jd_title TEXT NOT NULL,
+                    jd_text TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    total INTEGER NOT NULL,
+                    scored INTEGER NOT NULL DEFAULT 0,
+                    failed INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    heartbeat_at REAL,
+                    busy_seconds REAL NOT NULL DEFAULT 0
+                )""")
+            if "warnings" not in {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}: # Jobs created before warnings were kept
+                conn.execute("ALTER TABLE jobs ADD COLUMN warnings TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_files (
+                    job_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    file_name TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    result TEXT,
+                    error TEXT,
+                    PRIMARY KEY (job_id, seq)
+                )""")
+        self.workers = [
+            threading.Thread(target=self._worker_loop, name=f"screening-worker-{i}", daemon=True) for i in range(workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _spool_path(self, job_id, seq=None):
+        folder = os.path.join(self.spool_dir, job_id)
+        return folder if seq is None else os.path.join(folder, f"{seq}.pdf")
+
+    # --- Submitting & Controlling Jobs ---
+    def submit(self, owner, jd_title, jd_text, files):
+        """Queues a job for `files` [(file_name, bytes)] and returns its id."""
+        job_id = uuid.uuid4().hex[:12]
+        folder = self._spool_path(job_id)
+        os.makedirs(folder, exist_ok=True)
+        for seq, (_, data) in enumerate(files):
+            with open(self._spool_path(job_id, seq), "wb") as f:
+                f.write(data)
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN")
+            conn.execute(
+                "INSERT INTO jobs (id, owner, jd_title, jd_text, total, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, owner, jd_title, jd_text, len(files), time.time())
+            )
+            conn.executemany(
+                "INSERT INTO job_files (job_id, seq, file_name) VALUES (?, ?, ?)",
+                [(job_id, seq, file_name) for seq, (file_name, _) in enumerate(files)]
+            )
+        self.wakeup.set()
+        return job_id
+
+    def cancel(self, job_id):
+        """Queued jobs are cancelled at once; running jobs stop after the file in progress."""
+        conn = self._conn()
+        conn.execute("UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                     (CANCELLED, time.time(), job_id, QUEUED))
+        conn.execute("UPDATE jobs SET status = ? WHERE id = ? AND status = ?", (CANCELLING, job_id, RUNNING))
+
+    def resume(self, job_id):
+        """Re-queues a cancelled or failed job; it continues with its unscored files."""
+        cursor = self._conn().execute(
+            "UPDATE jobs SET status = ?, error = NULL, finished_at = NULL WHERE id = ? AND status IN (?, ?)",
+            (QUEUED, job_id, CANCELLED, FAILED)
+        )
+        self.wakeup.set()
+        return cursor.rowcount > 0
+
+    def delete(self, job_id):
+        """Deletes a finished or cancelled job with its results."""
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN")
+            deleted = conn.execute(
+                f"DELETE FROM jobs WHERE id = ? AND status NOT IN ({','.join('?' * len(ACTIVE_STATUSES))})",
+                (job_id, *ACTIVE_STATUSES)
+            ).rowcount
+            if deleted:
+                conn.execute("DELETE FROM job_files WHERE job_id = ?", (job_id,))
+        if deleted:
+            shutil.rmtree(self._spool_path(job_id), ignore_errors=True)
+        return deleted > 0
+
+    # --- Status & Results ---
+    def list_jobs(self, owner=None, limit=50):
+        """Most recent jobs (all owners if `owner` is None) with progress and throughput."""
+        query, params = "SELECT * FROM jobs", ()
+        if owner is not None:
+            query, params = query + " WHERE owner = ?", (owner,)
+        rows = self._conn().execute(query + " ORDER BY created_at DESC LIMIT ?", (*params, limit)).fetchall()
+        return [self._with_throughput(dict(row)) for row in rows]
+
+    def job(self, job_id):
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._with_throughput(dict(row)) if row is not None else None
+
+    @staticmethod
+    def _with_throughput(job):
+        job["warnings"] = json.loads(job["warnings"]) if job.get("warnings") else []
+        finished = job["scored"] + job["failed"]
+        job["per_minute"] = finished / job["busy_seconds"] * 60 if job["busy_seconds"] > 0 else None
+        remaining = job["total"] - finished
+        job["eta_seconds"] = remaining / job["per_minute"] * 60 if job["per_minute"] and job["status"] in ACTIVE_STATUSES else None
+        return job
+
+    def results(self, job_id):
+        """Scored candidates of a job, in upload order."""
+        rows = self._conn().execute(
+            "SELECT result FROM job_files WHERE job_id = ? AND status = ? ORDER BY seq", (job_id, SCORED)
+        ).fetchall()
+        return [json.loads(row["result"]) for row in rows]
+
+    def failures(self, job_id):
+        rows = self._conn().execute(
+            "SELECT file_name, error FROM job_files WHERE job_id = ? AND status = ? ORDER BY seq", (job_id, FAILED)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    # --- Workers ---
+    def _claim(self):
+        """Atomically claims the oldest queued job (or a stale running one), or returns None."""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = CASE status WHEN ? THEN ? ELSE ? END WHERE status IN (?, ?) AND heartbeat_at < ?",
+                (CANCELLING, CANCELLED, QUEUED, RUNNING, CANCELLING, now - JOB_STALE_SECONDS)
+            )
+            row = conn.execute("SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, started_at = COALESCE(started_at, ?), heartbeat_at = ? WHERE id = ?",
+                    (RUNNING, now, now, row["id"])
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return dict(row) if row is not None else None
+
+    def _finish(self, job_id, status, error=None):
+        self._conn().execute(
+            "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND status IN (?, ?)",
+            (status, error, time.time(), job_id, RUNNING, CANCELLING)
+        )
+        if status == DONE:
+            shutil.rmtree(self._spool_path(job_id), ignore_errors=True)
+
+    def _run_job(self, job):
+        conn = self._conn()
+        try:
+            score = self.scorer(job["jd_text"])
+        except Exception as e:
+            self._finish(job["id"], FAILED, f"Could not prepare the job description: {e}")
+            return
+        warnings = getattr(score, "warnings", [])
+        reported = set(json.loads(job["warnings"])) if job.get("warnings") else set()
+        pending = conn.execute(
+            "SELECT seq, file_name FROM job_files WHERE job_id = ? AND status = ? ORDER BY seq", (job["id"], PENDING)
+        ).fetchall()
+        for i, (seq, file_name) in enumerate(pending):
+            if self.stop_event.is_set():
+                return # Left 'running'; resumed once the heartbeat goes stale
+            status = conn.execute("SELECT status FROM jobs WHERE id = ?", (job["id"],)).fetchone()
+            if status is None or status["status"] != RUNNING:
+                self._finish(job["id"], CANCELLED)
+                return
+            if self.scheduler is not None and self.scheduler.acquire(job["owner"], len(pending) - i, cancel_event=self.stop_event) is None:
+                return
+
+            start = time.perf_counter()
+            path = self._spool_path(job["id"], seq)
+            try:
+                with open(path, "rb") as f:
+                    result = score(file_name, f.read())
+                error = result.get("Error")
+            except Exception as e:
+                result, error = None, str(e)
+            finally:
+                if self.scheduler is not None:
+                    self.scheduler.release(job["owner"])
+
+            # Checkpoint: the file's result and the job's counters move together
+            with conn:
+                conn.execute("BEGIN")
+                conn.execute(
+                    "UPDATE job_files SET status = ?, result = ?, error = ? WHERE job_id = ? AND seq = ?",
+                    (FAILED if error else SCORED, None if error else json.dumps(result, default=float), error, job["id"], seq)
+                )
+                conn.execute(
+                    f"UPDATE jobs SET {'failed' if error else 'scored'} = {'failed' if error else 'scored'} + 1, "
+                    "busy_seconds = busy_seconds + ? WHERE id = ?",
+                    (time.perf_counter() - start, job["id"])
+                )
+                if not reported.issuperset(warnings):
+                    reported.update(warnings)
+                    conn.execute("UPDATE jobs SET warnings = ? WHERE id = ?", (json.dumps(sorted(reported)), job["id"]))
+            if os.path.exists(path):
+                os.remove(path)
+        self._finish(job["id"], DONE)
+
+    def _worker_loop(self):
+        while not self.stop_event.is_set():
+            try:
+                job = self._claim()
+            except sqlite3.OperationalError:
+                job = None # Database busy; try again shortly
+            if job is None:
+                self.wakeup.wait(IDLE_POLL_SECONDS)
+                self.wakeup.clear()
+                continue
+            # Heartbeats come from a side thread so a slow model load or a large PDF doesn't look like a dead server
+            job_done = threading.Event()
+            threading.Thread(target=self._heartbeat, args=(job["id"], job_done), daemon=True).start()
+            try:
+                self._run_job(job)
+            except Exception as e:
+                self._finish(job["id"], FAILED, str(e))
+            finally:
+                job_done.set()
+
+    def _heartbeat(self, job_id, job_done):
+        while not job_done.wait(JOB_STALE_SECONDS / 4):
+            try:
+                self._conn().execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ?", (time.time(), job_id))
+            except sqlite3.OperationalError:
+                pass
+
+    def shutdown(self, timeout=5):
+        self.stop_event.set()
+        self.wakeup.set()
+        for worker in self.workers:
+            worker.join(timeout)
+
+
+@st.cache_resource
+def get_screening_jobs():
+    """Process-wide job queue and worker pool shared by every session."""
+    return ScreeningJobQueue(scheduler=get_fair_scheduler())
@@ -0,0 +1,493 @@
+import streamlit as st
+import multiprocessing
+import threading
+import queue
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from pdf_extract import extract_pdf_text
+from screener import (
+    model, ml_model, MASTER_SKILLS, jd_skill_keywords, encode_jds, extract_relevant_keywords,
+    extract_years_of_experience, extract_email, extract_name,
+    generate_concise_ai_suggestion, generate_detailed_hr_assessment
+)
+from matrix_screener import score_components
+from score_weights import blend_scores, components_record
+from search_index import get_resume_index, hash_bytes
+from dedup import NEAR
+from concurrency import get_cpu_plan
+
+# --- Configuration ---
+PDF_WORKERS = get_cpu_plan().pdf_workers          # pdfplumber is GIL-bound Python, so it gets its own processes
+MAX_IN_FLIGHT = PDF_WORKERS * 4                  # PDFs submitted or waiting to be parsed (bounds memory)
+QUEUE_SIZE = 64                                   # Between the parse and the embed/predict stage
+EMBED_BATCH_SIZE = 32
+POLL_SECONDS = 0.1
+NOT_DEEP_SCORED = "⏭️ Not deep-scored: pruned by the keyword/experience prefilter. Score is the prefilter score; review manually if needed."
+
+
+@st.cache_resource
+def get_pdf_pool():
+    """Process pool for PDF text extraction, shared by every session."""
+    # spawn: the server process runs many threads (and torch), which fork() does not copy safely
+    return ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+
+class StageStats:
+    """Items processed and busy time of one pipeline stage."""
+
+    def __init__(self, name, workers=1):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, seconds, items=1):
+        with self.lock:
+            self.items += items
+            self.busy_seconds += seconds
+
+
+class ScreeningPipeline:
+    """
+    Screens a batch of resumes against one JD in overlapping stages:
+
+    extract (process pool, pdfplumber) -> parse (thread: experience, contact,
+    keywords) -> score (thread: batched model.encode and ml_model.predict via
+    score_components, the search index and the AI suggestions).
+
+    At most MAX_IN_FLIGHT PDFs are between upload and parse and QUEUE_SIZE parsed
+    resumes wait for scoring, so a slow stage holds the earlier ones back instead
+    of letting memory grow. run() yields the same result dicts as
+    screener.screen_resumes(), in completion order; stats() reports per-stage
+    utilization.
+
+    With a `scheduler` (fair_share.FairShareScheduler), each resume also takes
+    one of `user`'s slots before extraction and returns it once scored, so
+    concurrent screens share the model fairly.
+
+    With a `cascade` (cascade.Cascade), scoring waits until every resume is
+    parsed, ranks them with the cheap keyword/experience score and deep-scores
+    only the survivors (results carry "Deep Scored"); cascade.report() then has
+    the compute saved and the prefilter's estimated recall.
+
+    With a `dedup` index (dedup.DedupIndex), byte-identical uploads skip
+    extraction and text/near-duplicates skip scoring: each cluster is scored
+    once and its result is copied to the other members with "Duplicate Of".
+    Results already in the index (an earlier upload against the same JD) are
+    reused as they are.
+
+    score_file() screens a single file in the calling thread with the same
+    parsing, scoring and dedup, for background jobs that checkpoint every file.
+    """
+
+    def __init__(self, jd_text, jd_words, jd_embed, jd_words_set, user=None, scheduler=None, cascade=None, dedup=None):
+        self.jd_text = jd_text
+        self.jd_words = jd_words
+        self.jd_embed = jd_embed
+        self.jd_words_set = jd_words_set
+        self.user = user
+        self.scheduler = scheduler
+        self.cascade = cascade
+        self.dedup = dedup
+        self.waiting_duplicates = {}    # representative -> [(file name, match)] until its result is ready
+        self.dedup_lock = threading.Lock()
+        self.prefiltered = 0            # Resumes collected for the cascade's prefilter so far
+        self.slots_held = 0             # Scheduler slots taken and not yet given back
+        self.slots_lock = threading.Lock()
+        self.closed = False
+        self.stop_event = threading.Event()
+        self.in_flight = threading.BoundedSemaphore(MAX_IN_FLIGHT)
+        self.extracted = queue.Queue()  # Bounded by in_flight
+        self.parsed = queue.Queue(maxsize=QUEUE_SIZE)
+        self.results = queue.Queue()    # Drained by run() as fast as the page renders
+        self.stages = {
+            "extract": StageStats("📄 Extract (PDF)", workers=PDF_WORKERS),
+            "parse": StageStats("🔎 Parse & Keywords"),
+        }
+        if cascade is not None:
+            self.stages["prefilter"] = StageStats("⚡ Prefilter (cascade)")
+        self.stages["score"] = StageStats("🧠 Embed & Predict")
+        self.max_parsed_depth = 0
+        self.warnings = []              # Shown by the page; stage threads have no script context
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+
+    # --- Stages ---
+    def _put(self, target, item):
+        """Blocking put that gives up when the pipeline is stopped (backpressure)."""
+        while not self.stop_event.is_set():
+            try:
+                target.put(item, timeout=POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, source):
+        while not self.stop_event.is_set():
+            try:
+                return source.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                continue
+        return None
+
+    def _take_slot(self, remaining):
+        """Waits for a fair-share slot; False if the pipeline stopped first."""
+        return self._take_slots(remaining) > 0
+
+    def _take_slots(self, remaining, count=1):
+        """
+        Waits until up to `count` fair-share slots are granted together; returns
+        how many (the scheduler caps a batch at the user's quota), or 0 if the
+        pipeline stopped first.
+        """
+        if self.scheduler is None:
+            return 0 if self.stop_event.is_set() else count
+        ticket = self.scheduler.acquire(self.user, remaining, cancel_event=self.stop_event, count=count)
+        if ticket is None:
+            return 0
+        with self.slots_lock:
+            if self.closed: # run() already gave back everything it held
+                self.scheduler.release(self.user, ticket.count)
+                return 0
+            self.slots_held += ticket.count
+        return ticket.count
+
+    def _release_slots(self, count):
+        if self.scheduler is None:
+            return
+        with self.slots_lock:
+            count = min(count, self.slots_held)
+            self.slots_held -= count
+        self.scheduler.release(self.user, count)
+
+    def _submit_extractions(self, files):
+        pool = get_pdf_pool()
+        for i, file in enumerate(files):
+            if not self._take_slot(len(files) - i):
+                return
+            while not self.in_flight.acquire(timeout=POLL_SECONDS):
+                if self.stop_event.is_set():
+                    return
+            if self.stop_event.is_set():
+                return
+            data = file.getvalue()
+            file_hash = hash_bytes(data)
+            duplicate = self.dedup.match_bytes(file_hash, file.name) if self.dedup is not None else None
+            if duplicate is not None: # Byte-identical to a file already seen: nothing to extract
+                self.extracted.put((file.name, data, None, file_hash, duplicate))
+                continue
+            future = pool.submit(extract_pdf_text, data)
+            future.add_done_callback(lambda f, name=file.name, data=data, file_hash=file_hash: self.extracted.put((name, data, f, file_hash, None)))
+
+    def _parse_stage(self, total):
+        for _ in range(total):
+            item = self._get(self.extracted)
+            if item is None:
+                return
+            name, data, future, file_hash, duplicate = item
+            self.in_flight.release()
+            if duplicate is not None:
+                if not self._put(self.parsed, {"File Name": name, "file_hash": file_hash, "duplicate": duplicate}):
+                    return
+                continue
+            try:
+                text, extract_seconds = future.result()
+            except Exception as e: # Worker process died
+                text, extract_seconds = f"[ERROR] {e}", 0.0
+            self.stages["extract"].add(extract_seconds)
+
+            start = time.perf_counter()
+            if not text.startswith("[ERROR]") and self.dedup is not None:
+                duplicate = self.dedup.match_text(text, file_hash, name)
+            if text.startswith("[ERROR]"):
+                parsed = {"File Name": name, "file_hash": file_hash, "Error": text.replace('[ERROR] ', '')}
+            elif duplicate is not None:
+                parsed = {"File Name": name, "file_hash": file_hash, "duplicate": duplicate}
+            else:
+                parsed = self._parse(name, text, file_hash)
+            self.stages["parse"].add(time.perf_counter() - start)
+            if not self._put(self.parsed, parsed):
+                return
+            self.max_parsed_depth = max(self.max_parsed_depth, self.parsed.qsize())
+
+    @staticmethod
+    def _parse(name, text, file_hash):
+        exp = extract_years_of_experience(text)
+        email = extract_email(text)
+        resume_words_set = extract_relevant_keywords(text, MASTER_SKILLS)
+        return {
+            "File Name": name,
+            "text": text,
+            "file_hash": file_hash,
+            "exp": exp,
+            "email": email,
+            "candidate_name": extract_name(text) or name.replace('.pdf', '').replace('_', ' ').title(),
+            "resume_words_set": resume_words_set,
+            # Same keyword set semantic_score() uses for model features
+            "model_words": resume_words_set if MASTER_SKILLS else jd_skill_keywords(text),
+        }
+
+    def _score_stage(self, total):
+        done = 0
+        while done < total:
+            first = self._get(self.parsed)
+            if first is None:
+                return
+            batch = [first]
+            while len(batch) < EMBED_BATCH_SIZE: # Take whatever else is already waiting, without waiting for more
+                try:
+                    batch.append(self.parsed.get_nowait())
+                except queue.Empty:
+                    break
+            done += len(batch)
+
+            start = time.perf_counter()
+            errors = [item for item in batch if "Error" in item]
+            duplicates = [item for item in batch if "duplicate" in item]
+            resumes = [item for item in batch if "Error" not in item and "duplicate" not in item]
+            if resumes:
+                for item, result in zip(resumes, self._score_batch(resumes)):
+                    self._emit(result, item["file_hash"])
+            for error in errors:
+                self._emit(error, error.pop("file_hash"))
+            for duplicate in duplicates:
+                self._follow(duplicate)
+            self.stages["score"].add(time.perf_counter() - start, items=len(resumes) + len(errors))
+            self._release_slots(len(batch))
+
+    def _cascade_stage(self, total):
+        """
+        Cascade mode: collects every parsed resume, ranks them all with the cheap
+        stage-one score, then deep-scores the survivors and the audit sample.
+        Pruned resumes follow with their stage-one score.
+        """
+        pool = []
+        for _ in range(total):
+            item = self._get(self.parsed)
+            if item is None:
+                return
+            self._release_slots(1) # Parsed resumes wait in memory, not on the model; deep scoring takes new slots
+            if "Error" in item:
+                self._emit(item, item.pop("file_hash"))
+                continue
+            if "duplicate" in item:
+                self._follow(item)
+                continue
+            pool.append(item)
+            self.prefiltered += 1
+
+        start = time.perf_counter()
+        prefilter_scores = self.cascade.prefilter_scores(
+            [item["model_words"] for item in pool], self.jd_words, [item["exp"] for item in pool]
+        )
+        kept, audited, pruned = self.cascade.select(prefilter_scores)
+        self.cascade.pruned = len(pruned)
+        self.stages["prefilter"].add(time.perf_counter() - start, items=len(pool))
+
+        deep = [(i, False) for i in kept] + [(i, True) for i in audited]
+        offset = 0
+        while offset < len(deep):
+            # A batch's slots come all at once: holding part of a batch while waiting for the rest
+            # would deadlock two concurrent cascades
+            granted = self._take_slots(len(deep) - offset, min(EMBED_BATCH_SIZE, len(deep) - offset))
+            if not granted:
+                return
+            batch = deep[offset:offset + granted]
+            offset += granted
+            start = time.perf_counter()
+            for (i, is_audit), result in zip(batch, self._score_batch([pool[i] for i, _ in batch])):
+                self.cascade.record(result["Score (%)"], is_audit)
+                result["Deep Scored"] = True
+                self._emit(result, pool[i]["file_hash"])
+            self.stages["score"].add(time.perf_counter() - start, items=len(batch))
+            self._release_slots(len(batch))
+
+        start = time.perf_counter()
+        pruned_items = [pool[i] for i in pruned]
+        self._index(pruned_items)
+        predicted, coverage, similarities, years_exp = score_components(
+            [item["model_words"] for item in pruned_items], [self.jd_words], [item["exp"] for item in pruned_items]
+        )
+        for j, (i, item) in enumerate(zip(pruned, pruned_items)):
+            components = components_record(predicted[j, 0], coverage[j, 0], similarities[j, 0], years_exp[j])
+            result = self._result(item, float(prefilter_scores[i]), 0.0, components, deep_scored=False)
+            result["Deep Scored"] = False
+            self._emit(result, item["file_hash"])
+        self.stages["prefilter"].add(time.perf_counter() - start)
+
+    def _emit(self, result, file_hash):
+        """Hands a result (or error) to run(), then copies of it to any duplicates waiting for it."""
+        self.results.put(result)
+        if self.dedup is None:
+            return
+        with self.dedup_lock:
+            self.dedup.results.setdefault(file_hash, result) # A byte copy's result must not replace the original's
+            followers = self.waiting_duplicates.pop(file_hash, [])
+        for name, follower_hash, match in followers:
+            self._emit(self._duplicate_result(result, name, follower_hash, match), follower_hash)
+
+    def _follow(self, item):
+        """A duplicate gets a copy of its representative's result, now or once that result is ready."""
+        representative = item["duplicate"][0]
+        with self.dedup_lock:
+            result = self.dedup.results.get(representative)
+            if result is None:
+                self.waiting_duplicates.setdefault(representative, []).append((item["File Name"], item["file_hash"], item["duplicate"]))
+                return
+        self._emit(self._duplicate_result(result, item["File Name"], item["file_hash"], item["duplicate"]), item["file_hash"])
+
+    @staticmethod
+    def _duplicate_result(result, name, file_hash, match):
+        representative, representative_name, match_type, similarity = match
+        duplicate = dict(result)
+        duplicate["File Name"] = name
+        if (file_hash, name) != (representative, representative_name): # Same file uploaded again: its own earlier result
+            duplicate["Duplicate Of"] = representative_name
+            duplicate["Duplicate Match"] = f"{match_type} ({similarity:.0%})" if match_type == NEAR else match_type
+        return duplicate
+
+    def _index(self, resumes):
+        """Keeps the search page's index in step with every screened resume (one transaction per batch)."""
+        try:
+            get_resume_index().add_documents(
+                (item["File Name"], item["text"], item["file_hash"], item["exp"], bool(item["email"])) for item in resumes
+            )
+        except Exception as e:
+            self.warnings.append(f"Could not add resumes to the search index: {e}")
+
+    def _score_batch(self, resumes):
+        use_models = model is not None and ml_model is not None and self.jd_embed is not None
+        resume_embeds = encode_jds([item["text"] for item in resumes]) if use_models else None
+        predicted, coverage, similarities, years_exp = score_components(
+            [item["model_words"] for item in resumes], [self.jd_words], [item["exp"] for item in resumes],
+            resume_embeds, self.jd_embed[None, :] if use_models else None, ml_model if use_models else None
+        )
+        scores = blend_scores(predicted, coverage, similarities, years_exp[:, None])
+        self._index(resumes)
+        for i, item in enumerate(resumes):
+            components = components_record(predicted[i, 0], coverage[i, 0], similarities[i, 0], years_exp[i])
+            yield self._result(item, float(scores[i, 0]), float(np.round(similarities[i, 0], 2)), components)
+
+    def _result(self, item, score, semantic_similarity, components, deep_scored=True):
+        if deep_scored:
+            ai_suggestion = generate_concise_ai_suggestion(
+                candidate_name=item["candidate_name"], score=score, years_exp=item["exp"], semantic_similarity=semantic_similarity
+            )
+            hr_assessment = generate_detailed_hr_assessment(
+                candidate_name=item["candidate_name"], score=score, years_exp=item["exp"],
+                semantic_similarity=semantic_similarity, jd_text=self.jd_text, resume_text=item["text"]
+            )
+        else:
+            ai_suggestion = hr_assessment = NOT_DEEP_SCORED
+        return {
+            "File Name": item["File Name"],
+            "Candidate Name": item["candidate_name"],
+            "Score (%)": score,
+            "Years Experience": item["exp"],
+            "Email": item["email"] or "Not Found",
+            "AI Suggestion": ai_suggestion,
+            "Detailed HR Assessment": hr_assessment,
+            "Matched Keywords": ", ".join(item["resume_words_set"].intersection(self.jd_words_set)),
+            "Missing Skills": ", ".join(self.jd_words_set.difference(item["resume_words_set"])),
+            "Semantic Similarity": semantic_similarity,
+            "Resume Raw Text": item["text"],
+            **components,
+        }
+
+    def _guarded(self, stage, *args):
+        """Runs a stage; a failure stops the other stages and is re-raised by run()."""
+        try:
+            stage(*args)
+        except Exception as e:
+            self.error = e
+            self.stop_event.set()
+
+    # --- Running ---
+    def score_file(self, name, data):
+        """
+        Screens one PDF (bytes) in the calling thread and returns its result, an
+        error as {"File Name", "Error"} or, with a dedup index, a copy of an
+        earlier file's result with "Duplicate Of". Warnings go to self.warnings.
+        Takes no scheduler slots; the caller holds one.
+        """
+        file_hash = hash_bytes(data)
+        text = None
+        duplicate = self.dedup.match_bytes(file_hash, name) if self.dedup is not None else None
+        if duplicate is None:
+            text, extract_seconds = extract_pdf_text(data)
+            self.stages["extract"].add(extract_seconds)
+            if text.startswith("[ERROR]"):
+                return {"File Name": name, "Error": text.replace('[ERROR] ', '')}
+            if self.dedup is not None:
+                duplicate = self.dedup.match_text(text, file_hash, name)
+        if duplicate is not None:
+            with self.dedup_lock:
+                original = self.dedup.results.get(duplicate[0])
+            if original is not None:
+                return self._duplicate_result(original, name, file_hash, duplicate)
+            if text is None: # The original was never scored; score this copy in its place
+                text, _ = extract_pdf_text(data)
+                if text.startswith("[ERROR]"):
+                    return {"File Name": name, "Error": text.replace('[ERROR] ', '')}
+
+        start = time.perf_counter()
+        parsed = self._parse(name, text, file_hash)
+        self.stages["parse"].add(time.perf_counter() - start)
+        start = time.perf_counter()
+        result = next(self._score_batch([parsed]))
+        self.stages["score"].add(time.perf_counter() - start)
+        if self.dedup is not None:
+            with self.dedup_lock:
+                self.dedup.results.setdefault(file_hash, result)
+        return result
+
+    def run(self, files, on_wait=None):
+        """
+        Yields one result per file as soon as it has been scored (errors as
+        {"File Name", "Error"}). `on_wait` is called about every POLL_SECONDS
+        while no result is ready (the page shows the queue position from it).
+        """
+        total = len(files)
+        self.started_at = time.perf_counter()
+        for name, stage, args in (("extract", self._submit_extractions, (files,)),
+                                  ("parse", self._parse_stage, (total,)),
+                                  ("score", self._cascade_stage if self.cascade is not None else self._score_stage, (total,))):
+            threading.Thread(target=self._guarded, args=(stage, *args), name=f"pipeline-{name}", daemon=True).start()
+        try:
+            for _ in range(total):
+                result = None
+                while result is None:
+                    if self.error is not None:
+                        raise RuntimeError(f"Screening pipeline failed: {self.error}") from self.error
+                    try:
+                        result = self.results.get(timeout=POLL_SECONDS)
+                    except queue.Empty:
+                        if on_wait is not None:
+                            on_wait()
+                        continue
+                yield result
+        finally:
+            # Also reached when the page stops consuming (rerun, navigation): let the stages wind down
+            self.finished_at = time.perf_counter()
+            self.stop_event.set()
+            with self.slots_lock:
+                self.closed = True
+            self._release_slots(self.slots_held)
+
+    def stats(self):
+        """Per-stage items, busy time and utilization (busy time / (wall time x workers))."""
+        wall = ((self.finished_at or time.perf_counter()) - self.started_at) if self.started_at else 0.0
+        rows = []
+        for stage in self.stages.values():
+            rows.append({
+                "Stage": stage.name,
+                "Workers": stage.workers,
+                "Items": stage.items,
+                "Busy (s)": round(stage.busy_seconds, 2),
+                "Utilization (%)": round(stage.busy_seconds / (wall * stage.workers) * 100, 1) if wall else 0.0,
+            })
+        return {"wall_seconds": wall, "stages": rows, "max_queue_depth": self.max_parsed_depth}
@@ -3,110 +3,205 @@ import pdfplumber
 import re
 import pandas as pd
 import io
+import html
+import time
+from search_index import get_resume_index, hash_bytes, tokenize
+from search_query import execute_query, QuerySyntaxError
+from semantic_search import get_embedding_store, reciprocal_rank_fusion
+from screener import extract_years_of_experience, extract_email, clean_text, model
 
-# --- Styling ---
-st.markdown("""
-<style>
-.search-box {
-    padding: 2rem;
-    margin-top: 1rem;
-    border-radius: 20px;
-    background: rgba(255,255,255,0.95);
-    box-shadow: 0 8px 30px rgba(0,0,0,0.07);
-    animation: slideFade 0.6s ease-in-out;
-}
-.result-box {
-    background: #f7faff;
-    padding: 1.2rem;
-    margin-bottom: 1.2rem;
-    border-radius: 14px;
-    border-left: 4px solid #00cec9;
-    box-shadow: 0 4px 12px rgba(0,0,0,0.05);
-    animation: fadeInResult 0.6s ease;
-}
-.highlight {
-    background-color: #ffeaa7;
-    font-weight: 600;
-    padding: 2px 6px;
-    border-radius: 4px;
-}
-@keyframes slideFade {
-    0% { opacity: 0; transform: translateY(20px); }
-    100% { opacity: 1; transform: translateY(0); }
-}
-@keyframes fadeInResult {
-    0% { opacity: 0; transform: scale(0.98); }
-    100% { opacity: 1; transform: scale(1); }
-}
-</style>
-""", unsafe_allow_html=True)
-
-# --- UI Header ---
-st.markdown('<div class="search-box">', unsafe_allow_html=True)
-st.subheader("🔍 Resume Search Engine")
-st.caption("Upload resumes and search for single or multiple keywords (e.g., `python, sql`).")
-
-# --- File Upload ---
-resumes = st.file_uploader("📤 Upload Resumes (PDF)", type="pdf", accept_multiple_files=True, key="resume_search_upload")
-resume_texts = {}
-
-if resumes:
-    st.success(f"✅ {len(resumes)} resume(s) uploaded.")
-    for resume in resumes:
-        try:
-            with pdfplumber.open(resume) as pdf:
-                text = ''.join(page.extract_text() or '' for page in pdf.pages)
-                resume_texts[resume.name] = text
-        except Exception as e:
-            st.warning(f"⚠️ Error reading {resume.name}")
-
-    query = st.text_input("🔎 Enter keywords (comma-separated)").strip().lower()
-    download_rows = []
-
-    if query:
-        keywords = [q.strip() for q in query.split(',') if q.strip()]
-        st.markdown("### 📄 Search Results")
-        found = False
-
-        for name, content in resume_texts.items():
-            content_lower = content.lower()
-            matched_snippets = []
-            for keyword in keywords:
-                if keyword in content_lower:
-                    found = True
-                    idx = content_lower.find(keyword)
-                    snippet = content[max(0, idx - 40): idx + 160]
-                    highlighted = re.sub(
-                        f"({re.escape(keyword)})",
-                        r"<span class='highlight'>\1</span>",
-                        snippet,
-                        flags=re.IGNORECASE
+MAX_RESULTS = 50
+HYBRID_RANK_DEPTH = 200 # Candidates taken from each ranking before fusion
+SEARCH_MODES = ["🔤 Keyword", "🧠 Semantic", "⚡ Hybrid"]
+QUERY_HELP = """
+- `python sql` or `python AND sql` – both terms
+- `python OR java` or `python, java` – either term
+- `NOT php` or `-php` – exclude a term
+- `"machine learning"` – exact phrase
+- `pyth*` – prefix wildcard
+- `exp>=5`, `years<3` – years of experience filter
+- `has:email` – only resumes with an email address
+- `(python OR java) AND exp>=3` – group with parentheses
+"""
+
+
+def search_resumes_page():
+    """Resume search: upload resumes to the persistent index and run keyword, semantic or hybrid queries."""
+    # --- Styling ---
+    st.markdown("""
+    <style>
+    .search-box {
+        padding: 2rem;
+        margin-top: 1rem;
+        border-radius: 20px;
+        background: rgba(255,255,255,0.95);
+        box-shadow: 0 8px 30px rgba(0,0,0,0.07);
+        animation: slideFade 0.6s ease-in-out;
+    }
+    .result-box {
+        background: #f7faff;
+        padding: 1.2rem;
+        margin-bottom: 1.2rem;
+        border-radius: 14px;
+        border-left: 4px solid #00cec9;
+        box-shadow: 0 4px 12px rgba(0,0,0,0.05);
+        animation: fadeInResult 0.6s ease;
+    }
+    .highlight {
+        background-color: #ffeaa7;
+        font-weight: 600;
+        padding: 2px 6px;
+        border-radius: 4px;
+    }
+    @keyframes slideFade {
+        0% { opacity: 0; transform: translateY(20px); }
+        100% { opacity: 1; transform: translateY(0); }
+    }
+    @keyframes fadeInResult {
+        0% { opacity: 0; transform: scale(0.98); }
+        100% { opacity: 1; transform: scale(1); }
+    }
+    </style>
+    """, unsafe_allow_html=True)
+
+    # --- UI Header ---
+    st.markdown('<div class="search-box">', unsafe_allow_html=True)
+    st.subheader("🔍 Resume Search Engine")
+    st.caption("Upload resumes and search with keywords, phrases and filters (e.g., `python AND \"machine learning\" exp>=3`). Uploaded resumes are added to a persistent index, so earlier uploads stay searchable.")
+
+    resume_index = get_resume_index()
+    resume_index.backfill_fields(extract_years_of_experience, extract_email)
+
+    # --- File Upload ---
+    resumes = st.file_uploader("📤 Upload Resumes (PDF)", type="pdf", accept_multiple_files=True, key="resume_search_upload")
+    uploaded_doc_ids = set()
+
+    if resumes:
+        new_count = 0
+        for resume in resumes:
+            file_bytes = resume.getvalue()
+            file_hash = hash_bytes(file_bytes)
+            doc_id = resume_index.lookup_file(file_hash)
+            if doc_id is None:
+                try:
+                    with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
+                        text = ''.join(page.extract_text() or '' for page in pdf.pages)
+                    doc_id = resume_index.add_document(
+                        resume.name, text, file_hash=file_hash,
+                        years_exp=extract_years_of_experience(text), has_email=bool(extract_email(text))
                     )
-                    matched_snippets.append(highlighted)
+                    new_count += 1
+                except Exception as e:
+                    st.warning(f"⚠️ Error reading {resume.name}")
+                    continue
+            uploaded_doc_ids.add(doc_id)
+        st.success(f"✅ {len(resumes)} resume(s) uploaded ({new_count} newly indexed).")
+
+    if len(resume_index) > 0:
+        st.caption(f"📚 {len(resume_index)} resume(s) in the search index.")
+        only_uploaded = st.checkbox("Search only the resumes uploaded above", value=bool(uploaded_doc_ids), disabled=not uploaded_doc_ids)
+
+        search_mode = st.radio("Search mode", SEARCH_MODES, horizontal=True, key="resume_search_mode",
+                               help="Keyword uses the query syntax below. Semantic matches meaning (e.g. `built streaming data pipelines`). Hybrid fuses BM25 over the query words with the semantic ranking.")
+        query = st.text_input("🔎 Enter a search query", help=QUERY_HELP).strip()
+        fuzzy = st.toggle("🔤 Typo tolerant matching", value=False, key="resume_search_fuzzy",
+                          help="Also match words within 1 edit (4-6 letters) or 2 edits (7+ letters), counting swapped letters as one edit, e.g. `pyhton` → `python`. Phrases and exclusions stay exact.")
+        with st.expander("ℹ️ Query syntax"):
+            st.markdown(QUERY_HELP)
+        download_rows = []
+
+        if search_mode != SEARCH_MODES[0]:
+            if model is None:
+                st.warning("⚠️ The embedding model is not loaded, so semantic search is unavailable. Falling back to keyword search.")
+                search_mode = SEARCH_MODES[0]
+            else:
+                embedding_store = get_embedding_store()
+                pending = embedding_store.missing(resume_index)
+                if pending:
+                    embed_progress = st.progress(0, text=f"Embedding {len(pending)} resume(s) for semantic search...")
+                    embedding_store.embed_missing(
+                        resume_index,
+                        lambda texts: model.encode(texts, batch_size=32),
+                        clean=clean_text,
+                        progress=lambda done, total: embed_progress.progress(done / total, text=f"Embedding resumes ({done}/{total})...")
+                    )
+                    embed_progress.empty()
+
+        if query:
+            st.markdown("### 📄 Search Results")
+
+            start_time = time.perf_counter()
+            resume_index.sync()
+            query_error = None
+            scope = uploaded_doc_ids if only_uploaded else None
+            score_label = "BM25"
+            expansions = {}
+            if search_mode == SEARCH_MODES[0]:
+                try:
+                    hits, highlight_terms, total_matches = execute_query(
+                        resume_index, query, doc_ids=scope, limit=MAX_RESULTS, fuzzy=fuzzy, expansions=expansions
+                    )
+                except QuerySyntaxError as e:
+                    query_error = e
+                    hits, highlight_terms, total_matches = [], [], 0
+            else:
+                query_vector = model.encode(clean_text(query))  # Embedded once per query
+                highlight_terms = resume_index.expand_terms(tokenize(query), fuzzy=fuzzy)
+                semantic_hits = embedding_store.search(query_vector, k=HYBRID_RANK_DEPTH, doc_ids=scope)
+                if search_mode == SEARCH_MODES[1]:
+                    score_label = "similarity"
+                    ranked = semantic_hits[:MAX_RESULTS]
+                else:
+                    score_label = "RRF"
+                    keyword_hits = resume_index.bm25(highlight_terms, doc_ids=scope, limit=HYBRID_RANK_DEPTH)
+                    ranked = reciprocal_rank_fusion(
+                        [[doc_id for doc_id, _, _ in keyword_hits], [doc_id for doc_id, _ in semantic_hits]],
+                        limit=MAX_RESULTS
+                    )
+                hits = [
+                    (doc_id, score, [term for term in highlight_terms if resume_index.positions(term, doc_id)])
+                    for doc_id, score in ranked
+                ]
+                total_matches = len(hits)
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+
+            if expansions:
+                st.caption("🔤 Also matched: " + "; ".join(f"`{term}` → {', '.join(variants)}" for term, variants in expansions.items()))
+            if hits:
+                st.caption(f"{total_matches} matching resume(s), showing the top {len(hits)} ranked by {score_label} ({elapsed_ms:.1f} ms).")
 
-            if matched_snippets:
-                combined_snippet = " ... ".join(matched_snippets)
+            for doc_id, score, matched_terms in hits:
+                name = resume_index.doc_names[doc_id]
+                snippets, occurrences = resume_index.snippets(doc_id, matched_terms or highlight_terms)
+                if not snippets:
+                    snippets = [html.escape(resume_index.get_text(doc_id)[:200]).replace("\n", " ")]
+                combined_snippet = " ... ".join(snippets)
                 st.markdown(f"""<div class="result-box">
-                <b>📄 {name}</b><br>{combined_snippet}...
+                <b>📄 {html.escape(name)}</b> · {score_label} {score:.3f} · {occurrences} keyword match(es)<br>... {combined_snippet} ...
                 </div>""", unsafe_allow_html=True)
 
                 download_rows.append({
                     "File Name": name,
-                    "Matched Keywords": ", ".join(keywords),
-                    "Snippet": ' '.join(snippet for snippet in matched_snippets)
+                    "Search Mode": search_mode,
+                    f"Score ({score_label})": round(score, 4),
+                    "Matched Keywords": ", ".join(matched_terms),
+                    "Occurrences": occurrences,
+                    "Snippet": re.sub(r"<[^>]+>", "", " ... ".join(snippets))
                 })
 
-        if not found:
-            st.error("❌ No matching resumes found.")
+            if query_error:
+                st.error(f"❌ Invalid query: {query_error}")
+            elif not hits:
+                st.error("❌ No matching resumes found.")
 
-        # --- Export Button ---
-        if download_rows:
-            df_download = pd.DataFrame(download_rows)
-            csv_buffer = io.StringIO()
-            df_download.to_csv(csv_buffer, index=False)
-            st.download_button("📥 Download Matched Results (CSV)", data=csv_buffer.getvalue(), file_name="matched_resumes.csv", mime="text/csv")
+            # --- Export Button ---
+            if download_rows:
+                df_download = pd.DataFrame(download_rows)
+                csv_buffer = io.StringIO()
+                df_download.to_csv(csv_buffer, index=False)
+                st.download_button("📥 Download Matched Results (CSV)", data=csv_buffer.getvalue(), file_name="matched_resumes.csv", mime="text/csv")
 
-else:
-    st.info("📁 Please upload resume PDFs to begin searching.")
+    else:
+        st.info("📁 Please upload resume PDFs to begin searching.")
 
-st.markdown("</div>", unsafe_allow_html=True)
+    st.markdown("</div>", unsafe_allow_html=True)
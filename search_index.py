@@ -0,0 +1,549 @@
+import streamlit as st
+import sqlite3
+import hashlib
+import threading
+import math
+import bisect
+import heapq
+import re
+import html
+from array import array
+from datetime import datetime
+
+# --- Configuration ---
+INDEX_DB_FILE = "resume_index.db"
+BM25_K1 = 1.5
+BM25_B = 0.75
+SNIPPET_CONTEXT_CHARS = 60
+POSITION_TYPECODE = "I" # Token positions are stored as packed unsigned ints
+MAX_FUZZY_EXPANSIONS = 20
+
+# Tokens keep skill-style suffixes together ("c++", "c#", "node.js") while
+# dropping trailing punctuation ("python." -> "python"). Matching runs on the
+# original text so token positions map straight back to character offsets.
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[+#]+|(?:\.[a-z0-9]+)+)?", re.IGNORECASE | re.ASCII)
+
+
+# --- Helpers ---
+def tokenize(text):
+    """Lowercases text and returns its index tokens in order."""
+    return [token.lower() for token in TOKEN_RE.findall(text)]
+
+def tokenize_with_spans(text):
+    """Returns (token, start, end) tuples so token positions can be mapped back to characters."""
+    return [(m.group(0).lower(), m.start(), m.end()) for m in TOKEN_RE.finditer(text)]
+
+def trigrams(term):
+    """Padded character trigrams of a term ("sql" -> {"$$s", "$sq", "sql", "ql$"})."""
+    padded = f"$${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def fuzzy_distance_for(term):
+    """Edit budget by term length: short terms must match exactly, long terms allow two edits."""
+    if len(term) <= 3:
+        return 0
+    if len(term) <= 6:
+        return 1
+    return 2
+
+def bounded_edit_distance(a, b, max_distance):
+    """
+    Optimal string alignment distance (Levenshtein plus adjacent transpositions,
+    so "pyhton" is one edit from "python"). Gives up early and returns
+    max_distance + 1 once the distance must exceed max_distance.
+    """
+    if a == b:
+        return 0
+    before_previous = None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i] + [0] * len(b)
+        for j, char_b in enumerate(b, start=1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            )
+            if before_previous is not None and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                current[j] = min(current[j], before_previous[j - 2] + 1)
+        if min(current) > max_distance and (before_previous is None or min(previous) > max_distance):
+            return max_distance + 1
+        before_previous, previous = previous, current
+    return previous[-1]
+
+def decode_positions(stored):
+    """Decodes a stored position list: packed unsigned ints, or comma-separated text from older index files."""
+    if isinstance(stored, str):
+        return array(POSITION_TYPECODE, (int(p) for p in stored.split(",")))
+    positions = array(POSITION_TYPECODE)
+    positions.frombytes(stored)
+    return positions
+
+def hash_bytes(data):
+    """SHA-1 of raw bytes, used to skip re-extracting PDFs that are already indexed."""
+    return hashlib.sha1(data).hexdigest()
+
+def hash_text(text):
+    """SHA-1 of whitespace-normalized lowercase text, used to detect identical resumes."""
+    normalized = re.sub(r"\s+", " ", text).strip().lower()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+class ResumeIndex:
+    """
+    Persistent positional inverted index over resume texts.
+
+    Documents and postings live in SQLite so the index survives reruns and
+    restarts; the postings are mirrored in memory (term -> {doc_id: positions})
+    so queries never touch the documents themselves. Doc ids only grow, which
+    keeps every posting list sorted by doc id.
+    """
+
+    def __init__(self, db_path=INDEX_DB_FILE):
+        self.db_path = db_path
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+        self.postings = {}      # term -> {doc_id: array of token positions}
+        self.doc_names = {}     # doc_id -> display name
+        self.doc_lengths = {}   # doc_id -> number of tokens
+        self.file_hashes = {}   # raw file hash -> doc_id
+        self.content_hashes = {}# normalized text hash -> doc_id
+        self.doc_years = {}     # doc_id -> years of experience (field filter)
+        self.email_doc_ids = [] # sorted doc ids whose resume contains an email address
+        self.total_length = 0
+        self.max_doc_id = 0
+        self.max_alias_id = 0
+        self._vocabulary = None # sorted term list, rebuilt lazily after new terms arrive
+        self._years_sorted = None
+        self._doc_id_lists = {} # term -> cached sorted doc id list for the query engine
+        self.trigram_terms = {} # character trigram -> set of vocabulary terms (fuzzy matching)
+        self.sync()
+
+    def _create_schema(self):
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    doc_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    file_hash TEXT UNIQUE,
+                    content_hash TEXT NOT NULL,
+                    length INTEGER NOT NULL,
+                    text TEXT NOT NULL,
+                    added_at TEXT NOT NULL
+                )""")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS postings (
+                    term TEXT NOT NULL,
+                    doc_id INTEGER NOT NULL,
+                    positions BLOB NOT NULL,
+                    PRIMARY KEY (term, doc_id)
+                ) WITHOUT ROWID""")
+            # Files whose text matched an already indexed document, so they are not extracted again
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS file_aliases (
+                    alias_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    file_hash TEXT NOT NULL UNIQUE,
+                    doc_id INTEGER NOT NULL
+                )""")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_content_hash ON documents(content_hash)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_postings_doc_id ON postings(doc_id)")
+            # Field columns were added after the first release; migrate older index files in place
+            existing_columns = {row[1] for row in self.conn.execute("PRAGMA table_info(documents)")}
+            if "years_exp" not in existing_columns:
+                self.conn.execute("ALTER TABLE documents ADD COLUMN years_exp REAL")
+            if "has_email" not in existing_columns:
+                self.conn.execute("ALTER TABLE documents ADD COLUMN has_email INTEGER")
+
+    # --- Loading ---
+    def sync(self):
+        """
+        Loads documents and file aliases added since the last sync (by this or
+        another process). Cheap when nothing changed: a single lookup of both
+        maximum ids. Only sync() advances max_doc_id; documents this process
+        added in between are already loaded and skipped, so ids another process
+        committed below them are not missed. Every read is bounded by the
+        maximum read first, so a document committed meanwhile is left for the
+        next sync instead of arriving with postings but no length.
+        """
+        with self.lock:
+            latest, latest_alias = self.conn.execute(
+                "SELECT (SELECT COALESCE(MAX(doc_id), 0) FROM documents), (SELECT COALESCE(MAX(alias_id), 0) FROM file_aliases)"
+            ).fetchone()
+            if latest_alias > self.max_alias_id:
+                aliases = self.conn.execute(
+                    "SELECT file_hash, doc_id FROM file_aliases WHERE alias_id > ? AND alias_id <= ?",
+                    (self.max_alias_id, latest_alias)
+                )
+                for file_hash, doc_id in aliases:
+                    self.file_hashes.setdefault(file_hash, doc_id)
+                self.max_alias_id = latest_alias
+            if latest <= self.max_doc_id:
+                return 0
+            docs = self.conn.execute(
+                "SELECT doc_id, name, file_hash, content_hash, length, years_exp, has_email FROM documents WHERE doc_id > ? AND doc_id <= ? ORDER BY doc_id",
+                (self.max_doc_id, latest)
+            ).fetchall()
+            loaded = {doc[0] for doc in docs if doc[0] in self.doc_lengths} # Added by this process since the last sync
+            docs = [doc for doc in docs if doc[0] not in loaded]
+            for doc_id, name, file_hash, content_hash, length, years_exp, has_email in docs:
+                self._register_document(doc_id, name, file_hash, content_hash, length, years_exp, has_email)
+            # Primary-key order groups rows by term with ascending doc ids, so every
+            # in-memory posting list stays sorted without a separate sort step.
+            if self.max_doc_id == 0:
+                rows = self.conn.execute(
+                    "SELECT term, doc_id, positions FROM postings WHERE doc_id <= ? ORDER BY term, doc_id", (latest,)
+                )
+            else:
+                rows = self.conn.execute(
+                    "SELECT term, doc_id, positions FROM postings WHERE doc_id > ? AND doc_id <= ? ORDER BY term, doc_id",
+                    (self.max_doc_id, latest)
+                )
+            # Another process's ids below ones this process already holds would land out of order
+            out_of_order = bool(loaded) and bool(docs) and docs[0][0] < max(loaded)
+            touched = set()
+            current_term, current_postings = None, None
+            for term, doc_id, positions in rows:
+                if doc_id in loaded:
+                    continue
+                if term != current_term:
+                    if term not in self.postings:
+                        self._add_term_trigrams(term)
+                    current_term, current_postings = term, self.postings.setdefault(term, {})
+                    touched.add(term)
+                current_postings[doc_id] = decode_positions(positions)
+            if out_of_order:
+                for term in touched:
+                    self.postings[term] = dict(sorted(self.postings[term].items()))
+                self.doc_lengths = dict(sorted(self.doc_lengths.items()))
+            self.max_doc_id = latest
+            self._vocabulary = None
+            self._doc_id_lists.clear()
+            return len(docs)
+
+    def _register_document(self, doc_id, name, file_hash, content_hash, length, years_exp=None, has_email=None):
+        self.doc_names[doc_id] = name
+        self.doc_lengths[doc_id] = length
+        self.total_length += length
+        if file_hash:
+            self.file_hashes[file_hash] = doc_id
+        self.content_hashes.setdefault(content_hash, doc_id)
+        self._register_fields(doc_id, years_exp, has_email)
+
+    def _register_fields(self, doc_id, years_exp, has_email):
+        if years_exp is not None:
+            self.doc_years[doc_id] = float(years_exp)
+            self._years_sorted = None
+        if has_email and (not self.email_doc_ids or self.email_doc_ids[-1] < doc_id):
+            self.email_doc_ids.append(doc_id)
+        elif has_email:
+            bisect.insort(self.email_doc_ids, doc_id)
+
+    # --- Ingestion ---
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def lookup_file(self, file_hash):
+        """Returns the doc id of an already indexed file, or None."""
+        with self.lock:
+            return self.file_hashes.get(file_hash)
+
+    def add_document(self, name, text, file_hash=None, years_exp=None, has_email=None):
+        """
+        Indexes one resume and returns its doc id. Re-adding a file or a resume
+        with identical text returns the existing doc id without re-indexing;
+        a new file with identical text is remembered for lookup_file().
+        `years_exp` and `has_email` feed the field filters of the query language.
+        """
+        return self.add_documents([(name, text, file_hash, years_exp, has_email)])[0]
+
+    def add_documents(self, documents):
+        """
+        Indexes many resumes in a single transaction. `documents` yields
+        (name, text, file_hash, years_exp, has_email) tuples; returns their doc ids.
+        The in-memory postings are only updated once the transaction has committed.
+        """
+        doc_ids = []
+        pending = []
+        aliases = [] # (file_hash, doc_id) of new files whose text is already indexed
+        with self.lock:
+            self.sync()
+            seen_files = dict(self.file_hashes)
+            seen_contents = dict(self.content_hashes)
+            with self.conn:
+                for name, text, file_hash, years_exp, has_email in documents:
+                    content_hash = hash_text(text)
+                    if file_hash and file_hash in seen_files:
+                        doc_ids.append(seen_files[file_hash])
+                        continue
+                    if content_hash in seen_contents:
+                        doc_id = seen_contents[content_hash]
+                        if file_hash:
+                            self.conn.execute(
+                                "INSERT OR IGNORE INTO file_aliases (file_hash, doc_id) VALUES (?, ?)", (file_hash, doc_id)
+                            )
+                            seen_files[file_hash] = doc_id
+                            aliases.append((file_hash, doc_id))
+                        doc_ids.append(doc_id)
+                        continue
+
+                    tokens = tokenize(text)
+                    term_positions = {}
+                    for position, token in enumerate(tokens):
+                        if token not in term_positions:
+                            term_positions[token] = array(POSITION_TYPECODE)
+                        term_positions[token].append(position)
+
+                    cursor = self.conn.execute(
+                        "INSERT INTO documents (name, file_hash, content_hash, length, text, added_at, years_exp, has_email) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (name, file_hash, content_hash, len(tokens), text, datetime.now().isoformat(),
+                         years_exp, None if has_email is None else int(bool(has_email)))
+                    )
+                    doc_id = cursor.lastrowid
+                    self.conn.executemany(
+                        "INSERT INTO postings (term, doc_id, positions) VALUES (?, ?, ?)",
+                        [(term, doc_id, positions.tobytes()) for term, positions in term_positions.items()]
+                    )
+                    if file_hash:
+                        seen_files[file_hash] = doc_id
+                    seen_contents[content_hash] = doc_id
+                    pending.append((doc_id, name, file_hash, content_hash, len(tokens), years_exp, has_email, term_positions))
+                    doc_ids.append(doc_id)
+
+            for file_hash, doc_id in aliases:
+                self.file_hashes.setdefault(file_hash, doc_id)
+            for doc_id, name, file_hash, content_hash, length, years_exp, has_email, term_positions in pending:
+                self._register_document(doc_id, name, file_hash, content_hash, length, years_exp, has_email)
+                for term, positions in term_positions.items():
+                    if term not in self.postings:
+                        self._vocabulary = None
+                        self._add_term_trigrams(term)
+                    self._doc_id_lists.pop(term, None)
+                    self.postings.setdefault(term, {})[doc_id] = positions
+        return doc_ids
+
+    def backfill_fields(self, extract_years, extract_email):
+        """
+        Fills years_exp/has_email for documents indexed before field filters
+        existed. Only rows with missing fields are read, so this is a no-op once done.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT doc_id, text FROM documents WHERE years_exp IS NULL OR has_email IS NULL"
+            ).fetchall()
+            if not rows:
+                return 0
+            updates = []
+            for doc_id, text in rows:
+                years_exp = float(extract_years(text) or 0.0)
+                has_email = int(bool(extract_email(text)))
+                updates.append((years_exp, has_email, doc_id))
+                self._register_fields(doc_id, years_exp, has_email)
+            with self.conn:
+                self.conn.executemany("UPDATE documents SET years_exp = ?, has_email = ? WHERE doc_id = ?", updates)
+            return len(updates)
+
+    # --- Posting Lists ---
+    def all_doc_ids(self):
+        """Every indexed doc id in ascending order (the universe for NOT queries)."""
+        with self.lock:
+            return list(self.doc_lengths)
+
+    def doc_ids(self, term):
+        """Sorted posting list (doc ids only) for a term. Callers must not mutate it."""
+        with self.lock:
+            cached = self._doc_id_lists.get(term)
+            if cached is None:
+                cached = self._doc_id_lists[term] = list(self.postings.get(term, ()))
+            return cached
+
+    def positions(self, term, doc_id):
+        return self.postings.get(term, {}).get(doc_id, ())
+
+    def vocabulary(self):
+        """Sorted list of all indexed terms, rebuilt only after new terms were added."""
+        with self.lock:
+            if self._vocabulary is None:
+                self._vocabulary = sorted(self.postings)
+            return self._vocabulary
+
+    def expand_prefix(self, prefix, max_terms=200):
+        """Terms starting with `prefix`, found by binary search in the sorted vocabulary."""
+        vocabulary = self.vocabulary()
+        start = bisect.bisect_left(vocabulary, prefix)
+        expanded = []
+        for term in vocabulary[start:]:
+            if not term.startswith(prefix) or len(expanded) >= max_terms:
+                break
+            expanded.append(term)
+        return expanded
+
+    # --- Fuzzy Matching ---
+    def _add_term_trigrams(self, term):
+        for gram in trigrams(term):
+            self.trigram_terms.setdefault(gram, set()).add(term)
+
+    def expand_fuzzy(self, term, max_distance=None, max_terms=MAX_FUZZY_EXPANSIONS):
+        """
+        Vocabulary terms within `max_distance` edits of `term`, closest and most
+        frequent first. Candidates come from the trigram index (only terms sharing
+        enough trigrams are looked at) and are verified with a bounded edit distance.
+        Returns [(term, distance)]; an exact match is always included if indexed.
+        """
+        if max_distance is None:
+            max_distance = fuzzy_distance_for(term)
+        with self.lock:
+            if max_distance == 0:
+                return [(term, 0)] if term in self.postings else []
+            grams = trigrams(term)
+            # Each edit destroys at most three trigrams, a transposition at most four (q-gram lemma)
+            min_shared = max(1, len(grams) - 4 * max_distance)
+            shared = {}
+            for gram in grams:
+                for candidate in self.trigram_terms.get(gram, ()):
+                    shared[candidate] = shared.get(candidate, 0) + 1
+            matches = []
+            for candidate, count in shared.items():
+                if count < min_shared or abs(len(candidate) - len(term)) > max_distance:
+                    continue
+                distance = bounded_edit_distance(term, candidate, max_distance)
+                if distance <= max_distance:
+                    matches.append((candidate, distance))
+            matches.sort(key=lambda item: (item[1], -self.document_frequency(item[0])))
+            return matches[:max_terms]
+
+    def expand_terms(self, terms, fuzzy=False):
+        """Expands each term to its fuzzy variants (when enabled); exact terms pass through."""
+        if not fuzzy:
+            return list(terms)
+        expanded = []
+        for term in terms:
+            variants = [variant for variant, _ in self.expand_fuzzy(term)]
+            expanded.extend(variants or [term])
+        return list(dict.fromkeys(expanded))
+
+    def docs_with_experience(self, op, value):
+        """Sorted doc ids whose years of experience satisfy `op value` (op in >=, >, <=, <, =)."""
+        with self.lock:
+            if self._years_sorted is None:
+                pairs = sorted((years, doc_id) for doc_id, years in self.doc_years.items())
+                self._years_sorted = ([years for years, _ in pairs], pairs)
+            keys, years_sorted = self._years_sorted
+        if op == ">=":
+            selected = years_sorted[bisect.bisect_left(keys, value):]
+        elif op == ">":
+            selected = years_sorted[bisect.bisect_right(keys, value):]
+        elif op == "<=":
+            selected = years_sorted[:bisect.bisect_right(keys, value)]
+        elif op == "<":
+            selected = years_sorted[:bisect.bisect_left(keys, value)]
+        else:
+            selected = years_sorted[bisect.bisect_left(keys, value):bisect.bisect_right(keys, value)]
+        return sorted(doc_id for _, doc_id in selected)
+
+    def docs_with_email(self):
+        with self.lock:
+            return list(self.email_doc_ids)
+
+    # --- Querying ---
+    def document_frequency(self, term):
+        return len(self.postings.get(term, ()))
+
+    def idf(self, term):
+        n_docs = len(self.doc_lengths)
+        df = self.document_frequency(term)
+        return math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+    def bm25(self, terms, doc_ids=None, limit=50):
+        """
+        Ranks documents containing any of `terms` by BM25, reading only their
+        posting lists. `doc_ids` optionally restricts scoring to a candidate set.
+        Returns [(doc_id, score, matched_terms)] sorted by score.
+        """
+        with self.lock:
+            n_docs = len(self.doc_lengths)
+            if n_docs == 0:
+                return []
+            avg_len = self.total_length / n_docs
+            scores = {}
+            matched = {}
+            for term in dict.fromkeys(terms):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = self.idf(term)
+                if doc_ids is not None and len(doc_ids) < len(postings):
+                    candidates = ((doc_id, postings[doc_id]) for doc_id in doc_ids if doc_id in postings)
+                else:
+                    candidates = postings.items()
+                for doc_id, positions in candidates:
+                    if doc_ids is not None and doc_id not in doc_ids:
+                        continue
+                    tf = len(positions)
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / avg_len)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+                    matched.setdefault(doc_id, []).append(term)
+            if limit:
+                ranked = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            else:
+                ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            return [(doc_id, score, matched[doc_id]) for doc_id, score in ranked]
+
+    def search(self, query, doc_ids=None, limit=50, fuzzy=False):
+        """Tokenizes a free-text query and ranks matching documents by BM25 (optionally typo tolerant)."""
+        return self.bm25(self.expand_terms(tokenize(query), fuzzy=fuzzy), doc_ids=doc_ids, limit=limit)
+
+    def get_text(self, doc_id):
+        with self.lock:
+            row = self.conn.execute("SELECT text FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+        return row[0] if row else ""
+
+    def snippets(self, doc_id, terms, max_snippets=5):
+        """
+        Builds HTML snippets around every occurrence of `terms` in a document,
+        merging overlapping windows. Matches are wrapped in <span class='highlight'>.
+        Returns (snippets, total_occurrences).
+        """
+        term_set = set(terms)
+        with self.lock:
+            positions = sorted(
+                p for term in term_set for p in self.postings.get(term, {}).get(doc_id, ())
+            )
+        if not positions:
+            return [], 0
+
+        text = self.get_text(doc_id)
+        spans = tokenize_with_spans(text)
+        hits = [spans[p] for p in positions if p < len(spans)]
+
+        # Merge hits whose context windows overlap into one snippet
+        windows = []
+        for _, start, end in hits:
+            window_start = max(0, start - SNIPPET_CONTEXT_CHARS)
+            window_end = min(len(text), end + SNIPPET_CONTEXT_CHARS)
+            if windows and window_start <= windows[-1][1]:
+                windows[-1][1] = max(windows[-1][1], window_end)
+                windows[-1][2].append((start, end))
+            else:
+                windows.append([window_start, window_end, [(start, end)]])
+
+        rendered = []
+        for window_start, window_end, matches in windows[:max_snippets]:
+            parts = []
+            cursor = window_start
+            for start, end in matches:
+                parts.append(html.escape(text[cursor:start]))
+                parts.append(f"<span class='highlight'>{html.escape(text[start:end])}</span>")
+                cursor = end
+            parts.append(html.escape(text[cursor:window_end]))
+            rendered.append("".join(parts).replace("\n", " "))
+        return rendered, len(hits)
+
+
+@st.cache_resource
+def get_resume_index():
+    """Process-wide ResumeIndex shared by every session."""
+    return ResumeIndex()
@@ -0,0 +1,288 @@
+import re
+import math
+from search_index import tokenize
+
+# --- Query Language ---
+# python AND sql            both terms (AND is also implied between terms)
+# python OR java, sql       either term (a comma is a shorthand for OR)
+# NOT php / -php            exclude documents containing the term
+# "machine learning"        exact phrase (consecutive tokens)
+# pyth*                     prefix wildcard
+# exp>=5 / years<3          field filter on extracted years of experience
+# has:email                 only resumes with an email address
+# (a OR b) AND c            grouping
+# Operators must be written in upper case so ordinary words like "and" stay searchable.
+
+QUERY_TOKEN_RE = re.compile(r'''
+    (?P<phrase>"[^"]*")
+  | (?P<lparen>\()
+  | (?P<rparen>\))
+  | (?P<comma>,)
+  | (?P<field>(?:exp|experience|years)\s*(?:>=|<=|>|<|=)\s*\d+(?:\.\d+)?)
+  | (?P<has>has:\w+)
+  | (?P<word>[^\s(),"]+)
+''', re.VERBOSE | re.IGNORECASE)
+
+FIELD_RE = re.compile(r"(exp|experience|years)\s*(>=|<=|>|<|=)\s*(\d+(?:\.\d+)?)", re.IGNORECASE)
+MAX_PREFIX_EXPANSION = 200
+
+
+class QuerySyntaxError(ValueError):
+    """Raised when a search query cannot be parsed."""
+
+
+# --- Parsing ---
+def _lex(query):
+    tokens = []
+    position = 0
+    for match in QUERY_TOKEN_RE.finditer(query):
+        if query[position:match.start()].strip():
+            raise QuerySyntaxError(f"Unexpected input near '{query[position:match.start()].strip()}'")
+        position = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "word" and value in ("AND", "OR", "NOT"):
+            kind = value.lower()
+        elif kind == "comma":
+            kind = "or"
+        tokens.append((kind, value))
+    if query[position:].strip():
+        raise QuerySyntaxError(f"Unexpected input near '{query[position:].strip()}'")
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser producing a small tuple-based AST."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.index = 0
+
+    def peek(self):
+        return self.tokens[self.index][0] if self.index < len(self.tokens) else None
+
+    def take(self):
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            raise QuerySyntaxError("Empty query.")
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise QuerySyntaxError(f"Unexpected '{self.tokens[self.index][1]}'")
+        return node
+
+    def parse_or(self):
+        children = [self.parse_and()]
+        while self.peek() == "or":
+            self.take()
+            children.append(self.parse_and())
+        return children[0] if len(children) == 1 else ("or", children)
+
+    def parse_and(self):
+        children = [self.parse_not()]
+        while self.peek() not in (None, "or", "rparen"):
+            if self.peek() == "and":
+                self.take()
+            children.append(self.parse_not())
+        return children[0] if len(children) == 1 else ("and", children)
+
+    def parse_not(self):
+        if self.peek() == "not":
+            self.take()
+            return ("not", self.parse_not())
+        if self.peek() == "word" and self.tokens[self.index][1].startswith("-") and len(self.tokens[self.index][1]) > 1:
+            _, value = self.take()
+            return ("not", self._word_node(value[1:]))
+        return self.parse_atom()
+
+    def parse_atom(self):
+        kind = self.peek()
+        if kind is None:
+            raise QuerySyntaxError("Query ends unexpectedly.")
+        _, value = self.take()
+        if kind == "lparen":
+            node = self.parse_or()
+            if self.peek() != "rparen":
+                raise QuerySyntaxError("Missing closing parenthesis.")
+            self.take()
+            return node
+        if kind == "phrase":
+            terms = tokenize(value.strip('"'))
+            if not terms:
+                raise QuerySyntaxError("Empty phrase.")
+            return ("phrase", terms) if len(terms) > 1 else ("term", terms[0])
+        if kind == "field":
+            name, op, number = FIELD_RE.match(value).groups()
+            return ("field", "years", op, float(number))
+        if kind == "has":
+            field = value.split(":", 1)[1].lower()
+            if field != "email":
+                raise QuerySyntaxError(f"Unknown filter 'has:{field}'. Supported: has:email")
+            return ("has", field)
+        if kind == "word":
+            return self._word_node(value)
+        raise QuerySyntaxError(f"Unexpected '{value}'")
+
+    def _word_node(self, value):
+        if value.endswith("*"):
+            prefix_terms = tokenize(value.rstrip("*"))
+            if len(prefix_terms) != 1:
+                raise QuerySyntaxError(f"Invalid wildcard '{value}'")
+            return ("prefix", prefix_terms[0])
+        terms = tokenize(value)
+        if not terms:
+            raise QuerySyntaxError(f"Nothing searchable in '{value}'")
+        # "machine-learning" tokenizes to two terms and is matched as a phrase
+        return ("phrase", terms) if len(terms) > 1 else ("term", terms[0])
+
+
+def parse_query(query):
+    """Parses a query string into an AST. Raises QuerySyntaxError on invalid input."""
+    return _Parser(_lex(query)).parse()
+
+
+# --- Posting List Algebra ---
+def intersect(a, b):
+    """
+    Intersects two sorted doc id lists using sqrt(n) skip pointers, so long
+    runs of non-matching ids in the longer list are jumped over.
+    """
+    result = []
+    i = j = 0
+    len_a, len_b = len(a), len(b)
+    skip_a = int(math.sqrt(len_a)) or 1
+    skip_b = int(math.sqrt(len_b)) or 1
+    while i < len_a and j < len_b:
+        doc_a, doc_b = a[i], b[j]
+        if doc_a == doc_b:
+            result.append(doc_a)
+            i += 1
+            j += 1
+        elif doc_a < doc_b:
+            if i + skip_a < len_a and a[i + skip_a] <= doc_b:
+                while i + skip_a < len_a and a[i + skip_a] <= doc_b:
+                    i += skip_a
+            else:
+                i += 1
+        else:
+            if j + skip_b < len_b and b[j + skip_b] <= doc_a:
+                while j + skip_b < len_b and b[j + skip_b] <= doc_a:
+                    j += skip_b
+            else:
+                j += 1
+    return result
+
+def union(lists):
+    """Union of sorted doc id lists, returned sorted."""
+    lists = [lst for lst in lists if lst]
+    if not lists:
+        return []
+    if len(lists) == 1:
+        return list(lists[0])
+    return sorted(set().union(*lists))
+
+def difference(a, b):
+    """Doc ids in sorted list `a` that are not in sorted list `b`."""
+    if not b:
+        return list(a)
+    excluded = set(b)
+    return [doc_id for doc_id in a if doc_id not in excluded]
+
+
+# --- Evaluation ---
+def _phrase_docs(index, terms):
+    candidates = None
+    for term in sorted(set(terms), key=index.document_frequency):
+        postings = index.doc_ids(term)
+        candidates = postings if candidates is None else intersect(candidates, postings)
+        if not candidates:
+            return []
+    matches = []
+    for doc_id in candidates:
+        following = [set(index.positions(term, doc_id)) for term in terms[1:]]
+        for start in index.positions(terms[0], doc_id):
+            if all(start + offset + 1 in positions for offset, positions in enumerate(following)):
+                matches.append(doc_id)
+                break
+    return matches
+
+def evaluate(index, node, highlight_terms, fuzzy=False, expansions=None):
+    """
+    Evaluates an AST against the index and returns a sorted list of doc ids.
+    Positive search terms are collected into `highlight_terms` for ranking and snippets.
+    With `fuzzy`, single terms also match vocabulary variants within a small edit
+    distance; the variants used are recorded in `expansions` (term -> [variants]).
+    Negated terms always match exactly so a typo budget never widens an exclusion.
+    """
+    kind = node[0]
+    if kind == "term":
+        if fuzzy:
+            variants = [variant for variant, _ in index.expand_fuzzy(node[1])]
+            if variants:
+                if expansions is not None and variants != [node[1]]:
+                    expansions[node[1]] = [variant for variant in variants if variant != node[1]]
+                highlight_terms.extend(variants)
+                return union([index.doc_ids(variant) for variant in variants])
+        highlight_terms.append(node[1])
+        return index.doc_ids(node[1])
+    if kind == "prefix":
+        expanded = index.expand_prefix(node[1], max_terms=MAX_PREFIX_EXPANSION)
+        highlight_terms.extend(expanded)
+        return union([index.doc_ids(term) for term in expanded])
+    if kind == "phrase":
+        highlight_terms.extend(node[1])
+        return _phrase_docs(index, node[1])
+    if kind == "field":
+        _, _, op, value = node
+        return index.docs_with_experience(op, value)
+    if kind == "has":
+        return index.docs_with_email()
+    if kind == "or":
+        return union([evaluate(index, child, highlight_terms, fuzzy, expansions) for child in node[1]])
+    if kind == "not":
+        return difference(index.all_doc_ids(), evaluate(index, node[1], []))
+    if kind == "and":
+        positives = [child for child in node[1] if child[0] != "not"]
+        negatives = [child[1] for child in node[1] if child[0] == "not"]
+        if positives:
+            lists = sorted((evaluate(index, child, highlight_terms, fuzzy, expansions) for child in positives), key=len)
+            result = lists[0]
+            for postings in lists[1:]:
+                if not result:
+                    break
+                result = intersect(result, postings)
+        else:
+            result = index.all_doc_ids()
+        for child in negatives:
+            if not result:
+                break
+            result = difference(result, evaluate(index, child, []))
+        return result
+    raise QuerySyntaxError(f"Unknown query node '{kind}'")
+
+def execute_query(index, query, doc_ids=None, limit=50, fuzzy=False, expansions=None):
+    """
+    Parses and evaluates a query, then ranks the matching documents by BM25 over
+    the positive search terms. Filter-only queries keep index order.
+    Returns (hits, highlight_terms, total_matches) where hits are (doc_id, score, matched_terms).
+    """
+    highlight_terms = []
+    with index.lock:
+        matches = evaluate(index, parse_query(query), highlight_terms, fuzzy, expansions)
+    if doc_ids is not None:
+        matches = [doc_id for doc_id in matches if doc_id in doc_ids]
+    highlight_terms = list(dict.fromkeys(highlight_terms))
+
+    hits = index.bm25(highlight_terms, doc_ids=set(matches), limit=limit) if highlight_terms else []
+    if not limit or len(hits) < limit:
+        # Documents matched only through filters or OR branches without search terms
+        ranked_ids = {doc_id for doc_id, _, _ in hits}
+        for doc_id in matches:
+            if limit and len(hits) >= limit:
+                break
+            if doc_id not in ranked_ids:
+                hits.append((doc_id, 0.0, []))
+    return hits, highlight_terms, len(matches)
@@ -0,0 +1,191 @@
+import streamlit as st
+import numpy as np
+import sqlite3
+import threading
+
+from search_index import INDEX_DB_FILE
+
+# --- Configuration ---
+EMBED_BATCH_SIZE = 64
+ANN_THRESHOLD = 20000       # Switch from exact matrix-vector scoring to the IVF index above this size
+ANN_PROBES = 8              # Clusters scanned per query in the IVF index
+ANN_REBUILD_GROWTH = 1.5    # Rebuild the IVF index once the corpus grew by this factor
+RRF_K = 60                  # Reciprocal rank fusion damping constant
+
+
+# --- Helpers ---
+def normalize_rows(matrix):
+    """L2-normalizes each row so dot products are cosine similarities."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def top_k(scores, k):
+    """Indices of the k highest scores, best first, via argpartition (O(n) instead of a full sort)."""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    candidates = np.argpartition(-scores, k)[:k]
+    return candidates[np.argsort(-scores[candidates])]
+
+def reciprocal_rank_fusion(rankings, k=RRF_K, limit=50):
+    """
+    Fuses several ranked doc id lists: score(d) = sum(1 / (k + rank_i(d))).
+    Returns [(doc_id, fused_score)] best first.
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+class IVFIndex:
+    """
+    Minimal inverted-file ANN index: rows are clustered with spherical k-means
+    and a query only scores the rows of its `probes` closest centroids.
+    """
+
+    def __init__(self, matrix, n_clusters=None, iterations=10, seed=42):
+        n_rows = matrix.shape[0]
+        n_clusters = n_clusters or max(1, int(np.sqrt(n_rows)))
+        rng = np.random.default_rng(seed)
+        centroids = matrix[rng.choice(n_rows, size=n_clusters, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = np.argmax(matrix @ centroids.T, axis=1)
+            for cluster in range(n_clusters):
+                members = matrix[assignments == cluster]
+                if len(members):
+                    centroids[cluster] = members.mean(axis=0)
+            centroids = normalize_rows(centroids)
+        self.centroids = centroids
+        assignments = np.argmax(matrix @ centroids.T, axis=1)
+        self.lists = [np.flatnonzero(assignments == cluster) for cluster in range(n_clusters)]
+        self.size = n_rows
+
+    def search(self, matrix, query, k, probes=ANN_PROBES):
+        closest = top_k(self.centroids @ query, min(probes, len(self.centroids)))
+        rows = np.concatenate([self.lists[cluster] for cluster in closest])
+        if rows.size == 0:
+            return rows, np.zeros(0, dtype=np.float32)
+        scores = matrix[rows] @ query
+        order = top_k(scores, k)
+        return rows[order], scores[order]
+
+
+class EmbeddingStore:
+    """
+    Resume embeddings stored next to the keyword index (same SQLite file) and
+    kept in memory as one normalized float32 matrix, so a query costs a single
+    matrix-vector product (or an IVF probe beyond ANN_THRESHOLD rows).
+    """
+
+    def __init__(self, db_path=INDEX_DB_FILE):
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    doc_id INTEGER PRIMARY KEY,
+                    vector BLOB NOT NULL
+                )""")
+        self.doc_ids = np.zeros(0, dtype=np.int64)
+        self.matrix = None
+        self.known = set()
+        self.ann = None
+        self._load()
+
+    def _load(self):
+        rows = self.conn.execute("SELECT doc_id, vector FROM embeddings ORDER BY doc_id").fetchall()
+        rows = [(doc_id, vector) for doc_id, vector in rows if doc_id not in self.known]
+        if rows:
+            vectors = np.vstack([np.frombuffer(vector, dtype=np.float32) for _, vector in rows])
+            self._append([doc_id for doc_id, _ in rows], vectors)
+
+    def _append(self, doc_ids, vectors):
+        vectors = normalize_rows(np.asarray(vectors, dtype=np.float32))
+        self.doc_ids = np.concatenate([self.doc_ids, np.asarray(doc_ids, dtype=np.int64)])
+        self.matrix = vectors if self.matrix is None else np.vstack([self.matrix, vectors])
+        self.known.update(doc_ids)
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def missing(self, index):
+        """Doc ids present in the keyword index but not embedded yet."""
+        with self.lock:
+            # Another process (or replica) may have embedded resumes since the last load
+            stored = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if stored > len(self.known):
+                self._load()
+            return [doc_id for doc_id in index.all_doc_ids() if doc_id not in self.known]
+
+    def embed_missing(self, index, encode, clean=lambda text: text, progress=None):
+        """
+        Embeds every indexed resume that has no stored vector yet, in batches.
+        `encode` maps a list of texts to a 2-D array; `progress(done, total)` is optional.
+        Each batch is persisted as it finishes; the in-memory matrix grows once at the end.
+        """
+        pending = self.missing(index)
+        embedded_ids, embedded_vectors = [], []
+        for start in range(0, len(pending), EMBED_BATCH_SIZE):
+            batch = pending[start:start + EMBED_BATCH_SIZE]
+            vectors = np.asarray(encode([clean(index.get_text(doc_id)) for doc_id in batch]), dtype=np.float32)
+            with self.lock:
+                with self.conn:
+                    self.conn.executemany(
+                        "INSERT OR REPLACE INTO embeddings (doc_id, vector) VALUES (?, ?)",
+                        [(doc_id, vector.tobytes()) for doc_id, vector in zip(batch, vectors)]
+                    )
+            embedded_ids.extend(batch)
+            embedded_vectors.append(vectors)
+            if progress:
+                progress(min(start + EMBED_BATCH_SIZE, len(pending)), len(pending))
+
+        if embedded_ids:
+            with self.lock:
+                vectors = np.vstack(embedded_vectors)
+                keep = [i for i, doc_id in enumerate(embedded_ids) if doc_id not in self.known]
+                if keep:
+                    self._append([embedded_ids[i] for i in keep], vectors[keep])
+        return len(pending)
+
+    def search(self, query_vector, k=50, doc_ids=None):
+        """
+        Returns [(doc_id, cosine_similarity)] for the k closest resumes.
+        `doc_ids` restricts results to a candidate set (exact scoring is used then).
+        """
+        with self.lock:
+            if self.matrix is None or len(self.doc_ids) == 0:
+                return []
+            matrix, ids = self.matrix, self.doc_ids
+            query = np.asarray(query_vector, dtype=np.float32).ravel()
+            query = query / (np.linalg.norm(query) or 1.0)
+
+            if doc_ids is not None:
+                mask = np.isin(ids, np.fromiter(doc_ids, dtype=np.int64))
+                rows = np.flatnonzero(mask)
+                scores = matrix[rows] @ query
+                order = top_k(scores, k)
+                return [(int(ids[rows[i]]), float(scores[i])) for i in order]
+
+            if len(ids) >= ANN_THRESHOLD:
+                if self.ann is None or len(ids) >= self.ann.size * ANN_REBUILD_GROWTH:
+                    self.ann = IVFIndex(matrix)
+                rows, scores = self.ann.search(matrix, query, k)
+                # Rows appended after the last IVF build are scored exactly
+                if self.ann.size < len(ids):
+                    tail_scores = matrix[self.ann.size:] @ query
+                    rows = np.concatenate([rows, np.arange(self.ann.size, len(ids))])
+                    scores = np.concatenate([scores, tail_scores])
+                    order = top_k(scores, k)
+                    rows, scores = rows[order], scores[order]
+                return [(int(ids[row]), float(score)) for row, score in zip(rows, scores)]
+
+            scores = matrix @ query
+            return [(int(ids[i]), float(scores[i])) for i in top_k(scores, k)]
+
+
+@st.cache_resource
+def get_embedding_store():
+    """Process-wide EmbeddingStore shared by every session."""
+    return EmbeddingStore()
@@ -9,6 +9,7 @@ from sklearn.model_selection import train_test_split, GridSearchCV
 from sklearn.metrics import mean_squared_error, r2_score
 import nltk
 import collections
+from concurrency import get_cpu_plan, apply_torch_threads
 
 # --- Configuration ---
 MODEL_SAVE_PATH = "ml_screening_model.pkl"
@@ -216,6 +217,8 @@ def create_features(jd_text, resume_text, jd_model, resume_model):
 # --- Main Training Script ---
 if __name__ == "__main__":
     print("Starting model training process...")
+    cpu_plan = get_cpu_plan()
+    apply_torch_threads()
 
     # Load pre-trained SentenceTransformer models
     # Using 'all-MiniLM-L6-v2' for efficiency and good performance (384 dimensions per embedding)
@@ -7235,12 +7238,14 @@ if __name__ == "__main__":
         }
 
         # Initialize RandomForestRegressor
-        rf = RandomForestRegressor(random_state=42, n_jobs=-1)
+        # Single-threaded fits: the grid search below runs the fits in parallel, and
+        # nesting n_jobs=-1 inside n_jobs=-1 oversubscribes the CPU budget
+        rf = RandomForestRegressor(random_state=42, n_jobs=cpu_plan.fit_jobs)
 
         # Initialize GridSearchCV
         # cv=3 means 3-fold cross-validation
         # scoring='r2' means optimize for R-squared
-        grid_search = GridSearchCV(estimator=rf, param_grid=param_grid, cv=3, n_jobs=-1, verbose=2, scoring='r2')
+        grid_search = GridSearchCV(estimator=rf, param_grid=param_grid, cv=3, n_jobs=cpu_plan.search_jobs, verbose=2, scoring='r2')
 
         print("Starting GridSearchCV for hyperparameter tuning...")
         grid_search.fit(X_train, y_train)
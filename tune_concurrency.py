@@ -0,0 +1,178 @@
+"""
+Sweep tool for the CPU budget split in concurrency.py.
+
+Runs the screening workloads on this machine and prints the environment
+settings that served them best:
+  * split    - for each (torch threads, PDF workers) pair that fits the budget,
+               extracts a PDF corpus in the spawn process pool while the main
+               process encodes the resume texts with that many torch threads,
+               as the screening pipeline does; reports resumes/s
+  * predict  - the screening forest with each n_jobs, on one row (the
+               screener's per-resume call) and on a matrix of rows (matrix
+               screening, Find Roles)
+The encode leg needs sentence-transformers and is skipped without it. Without
+--pdf-dir a synthetic corpus is generated with matplotlib.
+
+Usage:
+    python tune_concurrency.py [--budget 8] [--resumes 64] [--pdf-dir resumes/] [--model-file ml_screening_model.pkl]
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+import numpy as np
+
+from concurrency import (
+    CPU_BUDGET_ENV, TORCH_THREADS_ENV, PDF_WORKERS_ENV, PREDICT_JOBS_ENV,
+    CpuPlan, apply_torch_threads, available_cpus
+)
+from pdf_extract import extract_pdf_text
+from skills_data import ALL_SKILLS_MASTER
+
+PREDICT_ROWS = 8192
+PREDICT_REPEATS = 20
+
+
+def synthetic_pdfs(count, seed=42):
+    """Small text-only resumes rendered with matplotlib's PDF backend."""
+    import io
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    rng = random.Random(seed)
+    skills = sorted(ALL_SKILLS_MASTER)
+    pdfs = []
+    for i in range(count):
+        lines = [f"Candidate {i}", f"{rng.randint(1, 15)} years of experience", ""]
+        lines += [", ".join(rng.sample(skills, 8)) for _ in range(30)]
+        fig = plt.figure(figsize=(8.5, 11))
+        for row, line in enumerate(lines):
+            fig.text(0.05, 0.95 - row * 0.028, line, fontsize=8)
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="pdf")
+        plt.close(fig)
+        pdfs.append(buffer.getvalue())
+    return pdfs
+
+
+def load_pdfs(pdf_dir, count):
+    if not pdf_dir:
+        return synthetic_pdfs(count)
+    names = sorted(name for name in os.listdir(pdf_dir) if name.lower().endswith(".pdf"))[:count]
+    pdfs = []
+    for name in names:
+        with open(os.path.join(pdf_dir, name), "rb") as f:
+            pdfs.append(f.read())
+    return pdfs
+
+
+def candidate_splits(budget):
+    """(torch threads, PDF workers) pairs using the whole budget; both get at least one core."""
+    if budget < 2:
+        return [(1, 1)]
+    steps = sorted(step for step in {1, budget // 4, budget // 2, budget - budget // 4, budget - 1} if 1 <= step <= budget - 1)
+    return [(threads, budget - threads) for threads in steps]
+
+
+# --- Sweeps ---
+def sweep_splits(budget, pdfs, texts, model):
+    rows = []
+    for threads, workers in candidate_splits(budget):
+        apply_torch_threads(threads)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            list(pool.map(int, range(workers))) # Start the workers before timing
+            start = time.perf_counter()
+            futures = [pool.submit(extract_pdf_text, data) for data in pdfs]
+            encode_seconds = 0.0
+            if model is not None:
+                for offset in range(0, len(texts), 32):
+                    model.encode(texts[offset:offset + 32], batch_size=32)
+                encode_seconds = time.perf_counter() - start
+            wait(futures)
+            wall = time.perf_counter() - start
+        rows.append({"torch": threads, "pdf": workers, "encode_s": encode_seconds, "wall_s": wall,
+                     "per_s": len(pdfs) / wall})
+        print(f"  torch {threads:>2} + pdf {workers:>2}: {rows[-1]['per_s']:7.1f} resumes/s"
+              f"  (encode {encode_seconds:5.2f}s, wall {wall:5.2f}s)")
+    return rows
+
+
+def sweep_predict(budget, ml_model):
+    n_features = ml_model.n_features_in_
+    rng = np.random.default_rng(0)
+    one, many = rng.random((1, n_features)), rng.random((PREDICT_ROWS, n_features))
+    rows = []
+    for n_jobs in sorted(n for n in {1, 2, 4, budget // 4 or 1, budget // 2 or 1, budget} if n <= budget):
+        ml_model.n_jobs = n_jobs
+        single = []
+        for _ in range(PREDICT_REPEATS):
+            start = time.perf_counter()
+            ml_model.predict(one)
+            single.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        ml_model.predict(many)
+        rows.append({"n_jobs": n_jobs, "single_ms": statistics.median(single) * 1000,
+                     "matrix_s": time.perf_counter() - start})
+        print(f"  n_jobs {n_jobs:>2}: 1 row {rows[-1]['single_ms']:7.2f} ms   {PREDICT_ROWS} rows {rows[-1]['matrix_s']:6.3f} s")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=int, default=None, help=f"Cores to split (default: {CPU_BUDGET_ENV} or all available)")
+    parser.add_argument("--resumes", type=int, default=64)
+    parser.add_argument("--pdf-dir", default=None, help="Folder of sample resume PDFs (default: synthetic)")
+    parser.add_argument("--model-file", default="ml_screening_model.pkl")
+    args = parser.parse_args()
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+    plan = CpuPlan(args.budget)
+    print(f"CPU budget {plan.budget} of {available_cpus()} available cores; "
+          f"current plan: torch {plan.torch_threads}, pdf {plan.pdf_workers}, predict n_jobs {plan.predict_jobs}")
+
+    pdfs = load_pdfs(args.pdf_dir, args.resumes)
+    if not pdfs:
+        parser.error(f"No PDFs found in {args.pdf_dir}")
+    texts = [extract_pdf_text(data)[0] for data in pdfs]
+    try:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer("all-MiniLM-L6-v2")
+        model.encode(texts[:2]) # Warm up
+    except ImportError:
+        model = None
+        print("sentence-transformers is not installed: timing PDF extraction only")
+
+    print(f"\nSplit sweep ({len(pdfs)} resumes):")
+    best_split = max(sweep_splits(plan.budget, pdfs, texts, model), key=lambda row: row["per_s"])
+
+    best_jobs = None
+    if os.path.exists(args.model_file):
+        import joblib
+        print("\nPredict sweep:")
+        predict_rows = sweep_predict(plan.budget, joblib.load(args.model_file))
+        # Fastest on a matrix without making the per-resume call noticeably slower than single-threaded
+        baseline = predict_rows[0]["single_ms"]
+        best_jobs = min((row for row in predict_rows if row["single_ms"] <= baseline * 2),
+                        key=lambda row: row["matrix_s"])["n_jobs"]
+    else:
+        print(f"\n{args.model_file} not found: skipping the predict sweep")
+
+    print("\nRecommended settings:")
+    print(f"  {CPU_BUDGET_ENV}={plan.budget}")
+    if model is not None: # Without the encode leg the sweep only favours more PDF workers
+        print(f"  {TORCH_THREADS_ENV}={best_split['torch']}")
+        print(f"  {PDF_WORKERS_ENV}={best_split['pdf']}")
+    if best_jobs is not None:
+        print(f"  {PREDICT_JOBS_ENV}={best_jobs}")
+
+
+if __name__ == "__main__":
+    main()